@@ -5896,6 +5896,23 @@ async def save_brand_kpi_selections(
             last_modified_by=current_user.get("email")
         )
         
+        # The upsert re-checks the version; None means another save won the race
+        if result is None:
+            existing = supabase.get_brand_kpi_selection(brand_id) or {}
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "error": "conflict",
+                    "message": "Resource was modified by another user. Please refresh and try again.",
+                    "current_version": existing.get("version", 1),
+                    "current_data": {
+                        "selected_kpis": existing.get("selected_kpis", []),
+                        "visible_sections": existing.get("visible_sections", []),
+                        "last_modified_by": existing.get("last_modified_by")
+                    }
+                }
+            )
+        
         updated_version = result.get("version", 1)
         
         logger.info(f"Saved KPI selections for brand {brand_id}: {len(request.selected_kpis)} KPIs, {len(visible_sections)} sections, {len(selected_charts)} charts, version={updated_version}")
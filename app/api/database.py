@@ -42,59 +42,22 @@ async def update_brand_ids(
     brand_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Update existing prompts and responses with brand_id"""
+    """Set brand_id on existing prompts and responses that don't have one yet"""
     try:
         brand_id_to_use = brand_id or settings.BRAND_ID
         
         if not brand_id_to_use:
             raise HTTPException(status_code=400, detail="brand_id is required")
         
-        # Update prompts using SQLAlchemy
-        prompts_query = select(Prompt.id)
-        prompts_result = db.execute(prompts_query)
-        prompts = prompts_result.scalars().all()
-        
-        prompts_updated = 0
-        if prompts:
-            # Update prompts in batches using SQLAlchemy
-            batch_size = 100
-            for i in range(0, len(prompts), batch_size):
-                batch = prompts[i:i + batch_size]
-                try:
-                    update_stmt = (
-                        update(Prompt)
-                        .where(Prompt.id.in_(batch))
-                        .values(brand_id=brand_id_to_use)
-                    )
-                    result = db.execute(update_stmt)
-                    prompts_updated += result.rowcount
-                except Exception as e:
-                    logger.warning(f"Failed to update prompts batch: {e}")
-        
-        db.commit()
-        
-        # Update responses using SQLAlchemy
-        responses_query = select(Response.id)
-        responses_result = db.execute(responses_query)
-        responses = responses_result.scalars().all()
-        
-        responses_updated = 0
-        if responses:
-            # Update responses in batches using SQLAlchemy
-            batch_size = 100
-            for i in range(0, len(responses), batch_size):
-                batch = responses[i:i + batch_size]
-                try:
-                    update_stmt = (
-                        update(Response)
-                        .where(Response.id.in_(batch))
-                        .values(brand_id=brand_id_to_use)
-                    )
-                    result = db.execute(update_stmt)
-                    responses_updated += result.rowcount
-                except Exception as e:
-                    logger.warning(f"Failed to update responses batch: {e}")
-        
+        # One server-side UPDATE per table; rows that already have a brand_id are left alone
+        prompts_updated = db.execute(
+            update(Prompt).where(Prompt.brand_id.is_(None)).values(brand_id=brand_id_to_use),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        responses_updated = db.execute(
+            update(Response).where(Response.brand_id.is_(None)).values(brand_id=brand_id_to_use),
+            execution_options={"synchronize_session": False}
+        ).rowcount
         db.commit()
         
         return {
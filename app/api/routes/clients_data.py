@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Query, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, Query, HTTPException, Depends, UploadFile, File, BackgroundTasks, Request
 from typing import Optional, List, Dict, Any
 import logging
 import uuid
+import asyncio
+import base64
+import binascii
+import httpx
 from datetime import datetime, date as date_type, timezone
 from app.services.supabase_service import SupabaseService
 from app.core.config import settings
+from app.core.database import get_supabase_service_role_client, get_storage_http_client
 from app.core.error_utils import handle_api_errors
+from app.core.responses import ORJSONResponse
 from app.api.auth_v2 import get_current_user_v2
-from app.db.database import get_db
+from app.services.websocket_manager import websocket_manager
+from app.db.database import get_db, get_async_db, AsyncSessionLocal
+from app.db.models import AgencyAnalyticsCampaign, AgencyAnalyticsCampaignBrand, ClientCampaign, Client as ClientModel
+from app.services.db.brands_async import AsyncBrandDB
+from app.services.db.clients import CLIENT_THEME_FIELDS, client_campaigns_json, invalidate_client_cache
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_, or_, update, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, update, delete, tuple_, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
+from supabase import Client
 from app.api.routes.models import DashboardLinkRequest, DashboardLinkUpdateRequest
 
 logger = logging.getLogger(__name__)
@@ -117,81 +131,91 @@ async def get_brand_by_slug(slug: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _raise_version_conflict(resource: Dict, *fields: str):
+    """Raise the 409 returned when a brand's or client's version no longer matches the caller's"""
+    current_data = {field: resource.get(field) for field in fields}
+    current_data["last_modified_by"] = resource.get("last_modified_by")
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "error": "conflict",
+            "message": "Resource was modified by another user. Please refresh and try again.",
+            "current_version": resource.get("version", 1),
+            "current_data": current_data
+        }
+    )
+
+
+async def _notify_brand_updated(db: AsyncSession, brand_id: int, current_user: dict, version: int):
+    """Close the request's DB session, then tell brand subscribers about the update in the background"""
+    # The session is done with the database at this point; closing it returns the connection
+    # to the pool before the response is sent
+    await db.close()
+
+    # Fire-and-forget: the response doesn't wait on the WebSocket fan-out
+    websocket_manager.schedule_resource_updated(
+        resource_type="brand",
+        resource_id=brand_id,
+        updated_by=current_user.get("email"),
+        updated_at=datetime.utcnow().isoformat() + "Z",
+        version=version,
+        exclude_user_id=current_user.get("id")
+    )
+
+
+def _notify_client_updated(client_id: int, current_user: dict, version: int):
+    """Tell client subscribers about the update in the background (the response doesn't wait on the fan-out)"""
+    websocket_manager.schedule_resource_updated(
+        resource_type="client",
+        resource_id=client_id,
+        updated_by=current_user.get("email"),
+        updated_at=datetime.utcnow().isoformat() + "Z",
+        version=version,
+        exclude_user_id=current_user.get("id")
+    )
+
 class GA4PropertyUpdateRequest(BaseModel):
     ga4_property_id: Optional[str] = None
     version: Optional[int] = None  # Version for optimistic locking
 
-@router.put("/data/brands/{brand_id}/ga4-property-id")
+@router.put("/data/brands/{brand_id}/ga4-property-id", response_class=ORJSONResponse)
 @handle_api_errors(context="updating GA4 property ID")
 async def update_brand_ga4_property_id(
     brand_id: int,
     request: GA4PropertyUpdateRequest,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update GA4 Property ID for a brand"""
-    from app.services.websocket_manager import websocket_manager
-    from datetime import datetime
-    
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Get current brand to check version using SQLAlchemy
-        brand = supabase.get_brand_by_id(brand_id)
+        brand_db = AsyncBrandDB(db)
         
-        if not brand:
-            raise HTTPException(status_code=404, detail="Brand not found")
-        
-        current_version = brand.get("version", 1)
-        
-        # Version conflict check
-        if request.version is not None and request.version != current_version:
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "error": "conflict",
-                    "message": "Resource was modified by another user. Please refresh and try again.",
-                    "current_version": current_version,
-                    "current_data": {
-                        "ga4_property_id": brand.get("ga4_property_id"),
-                        "last_modified_by": brand.get("last_modified_by")
-                    }
-                }
-            )
-        
-        # Update GA4 property ID using SQLAlchemy method
+        # Version check, update and new version in a single UPDATE ... RETURNING
         ga4_property_id = request.ga4_property_id
-        success = supabase.update_brand_ga4_property_id(
+        updated = await brand_db.update_brand_ga4_property_id_cas(
             brand_id=brand_id,
+            expected_version=request.version,
             ga4_property_id=ga4_property_id if ga4_property_id else None,
             user_email=current_user.get("email")
         )
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update GA4 property ID")
+        if not updated:
+            # Re-read once to tell a missing brand from a version conflict
+            brand = await brand_db.get_brand_by_id(brand_id, use_cache=False)
+            if not brand:
+                raise HTTPException(status_code=404, detail="Brand not found")
+            _raise_version_conflict(brand, "ga4_property_id")
         
-        # Get updated version using SQLAlchemy
-        updated_brand = supabase.get_brand_by_id(brand_id)
-        updated_version = updated_brand.get("version", 1) if updated_brand else 1
+        updated_version = updated["version"]
         
         logger.info(f"Updated GA4 property ID for brand {brand_id} by user {current_user.get('email')}, version={updated_version}")
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="brand",
-                resource_id=brand_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        # Release the pooled connection and broadcast the WebSocket notification in the background
+        await _notify_brand_updated(db, brand_id, current_user, updated_version)
         
         return {
             "brand_id": brand_id,
-            "ga4_property_id": update_data["ga4_property_id"],
+            "ga4_property_id": updated["ga4_property_id"],
             "version": updated_version,
             "message": "GA4 Property ID updated successfully"
         }
@@ -208,41 +232,10 @@ async def link_agency_analytics_campaign(
     brand_id: int,
     campaign_id: int,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Link an Agency Analytics campaign to a brand"""
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Check if brand exists using SQLAlchemy
-        brand = supabase.get_brand_by_id(brand_id)
-        if not brand:
-            raise HTTPException(status_code=404, detail="Brand not found")
-        
-        # Check if campaign exists using SQLAlchemy Core
-        campaigns_table = supabase._get_table("agency_analytics_campaigns")
-        campaign_query = select(campaigns_table).where(campaigns_table.c.id == campaign_id).limit(1)
-        campaign_result = supabase.db.execute(campaign_query)
-        campaign_row = campaign_result.first()
-        
-        if not campaign_row:
-            raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
-        
-        # Check if link already exists using SQLAlchemy Core
-        links_table = supabase._get_table("agency_analytics_campaign_brands")
-        existing_query = select(links_table).where(
-            and_(links_table.c.brand_id == brand_id, links_table.c.campaign_id == campaign_id)
-        ).limit(1)
-        existing_result = supabase.db.execute(existing_query)
-        existing_row = existing_result.first()
-        
-        if existing_row:
-            return {
-                "brand_id": brand_id,
-                "campaign_id": campaign_id,
-                "message": "Campaign is already linked to this brand"
-            }
-        
         # Create link using SQLAlchemy Core
         link_data = {
             "brand_id": brand_id,
@@ -252,9 +245,34 @@ async def link_agency_analytics_campaign(
             "updated_at": datetime.utcnow()
         }
         
-        stmt = insert(links_table).values(**link_data)
-        supabase.db.execute(stmt)
-        supabase.db.commit()
+        # A single INSERT ... ON CONFLICT DO NOTHING replaces the brand/campaign/link
+        # existence checks: the unique (campaign_id, brand_id) constraint makes linking
+        # idempotent and the foreign keys reject unknown brands or campaigns
+        links_table = AgencyAnalyticsCampaignBrand.__table__
+        stmt = (
+            pg_insert(links_table)
+            .values(**link_data)
+            .on_conflict_do_nothing(index_elements=["campaign_id", "brand_id"])
+            .returning(links_table.c.id)
+        )
+        try:
+            result = await db.execute(stmt)
+            inserted = result.first()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if "(brand_id)" in str(e.orig):
+                raise HTTPException(status_code=404, detail="Brand not found")
+            if "(campaign_id)" in str(e.orig):
+                raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
+            raise
+        
+        if not inserted:
+            return {
+                "brand_id": brand_id,
+                "campaign_id": campaign_id,
+                "message": "Campaign is already linked to this brand"
+            }
         
         logger.info(f"Linked campaign {campaign_id} to brand {brand_id} by user {current_user.get('email')}")
         
@@ -275,34 +293,19 @@ async def unlink_agency_analytics_campaign(
     brand_id: int,
     campaign_id: int,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Unlink an Agency Analytics campaign from a brand"""
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Check if brand exists using SQLAlchemy
-        brand = supabase.get_brand_by_id(brand_id)
-        if not brand:
-            raise HTTPException(status_code=404, detail="Brand not found")
-        
-        # Check if link exists using SQLAlchemy Core
-        links_table = supabase._get_table("agency_analytics_campaign_brands")
-        existing_query = select(links_table).where(
-            and_(links_table.c.brand_id == brand_id, links_table.c.campaign_id == campaign_id)
-        ).limit(1)
-        existing_result = supabase.db.execute(existing_query)
-        existing_row = existing_result.first()
-        
-        if not existing_row:
-            raise HTTPException(status_code=404, detail="Campaign is not linked to this brand")
-        
-        # Delete link using SQLAlchemy Core
+        # Delete link using SQLAlchemy Core; RETURNING tells us whether a link existed
+        links_table = AgencyAnalyticsCampaignBrand.__table__
         delete_stmt = delete(links_table).where(
             and_(links_table.c.brand_id == brand_id, links_table.c.campaign_id == campaign_id)
-        )
-        supabase.db.execute(delete_stmt)
-        supabase.db.commit()
+        ).returning(links_table.c.id)
+        result = await db.execute(delete_stmt)
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Campaign is not linked to this brand")
+        await db.commit()
         
         logger.info(f"Unlinked campaign {campaign_id} from brand {brand_id} by user {current_user.get('email')}")
         
@@ -317,44 +320,67 @@ async def unlink_agency_analytics_campaign(
         logger.error(f"Error unlinking campaign {campaign_id} from brand {brand_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error unlinking campaign: {str(e)}")
 
-@router.get("/data/brands/{brand_id}/agency-analytics-campaigns")
+# Campaign columns the brand campaign picker shows (skips the wide contact/address fields)
+CAMPAIGN_LIST_COLUMNS = (
+    AgencyAnalyticsCampaign.__table__.c.id,
+    AgencyAnalyticsCampaign.__table__.c.company,
+    AgencyAnalyticsCampaign.__table__.c.url,
+    AgencyAnalyticsCampaign.__table__.c.status,
+    AgencyAnalyticsCampaign.__table__.c.updated_at,
+)
+
+
+@router.get("/data/brands/{brand_id}/agency-analytics-campaigns", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching linked campaigns")
 async def get_brand_linked_campaigns(
     brand_id: int,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all Agency Analytics campaigns linked to a brand"""
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Get linked campaigns using SQLAlchemy
-        links = supabase.get_campaign_brand_links(brand_id=brand_id)
+        # One LEFT JOIN returns every campaign flagged with whether it is linked to this brand
+        campaigns_table = AgencyAnalyticsCampaign.__table__
+        links_table = AgencyAnalyticsCampaignBrand.__table__
+        query = (
+            select(*CAMPAIGN_LIST_COLUMNS, links_table.c.brand_id.isnot(None).label("is_linked"))
+            .select_from(
+                campaigns_table.outerjoin(
+                    links_table,
+                    and_(links_table.c.campaign_id == campaigns_table.c.id, links_table.c.brand_id == brand_id)
+                )
+            )
+            .order_by(campaigns_table.c.id.desc())
+        )
+        result = await db.execute(query)
+        
+        linked_campaigns = []
+        all_campaigns = []
+        for row in result:
+            campaign = {
+                "id": row.id,
+                "company": row.company,
+                "url": row.url,
+                "status": row.status,
+                "updated_at": row.updated_at
+            }
+            if row.is_linked:
+                linked_campaigns.append(campaign)
+            all_campaigns.append(campaign)
         
-        if not links:
-            return {
+        if not linked_campaigns:
+            return ORJSONResponse(content={
                 "brand_id": brand_id,
                 "linked_campaigns": [],
                 "available_campaigns": []
-            }
+            })
         
-        # Get campaign details using SQLAlchemy Core
-        campaign_ids = [link["campaign_id"] for link in links]
-        campaigns_table = supabase._get_table("agency_analytics_campaigns")
-        query = select(campaigns_table).where(campaigns_table.c.id.in_(campaign_ids))
-        result = supabase.db.execute(query)
-        linked_campaigns = [dict(row._mapping) for row in result]
-        
-        # Get all available campaigns for selection using SQLAlchemy Core
-        all_campaigns_query = select(campaigns_table).order_by(campaigns_table.c.id.desc())
-        all_campaigns_result = supabase.db.execute(all_campaigns_query)
-        all_campaigns = [dict(row._mapping) for row in all_campaigns_result]
-        
-        return {
+        # Serialize the (possibly long) campaign lists with orjson directly, skipping jsonable_encoder
+        return ORJSONResponse(content={
             "brand_id": brand_id,
             "linked_campaigns": linked_campaigns,
             "available_campaigns": all_campaigns
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching linked campaigns for brand {brand_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching linked campaigns: {str(e)}")
@@ -368,34 +394,121 @@ class ThemeUpdateRequest(BaseModel):
     custom: Optional[Dict] = None
     version: Optional[int] = None  # Version for optimistic locking
 
+# Public URL prefix for objects in the brand-logos bucket, built once instead of per upload
+SUPABASE_PUBLIC_LOGO_PREFIX = f"{(settings.SUPABASE_URL or '').rstrip('/')}/storage/v1/object/public/brand-logos/"
+
+
+def _logo_storage_path(logo_url: str) -> str:
+    """Extract the brand-logos object path from a stored logo URL"""
+    url = logo_url.split("?")[0]  # Remove query params if any
+    file_path = url.removeprefix(SUPABASE_PUBLIC_LOGO_PREFIX)
+    if file_path == url:
+        # Not one of our public URLs (e.g. an older host); assume the filename is the object path
+        file_path = url.split("/")[-1]
+    return file_path
+
+
+_STORAGE_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_upload_file(file: UploadFile):
+    """Yield an uploaded file in fixed-size chunks"""
+    await file.seek(0)
+    while chunk := await file.read(_STORAGE_UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+async def _stream_to_storage(http_client: httpx.AsyncClient, bucket: str, path: str, file: UploadFile, content_type: str) -> Dict:
+    """Upload a file to Supabase Storage chunk by chunk, so memory use stays at one chunk"""
+    headers = {
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+        "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+        "Content-Type": content_type,
+        "cache-control": "max-age=3600",
+        "x-upsert": "true"
+    }
+    if file.size is not None:
+        headers["Content-Length"] = str(file.size)
+
+    url = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/{bucket}/{path}"
+    response = await http_client.post(url, content=_iter_upload_file(file), headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+MAX_LOGO_BYTES = 5 * 1024 * 1024
+
+# Leading bytes of the image formats accepted as logos
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+)
+
+
+def _sniff_image_type(head: bytes) -> Optional[str]:
+    """Detect the image type from a file's first bytes instead of trusting the client's content type"""
+    for signature, content_type in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "image/svg+xml"
+    return None
+
+
+async def _validate_logo_upload(request: Request, file: UploadFile) -> str:
+    """Reject oversized or non-image logo uploads; returns the sniffed content type"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_LOGO_BYTES + 64 * 1024:
+        # Allow some slack for the multipart framing around the file
+        raise HTTPException(status_code=413, detail="Logo must be 5 MB or smaller")
+
+    size = file.size
+    if size is None:
+        size = 0
+        async for chunk in _iter_upload_file(file):
+            size += len(chunk)
+            if size > MAX_LOGO_BYTES:
+                break
+    if size > MAX_LOGO_BYTES:
+        raise HTTPException(status_code=413, detail="Logo must be 5 MB or smaller")
+
+    await file.seek(0)
+    content_type = _sniff_image_type(await file.read(512))
+    await file.seek(0)
+    if not content_type:
+        raise HTTPException(status_code=400, detail="File must be an image")
+    return content_type
+
+
 @router.post("/data/brands/{brand_id}/logo")
 @handle_api_errors(context="uploading brand logo")
 async def upload_brand_logo(
     brand_id: int,
+    request: Request,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    storage_client: Client = Depends(get_supabase_service_role_client),
+    http_client: httpx.AsyncClient = Depends(get_storage_http_client)
 ):
     """Upload brand logo to Supabase Storage"""
     try:
+        # Validate size and file type (from magic bytes) before touching the DB or storage
+        content_type = await _validate_logo_upload(request, file)
+        
         # Check if brand exists using SQLAlchemy
-        supabase = SupabaseService(db=db)
-        brand = supabase.get_brand_by_id(brand_id)
+        brand_db = AsyncBrandDB(db)
+        brand = await brand_db.get_brand_by_id(brand_id)
         
         if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        # Create Supabase client with service role key for storage operations
-        # Service role key is required to bypass RLS for storage uploads
-        from app.core.database import get_supabase_service_role_client
-        storage_client = get_supabase_service_role_client()
-        
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Read file content
-        file_content = await file.read()
         file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'png'
         
         # Generate unique filename (just the filename, not including bucket name in path)
@@ -405,20 +518,10 @@ async def upload_brand_logo(
         # Upload to Supabase Storage using Supabase client
         # The bucket name is 'brand-logos', file path is just the filename
         try:
-            logger.info(f"Uploading file to storage: bucket=brand-logos, path={file_path}, size={len(file_content)} bytes, content-type={file.content_type}")
+            logger.info(f"Uploading file to storage: bucket=brand-logos, path={file_path}, size={file.size} bytes, content-type={content_type}")
             
-            responseBuckets = storage_client.storage.list_buckets()
-            logger.info(f"Buckets: {responseBuckets}")
-            # Upload using Supabase storage client
-            storage_response = storage_client.storage.from_("brand-logos").upload(
-                file=file_content,
-                path=file_path,
-                file_options={
-                    "content-type": file.content_type,
-                    "cache-control": "3600",
-                    "upsert": "true"
-                }
-            )
+            # Stream the spooled upload straight to the Storage REST API instead of reading it into memory
+            storage_response = await _stream_to_storage(http_client, "brand-logos", file_path, file, content_type)
             
             logger.info(f"Storage upload successful: {storage_response}")
             
@@ -437,10 +540,7 @@ async def upload_brand_logo(
             
             # Construct public URL manually if Supabase client method fails
             if not logo_url:
-                # Extract project ref from SUPABASE_URL
-                # URL format: https://{project_ref}.supabase.co
-                project_ref = settings.SUPABASE_URL.replace('https://', '').replace('.supabase.co', '')
-                logo_url = f"https://{project_ref}.supabase.co/storage/v1/object/public/brand-logos/{file_path}"
+                logo_url = SUPABASE_PUBLIC_LOGO_PREFIX + file_path
             
             logger.info(f"Final logo URL: {logo_url}")
             
@@ -454,8 +554,7 @@ async def upload_brand_logo(
             )
         
         # Update brand with logo URL using SQLAlchemy
-        supabase = SupabaseService(db=db)
-        success = supabase.update_brand_logo_url(
+        success = await brand_db.update_brand_logo_url(
             brand_id=brand_id,
             logo_url=logo_url,
             user_email=current_user.get("email")
@@ -476,51 +575,38 @@ async def upload_brand_logo(
         logger.error(f"Error uploading logo for brand {brand_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading logo: {str(e)}")
 
+def _remove_from_storage(storage_client: Client, bucket: str, file_path: str):
+    """Best-effort removal of a storage object; failures are logged, not raised"""
+    try:
+        logger.info(f"Deleting file from storage: {file_path}")
+        storage_client.storage.from_(bucket).remove([file_path])
+    except Exception as storage_error:
+        logger.warning(f"Failed to delete logo from storage: {str(storage_error)}")
+
+
 @router.delete("/data/brands/{brand_id}/logo")
 @handle_api_errors(context="deleting brand logo")
 async def delete_brand_logo(
     brand_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    storage_client: Client = Depends(get_supabase_service_role_client)
 ):
     """Delete brand logo"""
     try:
-        supabase = SupabaseService(db=db)
+        brand_db = AsyncBrandDB(db)
         
         # Check if brand exists and get current logo using SQLAlchemy
-        brand = supabase.get_brand_by_id(brand_id)
+        brand = await brand_db.get_brand_by_id(brand_id)
         
         if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
         logo_url = brand.get("logo_url")
         
-        # Delete from storage if URL exists (storage still uses Supabase)
-        if logo_url:
-            try:
-                from app.core.database import get_supabase_client
-                # Use service role client for storage operations (bypasses RLS)
-                from app.core.database import get_supabase_service_role_client
-                storage_client = get_supabase_service_role_client()
-                
-                # Extract file path from URL
-                # URL format: .../storage/v1/object/public/brand-logos/{filename}
-                if "brand-logos/" in logo_url:
-                    file_path = logo_url.split("brand-logos/")[-1].split("?")[0]  # Remove query params if any
-                elif "/object/public/brand-logos/" in logo_url:
-                    file_path = logo_url.split("/object/public/brand-logos/")[-1].split("?")[0]
-                else:
-                    # Try to extract just the filename
-                    file_path = logo_url.split("/")[-1].split("?")[0]
-                
-                if file_path:
-                    logger.info(f"Deleting file from storage: {file_path}")
-                    storage_client.storage.from_("brand-logos").remove([file_path])
-            except Exception as storage_error:
-                logger.warning(f"Failed to delete logo from storage: {str(storage_error)}")
-        
         # Update brand to remove logo URL using SQLAlchemy
-        success = supabase.update_brand_logo_url(
+        success = await brand_db.update_brand_logo_url(
             brand_id=brand_id,
             logo_url=None,
             user_email=current_user.get("email")
@@ -529,6 +615,13 @@ async def delete_brand_logo(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update brand logo URL")
         
+        # The DB is the source of truth; removing the file from storage is best-effort cleanup
+        # that runs after the response is sent
+        if logo_url:
+            file_path = _logo_storage_path(logo_url)
+            if file_path:
+                background_tasks.add_task(_remove_from_storage, storage_client, "brand-logos", file_path)
+        
         logger.info(f"Deleted logo for brand {brand_id} by user {current_user.get('email')}")
         
         return {
@@ -541,94 +634,49 @@ async def delete_brand_logo(
         logger.error(f"Error deleting logo for brand {brand_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error deleting logo: {str(e)}")
 
-@router.put("/data/brands/{brand_id}/theme")
+@router.put("/data/brands/{brand_id}/theme", response_class=ORJSONResponse)
 @handle_api_errors(context="updating brand theme")
 async def update_brand_theme(
     brand_id: int,
     request: ThemeUpdateRequest,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update brand theme configuration"""
-    from app.services.websocket_manager import websocket_manager
-    from datetime import datetime
-    
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Get current brand to check version using SQLAlchemy
-        brand = supabase.get_brand_by_id(brand_id)
+        brand_db = AsyncBrandDB(db)
         
-        if not brand:
-            raise HTTPException(status_code=404, detail="Brand not found")
-        
-        current_version = brand.get("version", 1)
-        
-        # Version conflict check
-        if request.version is not None and request.version != current_version:
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "error": "conflict",
-                    "message": "Resource was modified by another user. Please refresh and try again.",
-                    "current_version": current_version,
-                    "current_data": {
-                        "theme": brand.get("theme"),
-                        "last_modified_by": brand.get("last_modified_by")
-                    }
-                }
-            )
+        # Only the fields sent in the request; Postgres merges them into the stored theme
+        theme_patch = request.model_dump(
+            include={"primary_color", "secondary_color", "accent_color", "font_family", "custom"},
+            exclude_none=True
+        )
         
-        # Get existing theme or initialize empty dict
-        existing_theme = brand.get("theme") or {}
-        if not isinstance(existing_theme, dict):
-            existing_theme = {}
-        
-        # Build updated theme
-        updated_theme = existing_theme.copy()
-        if request.primary_color is not None:
-            updated_theme["primary_color"] = request.primary_color
-        if request.secondary_color is not None:
-            updated_theme["secondary_color"] = request.secondary_color
-        if request.accent_color is not None:
-            updated_theme["accent_color"] = request.accent_color
-        if request.font_family is not None:
-            updated_theme["font_family"] = request.font_family
-        if request.custom is not None:
-            updated_theme["custom"] = request.custom
-        
-        # Update brand theme using SQLAlchemy method
-        success = supabase.update_brand_theme(
+        # Merge, version check and new version in a single UPDATE ... RETURNING
+        updated = await brand_db.merge_brand_theme(
             brand_id=brand_id,
-            theme=updated_theme,
-            user_email=current_user.get("email")
+            theme_patch=theme_patch,
+            user_email=current_user.get("email"),
+            expected_version=request.version
         )
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update brand theme")
+        if not updated:
+            # Re-read once to tell a missing brand from a version conflict
+            brand = await brand_db.get_brand_by_id(brand_id, use_cache=False)
+            if not brand:
+                raise HTTPException(status_code=404, detail="Brand not found")
+            _raise_version_conflict(brand, "theme")
         
-        # Get updated version using SQLAlchemy
-        updated_brand = supabase.get_brand_by_id(brand_id)
-        updated_version = updated_brand.get("version", 1) if updated_brand else 1
+        updated_version = updated["version"]
         
         logger.info(f"Updated theme for brand {brand_id} by user {current_user.get('email')}, version={updated_version}")
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="brand",
-                resource_id=brand_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        # Release the pooled connection and broadcast the WebSocket notification in the background
+        await _notify_brand_updated(db, brand_id, current_user, updated_version)
         
         return {
             "brand_id": brand_id,
-            "theme": updated_theme,
+            "theme": updated["theme"],
             "version": updated_version,
             "message": "Theme updated successfully"
         }
@@ -643,115 +691,144 @@ async def update_brand_theme(
 # =====================================================
 
 
-@router.get("/data/clients")
+def _encode_client_cursor(company_name: str, client_id: int) -> str:
+    """Opaque keyset cursor for the (company_name, id) ordering of the clients list"""
+    return base64.urlsafe_b64encode(f"{company_name}|{client_id}".encode()).decode()
+
+
+def _decode_client_cursor(cursor: str) -> tuple:
+    """Decode a cursor from _encode_client_cursor into (company_name, id); 400 if malformed"""
+    try:
+        company_name, client_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return company_name, int(client_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _apply_client_filters(
+    stmt,
+    search: Optional[str],
+    ga4_assigned: Optional[bool],
+    scrunch_assigned: Optional[bool],
+    active: Optional[str]
+):
+    """Apply the clients list search/assignment/active filters to a select over the clients table"""
+    clients_table = ClientModel.__table__
+    
+    # Apply search filter if provided
+    if search and search.strip():
+        search_term = f"%{search.strip()}%"
+        stmt = stmt.where(clients_table.c.company_name.ilike(search_term))
+    
+    # Apply GA4 filter (an empty property ID counts as unassigned). A single NULLIF predicate
+    # matches the idx_clients_ga4_assigned partial index
+    if ga4_assigned is not None:
+        ga4_is_assigned = func.nullif(clients_table.c.ga4_property_id, literal_column("''")).isnot(None)
+        stmt = stmt.where(ga4_is_assigned if ga4_assigned else ~ga4_is_assigned)
+    
+    # Apply Scrunch filter
+    if scrunch_assigned is not None:
+        if scrunch_assigned:
+            stmt = stmt.where(clients_table.c.scrunch_brand_id.isnot(None))
+        else:
+            stmt = stmt.where(clients_table.c.scrunch_brand_id.is_(None))
+    
+    # Apply is_active filter
+    # active can be: "active" (default), "inactive", or "all"
+    if active == "inactive":
+        stmt = stmt.where(clients_table.c.is_active == False)
+    elif active == "all":
+        # Don't filter by is_active - show all clients
+        pass
+    else:
+        # Default to "active" - show only active clients
+        stmt = stmt.where(clients_table.c.is_active == True)
+    
+    return stmt
+
+
+@router.get("/data/clients", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching clients")
 async def get_clients(
     page: Optional[int] = Query(1, description="Page number (1-indexed)"),
     page_size: Optional[int] = Query(25, description="Number of records per page"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous response's next_cursor (preferred over page for deep pagination)"),
     search: Optional[str] = Query(None, description="Search by company name"),
     ga4_assigned: Optional[bool] = Query(None, description="Filter by GA4 assignment (true=assigned, false=not assigned)"),
     scrunch_assigned: Optional[bool] = Query(None, description="Filter by Scrunch assignment (true=assigned, false=not assigned)"),
     active: Optional[str] = Query("active", description="Filter by active status: 'active' (default), 'inactive', or 'all'"),
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all clients from database with pagination, search, and filters"""
+    """
+    Get all clients from database with pagination, search, and filters.
+    
+    Pass the previous response's next_cursor as `cursor` to seek straight to the next page
+    (keyset pagination on company_name, id); `page` still works but OFFSET gets slower the
+    deeper it goes. A cursor has no page number, so cursor responses return `page` and
+    `total_pages` as null and `has_previous` as true.
+    """
+    after = _decode_client_cursor(cursor) if cursor else None
     try:
-        supabase = SupabaseService(db=db)
-        
         # Calculate offset from page
         offset = (page - 1) * page_size if page > 0 else 0
         
         # Build query using SQLAlchemy Core
-        clients_table = supabase._get_table("clients")
-        query = select(clients_table)
-        
-        # Apply search filter if provided
-        if search and search.strip():
-            search_term = f"%{search.strip()}%"
-            query = query.where(clients_table.c.company_name.ilike(search_term))
-        
-        # Apply GA4 filter
-        if ga4_assigned is not None:
-            if ga4_assigned:
-                query = query.where(clients_table.c.ga4_property_id.isnot(None))
-                query = query.where(clients_table.c.ga4_property_id != '')
-            else:
-                query = query.where(
-                    or_(
-                        clients_table.c.ga4_property_id.is_(None),
-                        clients_table.c.ga4_property_id == ''
-                    )
-                )
-        
-        # Apply Scrunch filter
-        if scrunch_assigned is not None:
-            if scrunch_assigned:
-                query = query.where(clients_table.c.scrunch_brand_id.isnot(None))
-            else:
-                query = query.where(clients_table.c.scrunch_brand_id.is_(None))
-        
-        # Apply is_active filter
-        # active can be: "active" (default), "inactive", or "all"
-        if active == "inactive":
-            query = query.where(clients_table.c.is_active == False)
-        elif active == "all":
-            # Don't filter by is_active - show all clients
-            pass
-        else:
-            # Default to "active" - show only active clients
-            query = query.where(clients_table.c.is_active == True)
+        clients_table = ClientModel.__table__
+        query = _apply_client_filters(select(clients_table), search, ga4_assigned, scrunch_assigned, active)
         
-        # Get total count
+        # Total count (runs alongside the page query below)
         count_query = select(func.count()).select_from(query.alias())
-        total_count = supabase.db.execute(count_query).scalar()
         
-        # Order by company name for consistent results
-        query = query.order_by(clients_table.c.company_name.asc())
+        # Page rows carry their campaigns as a JSON array (same subquery as get_client)
+        query = query.with_only_columns(
+            clients_table,
+            client_campaigns_json(clients_table, ClientCampaign.__table__, AgencyAnalyticsCampaign.__table__).label("client_campaigns")
+        )
         
-        # Apply pagination
-        query = query.offset(offset).limit(page_size)
+        # Order by company name (id breaks ties) for consistent results
+        query = query.order_by(clients_table.c.company_name.asc(), clients_table.c.id.asc())
         
-        # Execute query
-        result = supabase.db.execute(query)
+        # Apply pagination: seek past the cursor row when given, otherwise OFFSET by page
+        if after:
+            query = query.where(tuple_(clients_table.c.company_name, clients_table.c.id) > after)
+        else:
+            query = query.offset(offset)
+        # Fetch one extra row to know whether another page follows
+        query = query.limit(page_size + 1)
+        
+        # An AsyncSession runs one statement at a time, so independent queries go through a
+        # second session to run concurrently (no page query for an empty page size)
+        if page_size > 0:
+            async with AsyncSessionLocal() as side_db:
+                count_result, result = await asyncio.gather(side_db.execute(count_query), db.execute(query))
+        else:
+            count_result, result = await db.execute(count_query), []
+        total_count = count_result.scalar()
         items = [dict(row._mapping) for row in result]
+        has_more = page_size > 0 and len(items) > page_size
+        items = items[:page_size]
+        
+        next_cursor = _encode_client_cursor(items[-1]["company_name"], items[-1]["id"]) if has_more and items else None
         
-        # For each client, get campaigns and keyword count
+        # Campaign rows carry a trigger-maintained keywords_count, so no keyword COUNT is needed
         for item in items:
-            client_id = item.get("id")
-            
-            # Get campaigns for this client
-            campaigns = supabase.get_client_campaigns(client_id)
-            item["client_campaigns"] = campaigns
-            
-            # Get keyword count from campaigns
-            keywords_count = 0
-            # get_client_campaigns returns campaigns with "id" key, not "campaign_id"
-            campaign_ids = [c.get("id") for c in campaigns if c.get("id")]
-            
-            if campaign_ids:
-                keywords_table = supabase._get_table("agency_analytics_keywords")
-                keywords_query = select(func.count()).select_from(
-                    keywords_table
-                ).where(keywords_table.c.campaign_id.in_(campaign_ids))
-                keywords_result = supabase.db.execute(keywords_query)
-                keywords_count = keywords_result.scalar() or 0
-            
-            item["keywords_count"] = keywords_count
+            item["keywords_count"] = sum(c.get("keywords_count") or 0 for c in item["client_campaigns"])
         
         # Calculate pagination metadata
         total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 1
         
-        return {
+        return ORJSONResponse(content={
             "items": items if isinstance(items, list) else [],
             "count": len(items) if isinstance(items, list) else 0,
             "total_count": total_count,
-            "page": page,
+            "page": None if after else page,
             "page_size": page_size,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_previous": page > 1
-        }
+            "total_pages": None if after else total_pages,
+            "has_next": has_more if after else page < total_pages,
+            "has_previous": bool(after) or page > 1,
+            "next_cursor": next_cursor
+        })
     except Exception as e:
         logger.error(f"Error fetching clients: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -787,6 +864,7 @@ async def delete_client(
         )
         supabase.db.execute(update_stmt)
         supabase.db.commit()
+        invalidate_client_cache(client_id)
         
         logger.info(f"Soft deleted client {client_id} by user {current_user.get('email')}")
         
@@ -811,15 +889,12 @@ async def get_client(
     """Get a specific client by ID"""
     try:
         supabase = SupabaseService(db=db)
-        client = supabase.get_client_by_id(client_id)
+        # Client row and its campaigns (JSON-aggregated) in one round-trip
+        client = supabase.get_client_with_campaigns(client_id)
         
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        # Get campaigns for this client
-        campaigns = supabase.get_client_campaigns(client_id)
-        client["client_campaigns"] = campaigns
-        
         return client
     except HTTPException:
         raise
@@ -854,13 +929,13 @@ async def get_client_by_slug(
                 if now > expires_at:
                     supabase.disable_dashboard_link(link["id"])
                     raise HTTPException(status_code=410, detail="Dashboard link has expired")
-            client = supabase.get_client_by_id(link["client_id"])
+            client = supabase.get_client_by_id(link["client_id"], use_cache=True)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found for dashboard link")
             client["dashboard_link"] = link
             return client
 
-        client = supabase.get_client_by_slug(url_slug)
+        client = supabase.get_client_by_slug(url_slug, use_cache=True)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -886,77 +961,28 @@ async def update_client_mappings(
     db: Session = Depends(get_db)
 ):
     """Update client mappings (GA4 property ID and/or Scrunch brand ID)"""
-    from app.services.websocket_manager import websocket_manager
-    from datetime import datetime
-    from sqlalchemy import select, update, text
-    
     try:
         supabase = SupabaseService(db=db)
         
-        # Get current client to check version using SQLAlchemy Core
-        table = supabase._get_table("clients")
-        query = select(
-            table.c.id,
-            table.c.version,
-            table.c.ga4_property_id,
-            table.c.scrunch_brand_id,
-            table.c.last_modified_by
-        ).where(table.c.id == client_id).limit(1)
-        
-        result = db.execute(query)
-        current_client_row = result.first()
-        
-        if not current_client_row:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        current_client = dict(current_client_row._mapping)
-        current_version = current_client.get("version", 1)
-        
-        # Version conflict check
-        if request.version is not None and request.version != current_version:
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "error": "conflict",
-                    "message": "Resource was modified by another user. Please refresh and try again.",
-                    "current_version": current_version,
-                    "current_data": {
-                        "ga4_property_id": current_client.get("ga4_property_id"),
-                        "scrunch_brand_id": current_client.get("scrunch_brand_id"),
-                        "last_modified_by": current_client.get("last_modified_by")
-                    }
-                }
-            )
-        
-        # Update client mappings
-        success = supabase.update_client_mapping(
+        # Version check, update and new version in a single UPDATE ... RETURNING
+        updated = supabase.update_client_mapping_cas(
             client_id=client_id,
+            expected_version=request.version,
             ga4_property_id=request.ga4_property_id,
             scrunch_brand_id=request.scrunch_brand_id,
             user_email=current_user.get("email")
         )
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update client mappings")
+        if not updated:
+            # Re-read once to tell a missing client from a version conflict
+            client = supabase.get_client_by_id(client_id)
+            if not client:
+                raise HTTPException(status_code=404, detail="Client not found")
+            _raise_version_conflict(client, "ga4_property_id", "scrunch_brand_id")
         
-        # Get updated version using SQLAlchemy Core
-        updated_query = select(table.c.version).where(table.c.id == client_id).limit(1)
-        updated_result = db.execute(updated_query)
-        updated_row = updated_result.first()
-        updated_version = updated_row.version if updated_row else 1
+        updated_version = updated["version"]
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="client",
-                resource_id=client_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        _notify_client_updated(client_id, current_user, updated_version)
         
         return {
             "status": "success",
@@ -997,37 +1023,6 @@ async def update_client_theme(
     try:
         supabase = SupabaseService(db=db)
         
-        # Get current client to check version using SQLAlchemy
-        client = supabase.get_client_by_id(client_id)
-        
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        current_version = client.get("version", 1)
-        
-        # Version conflict check
-        if request.version is not None and request.version != current_version:
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "error": "conflict",
-                    "message": "Resource was modified by another user. Please refresh and try again.",
-                    "current_version": current_version,
-                    "current_data": {
-                        "theme_color": client.get("theme_color"),
-                        "logo_url": client.get("logo_url"),
-                        "secondary_color": client.get("secondary_color"),
-                        "font_family": client.get("font_family"),
-                        "favicon_url": client.get("favicon_url"),
-                        "report_title": client.get("report_title"),
-                        "custom_css": client.get("custom_css"),
-                        "footer_text": client.get("footer_text"),
-                        "header_text": client.get("header_text"),
-                        "last_modified_by": client.get("last_modified_by")
-                    }
-                }
-            )
-        
         theme_data = {
             "theme_color": request.theme_color,
             "logo_url": request.logo_url,
@@ -1040,31 +1035,24 @@ async def update_client_theme(
             "header_text": request.header_text,
         }
         
-        success = supabase.update_client_theme(
+        # Version check, update and new version in a single UPDATE ... RETURNING
+        updated = supabase.update_client_theme_cas(
             client_id=client_id,
+            expected_version=request.version,
             theme_data=theme_data,
             user_email=current_user.get("email")
         )
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update client theme")
+        if not updated:
+            # Re-read once to tell a missing client from a version conflict
+            client = supabase.get_client_by_id(client_id)
+            if not client:
+                raise HTTPException(status_code=404, detail="Client not found")
+            _raise_version_conflict(client, *CLIENT_THEME_FIELDS)
         
-        # Get updated version using SQLAlchemy
-        updated_client = supabase.get_client_by_id(client_id)
-        updated_version = updated_client.get("version", 1) if updated_client else 1
+        updated_version = updated["version"]
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="client",
-                resource_id=client_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        _notify_client_updated(client_id, current_user, updated_version)
         
         return {
             "status": "success",
@@ -1159,18 +1147,7 @@ async def update_client_report_dates(
         updated_client = supabase.get_client_by_id(client_id)
         updated_version = updated_client.get("version", 1) if updated_client else 1
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="client",
-                resource_id=client_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        _notify_client_updated(client_id, current_user, updated_version)
         
         return {
             "status": "success",
@@ -1188,12 +1165,18 @@ async def update_client_report_dates(
 @handle_api_errors(context="uploading client logo")
 async def upload_client_logo(
     client_id: int,
+    request: Request,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage_client: Client = Depends(get_supabase_service_role_client),
+    http_client: httpx.AsyncClient = Depends(get_storage_http_client)
 ):
     """Upload client logo to Supabase Storage"""
     try:
+        # Validate size and file type (from magic bytes) before touching the DB or storage
+        content_type = await _validate_logo_upload(request, file)
+        
         # Check if client exists using SQLAlchemy
         supabase = SupabaseService(db=db)
         client = supabase.get_client_by_id(client_id)
@@ -1201,17 +1184,6 @@ async def upload_client_logo(
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        # Create Supabase client with service role key for storage operations
-        # Service role key is required to bypass RLS for storage uploads
-        from app.core.database import get_supabase_service_role_client
-        storage_client = get_supabase_service_role_client()
-        
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Read file content
-        file_content = await file.read()
         file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'png'
         
         # Generate unique filename
@@ -1221,20 +1193,10 @@ async def upload_client_logo(
         # Upload to Supabase Storage using Supabase client
         # The bucket name is 'brand-logos', file path is just the filename
         try:
-            logger.info(f"Uploading client logo to storage: bucket=brand-logos, path={file_path}, size={len(file_content)} bytes, content-type={file.content_type}")
+            logger.info(f"Uploading client logo to storage: bucket=brand-logos, path={file_path}, size={file.size} bytes, content-type={content_type}")
             
-            responseBuckets = storage_client.storage.list_buckets()
-            logger.info(f"Buckets: {responseBuckets}")
-            # Upload using Supabase storage client
-            storage_response = storage_client.storage.from_("brand-logos").upload(
-                file=file_content,
-                path=file_path,
-                file_options={
-                    "content-type": file.content_type,
-                    "cache-control": "3600",
-                    "upsert": "true"
-                }
-            )
+            # Stream the spooled upload straight to the Storage REST API instead of reading it into memory
+            storage_response = await _stream_to_storage(http_client, "brand-logos", file_path, file, content_type)
             
             logger.info(f"Storage upload successful: {storage_response}")
             
@@ -1253,8 +1215,7 @@ async def upload_client_logo(
             
             # Construct public URL manually if Supabase client method fails
             if not logo_url:
-                project_ref = settings.SUPABASE_URL.replace('https://', '').replace('.supabase.co', '')
-                logo_url = f"https://{project_ref}.supabase.co/storage/v1/object/public/brand-logos/{file_path}"
+                logo_url = SUPABASE_PUBLIC_LOGO_PREFIX + file_path
             
             logger.info(f"Final logo URL: {logo_url}")
             
@@ -1293,8 +1254,10 @@ async def upload_client_logo(
 @handle_api_errors(context="deleting client logo")
 async def delete_client_logo(
     client_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user_v2),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage_client: Client = Depends(get_supabase_service_role_client)
 ):
     """Delete client logo"""
     try:
@@ -1307,28 +1270,6 @@ async def delete_client_logo(
         
         logo_url = client.get("logo_url")
         
-        # Delete from storage if URL exists (storage still uses Supabase)
-        if logo_url:
-            try:
-                from app.core.database import get_supabase_client
-                # Use service role client for storage operations (bypasses RLS)
-                from app.core.database import get_supabase_service_role_client
-                storage_client = get_supabase_service_role_client()
-                
-                # Extract file path from URL
-                if "brand-logos/" in logo_url:
-                    file_path = logo_url.split("brand-logos/")[-1].split("?")[0]
-                elif "/object/public/brand-logos/" in logo_url:
-                    file_path = logo_url.split("/object/public/brand-logos/")[-1].split("?")[0]
-                else:
-                    file_path = logo_url.split("/")[-1].split("?")[0]
-                
-                if file_path:
-                    logger.info(f"Deleting file from storage: {file_path}")
-                    storage_client.storage.from_("brand-logos").remove([file_path])
-            except Exception as storage_error:
-                logger.warning(f"Failed to delete logo from storage: {str(storage_error)}")
-        
         # Update client to remove logo URL using SQLAlchemy
         theme_data = {"logo_url": None}
         success = supabase.update_client_theme(
@@ -1340,6 +1281,13 @@ async def delete_client_logo(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update client logo URL")
         
+        # The DB is the source of truth; removing the file from storage is best-effort cleanup
+        # that runs after the response is sent
+        if logo_url:
+            file_path = _logo_storage_path(logo_url)
+            if file_path:
+                background_tasks.add_task(_remove_from_storage, storage_client, "brand-logos", file_path)
+        
         logger.info(f"Deleted logo for client {client_id} by user {current_user.get('email')}")
         
         return {
@@ -1353,7 +1301,7 @@ async def delete_client_logo(
         raise HTTPException(status_code=500, detail=f"Error deleting logo: {str(e)}")
 
 
-@router.get("/data/clients/{client_id}/campaigns")
+@router.get("/data/clients/{client_id}/campaigns", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching client campaigns")
 async def get_client_campaigns(
     client_id: int,
@@ -1371,11 +1319,11 @@ async def get_client_campaigns(
         
         campaigns = supabase.get_client_campaigns(client_id)
         
-        return {
+        return ORJSONResponse(content={
             "client_id": client_id,
             "campaigns": campaigns,
             "count": len(campaigns)
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -1393,24 +1341,31 @@ async def link_client_campaign(
 ):
     """Link a campaign to a client"""
     try:
-        supabase = SupabaseService(db=db)
-        
-        # Check if client exists using SQLAlchemy
-        client = supabase.get_client_by_id(client_id)
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Check if campaign exists using SQLAlchemy Core
-        campaigns_table = supabase._get_table("agency_analytics_campaigns")
-        campaign_query = select(campaigns_table.c.id).where(campaigns_table.c.id == campaign_id).limit(1)
-        campaign_result = db.execute(campaign_query)
-        campaign_row = campaign_result.first()
-        
-        if not campaign_row:
-            raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
-        
-        # Use the existing SQLAlchemy method to link campaign
-        supabase._link_campaign_to_client(campaign_id, client_id, is_primary)
+        # One upsert instead of existence checks: an existing link just gets is_primary updated,
+        # and the foreign keys reject unknown clients or campaigns
+        links_table = ClientCampaign.__table__
+        now = datetime.now()
+        stmt = pg_insert(links_table).values(
+            client_id=client_id,
+            campaign_id=campaign_id,
+            is_primary=is_primary,
+            created_at=now,
+            updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["client_id", "campaign_id"],
+            set_={"is_primary": stmt.excluded.is_primary, "updated_at": stmt.excluded.updated_at}
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if "(client_id)" in str(e.orig):
+                raise HTTPException(status_code=404, detail="Client not found")
+            if "(campaign_id)" in str(e.orig):
+                raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
+            raise
         
         logger.info(f"Linked campaign {campaign_id} to client {client_id} by user {current_user.get('email')}")
         
@@ -1438,35 +1393,23 @@ async def unlink_client_campaign(
     try:
         supabase = SupabaseService(db=db)
         
-        # Check if client exists using SQLAlchemy
-        client = supabase.get_client_by_id(client_id)
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Check if link exists using SQLAlchemy Core
+        # Delete the link in one statement; no returned row means there was nothing to unlink
         client_campaigns_table = supabase._get_table("client_campaigns")
-        link_query = select(client_campaigns_table).where(
-            and_(
-                client_campaigns_table.c.client_id == client_id,
-                client_campaigns_table.c.campaign_id == campaign_id
-            )
-        ).limit(1)
-        link_result = db.execute(link_query)
-        existing_link = link_result.first()
-        
-        if not existing_link:
-            raise HTTPException(status_code=404, detail="Campaign is not linked to this client")
-        
-        # Delete the link using SQLAlchemy Core
         delete_stmt = delete(client_campaigns_table).where(
             and_(
                 client_campaigns_table.c.client_id == client_id,
                 client_campaigns_table.c.campaign_id == campaign_id
             )
-        )
-        db.execute(delete_stmt)
+        ).returning(client_campaigns_table.c.id)
+        deleted = db.execute(delete_stmt).first()
         db.commit()
         
+        if deleted is None:
+            # Only look the client up to pick the right 404
+            if not supabase.get_client_by_id(client_id):
+                raise HTTPException(status_code=404, detail="Client not found")
+            raise HTTPException(status_code=404, detail="Campaign is not linked to this client")
+        
         logger.info(f"Unlinked campaign {campaign_id} from client {client_id} by user {current_user.get('email')}")
         
         return {
@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 import logging
 from datetime import datetime, date as date_type, timezone
 from app.services.supabase_service import SupabaseService
+from app.services.db.clients import invalidate_client_cache
 from app.core.error_utils import handle_api_errors
 from app.api.auth_v2 import get_current_user_v2
 from app.db.database import get_db
@@ -394,7 +395,7 @@ async def regenerate_shareable_link(
         
         # Get current client
         table = supabase._get_table("clients")
-        query = select(table.c.id, table.c.company_name).where(table.c.id == client_id).limit(1)
+        query = select(table.c.id, table.c.company_name, table.c.url_slug).where(table.c.id == client_id).limit(1)
         result = db.execute(query)
         current_client_row = result.first()
         
@@ -412,6 +413,8 @@ async def regenerate_shareable_link(
         )
         db.execute(update_stmt)
         db.commit()
+        # The old slug must stop resolving to this client
+        invalidate_client_cache(client_id, current_client_row.url_slug)
         
         # Get updated client to return new slug
         updated_query = select(table.c.url_slug, table.c.updated_at).where(table.c.id == client_id).limit(1)
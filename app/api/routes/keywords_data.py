@@ -1,17 +1,26 @@
 from fastapi import APIRouter, Query, HTTPException, Depends
 from typing import Optional, List, Dict, Any
 import logging
-from datetime import datetime, timedelta, date as date_type
+from datetime import datetime, timedelta
 from app.services.supabase_service import SupabaseService
 from app.core.error_utils import handle_api_errors
+from app.core.responses import ORJSONResponse
 from app.db.database import get_db
+from app.db.models import AgencyAnalyticsKeyword, AgencyAnalyticsCampaign, AgencyAnalyticsKeywordRanking
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, case, true
+from sqlalchemy.dialects.postgresql import array_agg, aggregate_order_by
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/data/clients/{client_id}/keywords")
+# Core tables from the ORM metadata, shared by every request (no per-request reflection lookup)
+keywords_table = AgencyAnalyticsKeyword.__table__
+campaigns_table = AgencyAnalyticsCampaign.__table__
+rankings_table = AgencyAnalyticsKeywordRanking.__table__
+
+
+@router.get("/data/clients/{client_id}/keywords", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching client keywords")
 async def get_client_keywords(
     client_id: int,
@@ -103,11 +112,6 @@ async def get_client_keywords(
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD. Error: {str(e)}")
         
-        # Build base query for keywords with joins using SQLAlchemy Core
-        keywords_table = supabase._get_table("agency_analytics_keywords")
-        campaigns_table = supabase._get_table("agency_analytics_campaigns")
-        rankings_table = supabase._get_table("agency_analytics_keyword_rankings")
-        
         # Averages from rankings within the date range
         averages_subquery = (
             select(
@@ -141,250 +145,155 @@ async def get_client_keywords(
             conditions.append(keywords_table.c.search_language == language)
         if search:
             conditions.append(keywords_table.c.keyword_phrase.ilike(f"%{search}%"))
+        if tags:
+            # Match any requested tag against the keyword's comma-separated tags (trimmed, case-insensitive)
+            tag_list = [t.strip().lower() for t in tags.split(",") if t.strip()]
+            kw_tag = func.unnest(func.string_to_array(keywords_table.c.tags, ",")).table_valued("tag").render_derived()
+            conditions.append(
+                select(1).select_from(kw_tag).where(func.lower(func.trim(kw_tag.c.tag)).in_(tag_list)).exists()
+            )
         
-        # Get keywords with joins
-        query = select(
-            keywords_table,
-            campaigns_table.c.company,
-            averages_subquery.c.avg_google_ranking,
-            averages_subquery.c.avg_search_volume
-        ).join(
+        # Latest ranking per keyword within the date range, joined laterally so the summary-field
+        # filters (volume, rankings, competition) run in SQL instead of per keyword in Python
+        latest_ranking = (
+            select(
+                rankings_table.c.volume,
+                rankings_table.c.google_ranking,
+                rankings_table.c.google_ranking_url,
+                rankings_table.c.google_mobile_ranking,
+                rankings_table.c.google_local_ranking,
+                rankings_table.c.bing_ranking,
+                rankings_table.c.bing_ranking_url,
+                rankings_table.c.competition,
+                rankings_table.c.date.label("ranking_date")
+            )
+            .where(
+                and_(
+                    rankings_table.c.keyword_id == keywords_table.c.id,
+                    rankings_table.c.date >= start_date,
+                    rankings_table.c.date <= end_date,
+                )
+            )
+            .order_by(rankings_table.c.date.desc())
+            .limit(1)
+            .lateral("latest_ranking")
+        )
+        volume = func.coalesce(latest_ranking.c.volume, 0)
+        competition = func.coalesce(latest_ranking.c.competition, 0)  # competition may be null in rankings
+        
+        # Require volume > 0 and not null unless include_zero_volume (e.g. for report view)
+        if not include_zero_volume:
+            conditions.append(volume > 0)
+        if volume_min is not None:
+            conditions.append(volume >= volume_min)
+        if volume_max is not None:
+            conditions.append(volume <= volume_max)
+        # Ranking bounds also exclude keywords without a ranking (NULL never matches)
+        if google_ranking_min is not None:
+            conditions.append(latest_ranking.c.google_ranking >= google_ranking_min)
+        if google_ranking_max is not None:
+            conditions.append(latest_ranking.c.google_ranking <= google_ranking_max)
+        if bing_ranking_min is not None:
+            conditions.append(latest_ranking.c.bing_ranking >= bing_ranking_min)
+        if bing_ranking_max is not None:
+            conditions.append(latest_ranking.c.bing_ranking <= bing_ranking_max)
+        if competition_min is not None:
+            conditions.append(competition >= competition_min)
+        if competition_max is not None:
+            conditions.append(competition <= competition_max)
+        
+        # Filtered keywords with their campaign, range averages and latest ranking
+        filtered_from = keywords_table.join(
             campaigns_table, keywords_table.c.campaign_id == campaigns_table.c.id, isouter=True
         ).join(
             averages_subquery, keywords_table.c.id == averages_subquery.c.avg_keyword_id, isouter=True
-        ).where(and_(*conditions))
-        
-        # Execute query
-        result = db.execute(query)
-        keywords_data = []
-        for row in result:
-            kw_dict = dict(row._mapping)
-            kw_dict["average_google_ranking"] = kw_dict.get("avg_google_ranking")
-            kw_dict["average_search_volume"] = kw_dict.get("avg_search_volume")
-            # Handle the joined data
-            if 'company' in kw_dict:
-                kw_dict['agency_analytics_campaigns'] = {'company': kw_dict.pop('company')}
-            keywords_data.append(kw_dict)
-        
-        # Process and filter by summary fields (volume, rankings, competition) - using latest ranking per keyword within range
-        filtered_keywords = []
-        for kw in keywords_data:
-            # Latest ranking in range
-            ranking_row = supabase.db.execute(
-                select(rankings_table)
-                .where(
-                    and_(
-                        rankings_table.c.keyword_id == kw.get("id"),
-                        rankings_table.c.date >= start_date,
-                        rankings_table.c.date <= end_date,
-                    )
-                )
-                .order_by(rankings_table.c.date.desc())
-                .limit(1)
-            ).fetchone()
-            summary = dict(ranking_row._mapping) if ranking_row else {}
-            
-            # Apply summary-based filters
-            volume = summary.get("volume", 0) or 0
-            # Require volume > 0 and not null unless include_zero_volume (e.g. for report view)
-            if not include_zero_volume and volume <= 0:
-                continue
-            google_ranking = summary.get("google_ranking")
-            bing_ranking = summary.get("bing_ranking")
-            competition = summary.get("competition", 0) or 0  # competition may be null in rankings
-            
-            if volume_min is not None and volume < volume_min:
-                continue
-            if volume_max is not None and volume > volume_max:
-                continue
-            if google_ranking_min is not None and (google_ranking is None or google_ranking < google_ranking_min):
-                continue
-            if google_ranking_max is not None and (google_ranking is None or google_ranking > google_ranking_max):
-                continue
-            if bing_ranking_min is not None and (bing_ranking is None or bing_ranking < bing_ranking_min):
-                continue
-            if bing_ranking_max is not None and (bing_ranking is None or bing_ranking > bing_ranking_max):
-                continue
-            if competition_min is not None and competition < competition_min:
-                continue
-            if competition_max is not None and competition > competition_max:
-                continue
-            
-            # Filter by tags if provided
-            if tags:
-                kw_tags = kw.get("tags", "") or ""
-                tag_list = [t.strip().lower() for t in tags.split(",")]
-                kw_tag_list = [t.strip().lower() for t in kw_tags.split(",") if t.strip()]
-                if not any(tag in kw_tag_list for tag in tag_list):
-                    continue
-            
-            filtered_keywords.append(kw)
+        ).join(
+            latest_ranking, true(), isouter=True
+        )
         
-        # Sort keywords (use latest ranking fetched above)
+        # Summary KPIs over every filtered keyword, aggregated in SQL
+        location = func.coalesce(
+            func.nullif(keywords_table.c.search_location_formatted_name, ""),
+            func.nullif(keywords_table.c.search_location, ""),
+            func.nullif(keywords_table.c.search_location_country_code, "")
+        )
+        # Prefer the range-average volume, falling back to the latest volume; non-positive values are skipped
+        kpi_volume = case(
+            (averages_subquery.c.avg_search_volume > 0, averages_subquery.c.avg_search_volume),
+            (volume > 0, volume)
+        )
+        kpi_query = select(
+            func.count().label("total_keywords"),
+            func.count(latest_ranking.c.google_ranking).label("google_rankings_count"),
+            func.count(latest_ranking.c.bing_ranking).label("bing_rankings_count"),
+            func.avg(averages_subquery.c.avg_google_ranking).label("average_google_ranking"),
+            func.avg(kpi_volume).label("average_search_volume"),
+            func.array_agg(location.distinct()).label("available_locations")
+        ).select_from(filtered_from).where(and_(*conditions))
+        kpis = db.execute(kpi_query).one()
+        
+        # Sort in SQL (keyword id breaks ties so pages are stable)
         reverse_order = sort_order.lower() == "desc"
+        order_by = []
         if sort_by == "volume":
-            filtered_keywords.sort(
-                key=lambda x: supabase.db.execute(
-                    select(rankings_table.c.volume)
-                    .where(
-                        and_(
-                            rankings_table.c.keyword_id == x.get("id"),
-                            rankings_table.c.date >= start_date,
-                            rankings_table.c.date <= end_date,
-                        )
-                    )
-                    .order_by(rankings_table.c.date.desc())
-                    .limit(1)
-                ).scalar() or 0,
-                reverse=reverse_order
-            )
-        elif sort_by == "google_ranking":
-            filtered_keywords.sort(
-                key=lambda x: supabase.db.execute(
-                    select(rankings_table.c.google_ranking)
-                    .where(
-                        and_(
-                            rankings_table.c.keyword_id == x.get("id"),
-                            rankings_table.c.date >= start_date,
-                            rankings_table.c.date <= end_date,
-                        )
-                    )
-                    .order_by(rankings_table.c.date.desc())
-                    .limit(1)
-                ).scalar() or 999,
-                reverse=not reverse_order  # Lower ranking is better, so reverse logic
-            )
-        elif sort_by == "bing_ranking":
-            filtered_keywords.sort(
-                key=lambda x: supabase.db.execute(
-                    select(rankings_table.c.bing_ranking)
-                    .where(
-                        and_(
-                            rankings_table.c.keyword_id == x.get("id"),
-                            rankings_table.c.date >= start_date,
-                            rankings_table.c.date <= end_date,
-                        )
-                    )
-                    .order_by(rankings_table.c.date.desc())
-                    .limit(1)
-                ).scalar() or 999,
-                reverse=not reverse_order
-            )
+            order_by.append(volume.desc() if reverse_order else volume.asc())
+        elif sort_by in ("google_ranking", "bing_ranking"):
+            # Lower ranking is better, so reverse logic; unranked (NULL or 0) sorts as 999
+            ranking = func.coalesce(func.nullif(latest_ranking.c[sort_by], 0), 999)
+            order_by.append(ranking.asc() if reverse_order else ranking.desc())
         elif sort_by == "keyword_phrase":
-            filtered_keywords.sort(
-                key=lambda x: (x.get("keyword_phrase", "") or "").lower(),
-                reverse=reverse_order
-            )
-        
-        # Calculate summary KPIs
-        total_keywords = len(filtered_keywords)
-        google_rankings_count = 0
-        google_change_total = 0
-        bing_rankings_count = 0
-        bing_change_total = 0
-        avg_google_list = []
-        avg_volume_list = []
-        available_locations_set = set()
-        
-        for kw in filtered_keywords:
-            # Latest ranking in range
-            ranking_row = supabase.db.execute(
-                select(rankings_table)
-                .where(
-                    and_(
-                        rankings_table.c.keyword_id == kw.get("id"),
-                        rankings_table.c.date >= start_date,
-                        rankings_table.c.date <= end_date,
-                    )
-                )
-                .order_by(rankings_table.c.date.desc())
-                .limit(1)
-            ).fetchone()
-            summary = dict(ranking_row._mapping) if ranking_row else {}
-            volume = summary.get("volume", 0) or 0
-            loc = kw.get("search_location_formatted_name") or kw.get("search_location") or kw.get("search_location_country_code")
-            if loc:
-                available_locations_set.add(loc)
-            
-            if summary.get("google_ranking") is not None:
-                google_rankings_count += 1
-                change = summary.get("ranking_change", 0) or 0
-                if change > 0:  # Positive change means improvement (lower ranking number)
-                    google_change_total += change
-            if kw.get("average_google_ranking") is not None:
-                avg_google_list.append(kw.get("average_google_ranking"))
-            if kw.get("average_search_volume") is not None and kw.get("average_search_volume") > 0:
-                avg_volume_list.append(kw.get("average_search_volume"))
-            elif volume > 0:
-                avg_volume_list.append(volume)
-            
-            if summary.get("bing_ranking") is not None:
-                bing_rankings_count += 1
-                # Bing change calculation - would need to be added to summaries or calculated
-                # For now, we'll use 0 or calculate from historical if needed
+            phrase = func.lower(func.coalesce(keywords_table.c.keyword_phrase, ""))
+            order_by.append(phrase.desc() if reverse_order else phrase.asc())
+        order_by.append(keywords_table.c.id.asc())
         
-        # Paginate
-        total = len(filtered_keywords)
-        offset = (page - 1) * page_size
-        paginated_keywords = filtered_keywords[offset:offset + page_size]
+        # Fetch only the requested page
+        offset = (page - 1) * page_size if page > 0 else 0
+        query = select(
+            keywords_table,
+            campaigns_table.c.company,
+            averages_subquery.c.avg_google_ranking,
+            averages_subquery.c.avg_search_volume,
+            latest_ranking
+        ).select_from(filtered_from).where(and_(*conditions)).order_by(*order_by).limit(page_size).offset(offset)
         
-        # Format response
+        # Format response (no page query for an empty page size or when the KPI count shows
+        # the page is past the end)
         formatted_keywords = []
-        for kw in paginated_keywords:
-            # Get the LATEST ranking within the date range (not average)
-            # This query orders by date DESC and limits to 1 to get the most recent ranking
-            ranking_row = supabase.db.execute(
-                select(rankings_table)
-                .where(
-                    and_(
-                        rankings_table.c.keyword_id == kw.get("id"),
-                        rankings_table.c.date >= start_date,
-                        rankings_table.c.date <= end_date,
-                    )
-                )
-                .order_by(rankings_table.c.date.desc())
-                .limit(1)
-            ).fetchone()
-            summary = dict(ranking_row._mapping) if ranking_row else {}
-            volume = summary.get("volume", 0) or 0
-            
-            campaign = kw.get("agency_analytics_campaigns")
-            if campaign and isinstance(campaign, dict):
-                campaign_name = campaign.get("company", "")
-            else:
-                campaign_name = ""
-            
+        page_rows = db.execute(query) if page_size > 0 and offset < kpis.total_keywords else []
+        for row in page_rows:
+            kw = row._mapping
             formatted_keywords.append({
-                "keyword_id": kw.get("id"),
-                "keyword_phrase": kw.get("keyword_phrase", ""),
-                "campaign_id": kw.get("campaign_id"),
-                "campaign_name": campaign_name,
+                "keyword_id": kw["id"],
+                "keyword_phrase": kw["keyword_phrase"],
+                "campaign_id": kw["campaign_id"],
+                "campaign_name": kw["company"],
                 # google_ranking uses the LATEST ranking from the date range, not the average
-                "google_ranking": summary.get("google_ranking"),
-                "google_ranking_url": summary.get("google_ranking_url"),
-                "google_mobile_ranking": summary.get("google_mobile_ranking"),
-                "google_local_ranking": summary.get("google_local_ranking"),
-                "bing_ranking": summary.get("bing_ranking"),
-                "bing_ranking_url": summary.get("bing_ranking_url"),
-                "google_change": summary.get("ranking_change", 0) or 0,
+                "google_ranking": kw["google_ranking"],
+                "google_ranking_url": kw["google_ranking_url"],
+                "google_mobile_ranking": kw["google_mobile_ranking"],
+                "google_local_ranking": kw["google_local_ranking"],
+                "bing_ranking": kw["bing_ranking"],
+                "bing_ranking_url": kw["bing_ranking_url"],
+                "google_change": 0,  # Rankings rows carry no ranking_change
                 "bing_change": 0,  # Would need to calculate from historical data
-                "search_volume": volume,
-                "competition": summary.get("competition", 0) or 0,
-                "average_google_ranking": kw.get("average_google_ranking"),
-                "average_search_volume": kw.get("average_search_volume"),
-                "search_location": kw.get("search_location", ""),
-                "search_location_formatted_name": kw.get("search_location_formatted_name", ""),
-                "search_location_country_code": kw.get("search_location_country_code", ""),
-                "search_location_region_name": kw.get("search_location_region_name", ""),
-                "search_language": kw.get("search_language", ""),
-                "tags": kw.get("tags", ""),
-                "primary_keyword": kw.get("primary_keyword", False),
-                "last_updated": summary.get("date")
+                "search_volume": kw["volume"] or 0,
+                "competition": kw["competition"] or 0,
+                "average_google_ranking": kw["avg_google_ranking"],
+                "average_search_volume": kw["avg_search_volume"],
+                "search_location": kw["search_location"],
+                "search_location_formatted_name": kw["search_location_formatted_name"],
+                "search_location_country_code": kw["search_location_country_code"],
+                "search_location_region_name": kw["search_location_region_name"],
+                "search_language": kw["search_language"],
+                "tags": kw["tags"],
+                "primary_keyword": kw["primary_keyword"],
+                "last_updated": kw["ranking_date"]
             })
         
+        total = kpis.total_keywords
         total_pages = (total + page_size - 1) // page_size if page_size > 0 else 1
         
-        return {
+        return ORJSONResponse(content={
             "keywords": formatted_keywords,
             "pagination": {
                 "total": total,
@@ -393,23 +302,38 @@ async def get_client_keywords(
                 "total_pages": total_pages
             },
             "summary": {
-                "total_keywords": total_keywords,
-                "google_rankings_count": google_rankings_count,
-                "google_change_total": google_change_total,
-                "bing_rankings_count": bing_rankings_count,
-                "bing_change_total": bing_change_total,
-                "average_google_ranking": round(sum(avg_google_list) / len(avg_google_list), 1) if avg_google_list else 0,
-                "average_search_volume": round(sum(avg_volume_list) / len(avg_volume_list), 1) if avg_volume_list else 0,
-                "available_locations": sorted(available_locations_set)
+                "total_keywords": total,
+                "google_rankings_count": kpis.google_rankings_count,
+                "google_change_total": 0,  # Rankings rows carry no ranking_change
+                "bing_rankings_count": kpis.bing_rankings_count,
+                "bing_change_total": 0,
+                "average_google_ranking": round(float(kpis.average_google_ranking), 1) if kpis.average_google_ranking is not None else 0,
+                "average_search_volume": round(float(kpis.average_search_volume), 1) if kpis.average_search_volume is not None else 0,
+                "available_locations": sorted(loc for loc in kpis.available_locations or [] if loc)
             }
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching client keywords: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/clients/{client_id}/keywords/rankings-over-time")
+_POSITION_BUCKET_NAMES = ("position_1_3", "position_4_10", "position_11_20", "position_21_50", "position_51_plus", "not_found")
+
+
+def _position_bucket_counts(ranking, engine: str) -> list:
+    """Count rankings per position bucket; 0 or NULL is not found and negative rankings are skipped"""
+    buckets = (
+        ("position_1_3", ranking.between(1, 3)),
+        ("position_4_10", ranking.between(4, 10)),
+        ("position_11_20", ranking.between(11, 20)),
+        ("position_21_50", ranking.between(21, 50)),
+        ("position_51_plus", ranking > 50),
+        ("not_found", or_(ranking.is_(None), ranking == 0)),
+    )
+    return [func.count(case((condition, 1))).label(f"{engine}_{name}") for name, condition in buckets]
+
+@router.get("/data/clients/{client_id}/keywords/rankings-over-time", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching keyword rankings over time")
 async def get_client_keyword_rankings_over_time(
     client_id: int,
@@ -462,25 +386,18 @@ async def get_client_keyword_rankings_over_time(
         if not campaign_ids:
             return {"data": []}
         
-        # Get keyword IDs for filtering using SQLAlchemy Core
-        keywords_table = supabase._get_table("agency_analytics_keywords")
+        # Keyword IDs for filtering using SQLAlchemy Core
         keyword_conditions = [keywords_table.c.campaign_id.in_(campaign_ids)]
         if campaign_id:
             keyword_conditions.append(keywords_table.c.campaign_id == campaign_id)
         if location_country:
             keyword_conditions.append(keywords_table.c.search_location_country_code == location_country)
         
-        keyword_query = select(keywords_table.c.id).where(and_(*keyword_conditions))
-        keywords_result = db.execute(keyword_query)
-        keyword_ids = [row.id for row in keywords_result if row.id]
-        
-        if not keyword_ids:
-            return {"data": []}
+        keyword_ids = select(keywords_table.c.id).where(and_(*keyword_conditions))
         
         # Get rankings data using SQLAlchemy Core
         # Use a subquery to get only the LATEST ranking per keyword per date
         # This prevents counting duplicate rankings if there are multiple entries for the same keyword/date
-        rankings_table = supabase._get_table("agency_analytics_keyword_rankings")
         
         # Subquery to get the max id (latest entry) per keyword_id and date
         # This ensures we only count one ranking per keyword per date
@@ -501,164 +418,64 @@ async def get_client_keyword_rankings_over_time(
             .subquery()
         )
         
-        # Main query to get the latest ranking per keyword per date
-        # Filter by volume > 0 to match the keywords table logic
-        # Also need keyword_id to ensure we're counting unique keywords per date
-        rankings_query = select(
-            rankings_table.c.keyword_id,
-            rankings_table.c.date,
-            rankings_table.c.google_ranking,
-            rankings_table.c.bing_ranking,
-            rankings_table.c.volume
-        ).join(
-            latest_ids_subquery,
-            and_(
-                rankings_table.c.keyword_id == latest_ids_subquery.c.keyword_id,
-                rankings_table.c.date == latest_ids_subquery.c.date,
-                rankings_table.c.id == latest_ids_subquery.c.max_id
+        # Group by day, week (Postgres weeks start on Monday) or month
+        date_trunc_unit = {"week": "week", "month": "month"}.get(group_by, "day")
+        period = func.date_trunc(date_trunc_unit, rankings_table.c.date).label("period")
+        
+        # One ranking per keyword per period: its earliest date in the period, and only rankings
+        # with volume > 0 to match the keywords table logic
+        period_rankings = (
+            select(
+                period,
+                rankings_table.c.google_ranking,
+                rankings_table.c.bing_ranking
             )
-        ).where(
-            and_(
-                rankings_table.c.volume != None,
-                rankings_table.c.volume > 0
+            .join(
+                latest_ids_subquery,
+                and_(
+                    rankings_table.c.keyword_id == latest_ids_subquery.c.keyword_id,
+                    rankings_table.c.date == latest_ids_subquery.c.date,
+                    rankings_table.c.id == latest_ids_subquery.c.max_id
+                )
             )
-        ).order_by(rankings_table.c.date.asc(), rankings_table.c.keyword_id.asc())
-        
-        rankings_result = db.execute(rankings_query)
-        rankings_data = [dict(row._mapping) for row in rankings_result]
-        
-        # Log raw rankings data for debugging
-        logger.info(f"[Rankings Over Time API] Client {client_id} - Fetched {len(rankings_data)} ranking records from database")
-        if rankings_data:
-            # Log sample of raw rankings
-            logger.info(f"[Rankings Over Time API] Sample raw rankings (first 10):")
-            for idx, ranking in enumerate(rankings_data[:10]):
-                logger.info(f"[Rankings Over Time API]   [{idx+1}] Date: {ranking.get('date')}, Google: {ranking.get('google_ranking')}, Bing: {ranking.get('bing_ranking')}")
-            
-            # Count by bucket from raw data (after volume filter)
-            filtered_rankings = [r for r in rankings_data if (r.get("volume", 0) or 0) > 0]
-            raw_not_found = sum(1 for r in filtered_rankings if r.get("google_ranking") is None or r.get("google_ranking") == 0)
-            raw_1_3 = sum(1 for r in filtered_rankings if r.get("google_ranking") and 1 <= r.get("google_ranking") <= 3)
-            raw_4_10 = sum(1 for r in filtered_rankings if r.get("google_ranking") and 4 <= r.get("google_ranking") <= 10)
-            raw_11_20 = sum(1 for r in filtered_rankings if r.get("google_ranking") and 11 <= r.get("google_ranking") <= 20)
-            raw_21_50 = sum(1 for r in filtered_rankings if r.get("google_ranking") and 21 <= r.get("google_ranking") <= 50)
-            raw_51_plus = sum(1 for r in filtered_rankings if r.get("google_ranking") and r.get("google_ranking") > 50)
-            logger.info(f"[Rankings Over Time API] Raw data bucket counts (after volume filter) - Not Found: {raw_not_found}, 1-3: {raw_1_3}, 4-10: {raw_4_10}, 11-20: {raw_11_20}, 21-50: {raw_21_50}, 51+: {raw_51_plus}")
-            logger.info(f"[Rankings Over Time API] Total records: {len(rankings_data)}, After volume filter: {len(filtered_rankings)}")
-        
-        # Group by date and calculate position buckets
-        # Track unique keywords per date to ensure we don't double-count
-        # Each ranking in rankings_data represents one keyword's ranking on that date
-        date_groups = {}
-        date_keyword_tracker = {}  # Track which keywords we've counted per date to avoid duplicates
-        
-        for ranking in rankings_data:
-            date_val = ranking.get("date")
-            keyword_id = ranking.get("keyword_id")
-            if not date_val or not keyword_id:
-                continue
-            
-            # Convert date to string if it's a date object
-            if isinstance(date_val, date_type):
-                date_str = date_val.isoformat()
-            else:
-                date_str = str(date_val)
-            
-            # Handle group_by parameter
-            if group_by == "week":
-                # Get week start date (Monday)
-                if isinstance(date_val, date_type):
-                    date_obj = date_val
-                else:
-                    date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-                days_since_monday = date_obj.weekday()
-                week_start = date_obj - timedelta(days=days_since_monday)
-                date_key = week_start.strftime("%Y-%m-%d")
-            elif group_by == "month":
-                if isinstance(date_val, date_type):
-                    date_obj = date_val
-                else:
-                    date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-                date_key = date_obj.strftime("%Y-%m")
-            else:  # day
-                date_key = date_str
-            
-            # Initialize date group if needed
-            if date_key not in date_groups:
-                date_groups[date_key] = {
-                    "google": {"position_1_3": 0, "position_4_10": 0, "position_11_20": 0, "position_21_50": 0, "position_51_plus": 0, "not_found": 0},
-                    "bing": {"position_1_3": 0, "position_4_10": 0, "position_11_20": 0, "position_21_50": 0, "position_51_plus": 0, "not_found": 0}
-                }
-                date_keyword_tracker[date_key] = set()  # Track unique keywords per date
-            
-            # Skip if we've already counted this keyword for this date (avoid duplicates)
-            if keyword_id in date_keyword_tracker[date_key]:
-                continue
-            
-            # Check volume filter (matches table filter: volume > 0)
-            volume = ranking.get("volume", 0) or 0
-            if volume <= 0:
-                continue  # Skip this ranking record if volume is 0 or null
-            
-            # Mark this keyword as counted for this date
-            date_keyword_tracker[date_key].add(keyword_id)
-            
-            # Process Google ranking
-            # Treat ranking 0 or None as not found
-            if engine in ["google", "both"]:
-                google_rank = ranking.get("google_ranking")
-                if google_rank is None or google_rank == 0:
-                    date_groups[date_key]["google"]["not_found"] += 1
-                elif 1 <= google_rank <= 3:
-                    date_groups[date_key]["google"]["position_1_3"] += 1
-                elif 4 <= google_rank <= 10:
-                    date_groups[date_key]["google"]["position_4_10"] += 1
-                elif 11 <= google_rank <= 20:
-                    date_groups[date_key]["google"]["position_11_20"] += 1
-                elif 21 <= google_rank <= 50:
-                    date_groups[date_key]["google"]["position_21_50"] += 1
-                elif google_rank > 50:
-                    date_groups[date_key]["google"]["position_51_plus"] += 1
-                # else: skip invalid rankings
-            
-            # Process Bing ranking
-            # Treat ranking 0 or None as not found
-            if engine in ["bing", "both"]:
-                bing_rank = ranking.get("bing_ranking")
-                if bing_rank is None or bing_rank == 0:
-                    date_groups[date_key]["bing"]["not_found"] += 1
-                elif 1 <= bing_rank <= 3:
-                    date_groups[date_key]["bing"]["position_1_3"] += 1
-                elif 4 <= bing_rank <= 10:
-                    date_groups[date_key]["bing"]["position_4_10"] += 1
-                elif 11 <= bing_rank <= 20:
-                    date_groups[date_key]["bing"]["position_11_20"] += 1
-                elif 21 <= bing_rank <= 50:
-                    date_groups[date_key]["bing"]["position_21_50"] += 1
-                elif bing_rank > 50:
-                    date_groups[date_key]["bing"]["position_51_plus"] += 1
-                # else: skip invalid rankings
+            .where(
+                and_(
+                    rankings_table.c.volume != None,
+                    rankings_table.c.volume > 0
+                )
+            )
+            .distinct(rankings_table.c.keyword_id, period)
+            .order_by(rankings_table.c.keyword_id, period, rankings_table.c.date.asc())
+            .subquery()
+        )
+        
+        # Position-bucket histogram per period, counted in SQL
+        engines = [e for e in ("google", "bing") if engine in (e, "both")]
+        bucket_counts = []
+        for engine_name in engines:
+            bucket_counts.extend(_position_bucket_counts(period_rankings.c[f"{engine_name}_ranking"], engine_name))
+        histogram_query = (
+            select(period_rankings.c.period, *bucket_counts)
+            .group_by(period_rankings.c.period)
+            .order_by(period_rankings.c.period)
+        )
         
         # Convert to list and calculate totals
         result_data = []
-        for date_key in sorted(date_groups.keys()):
-            google_data = date_groups[date_key]["google"]
-            bing_data = date_groups[date_key]["bing"]
-            
-            google_total = sum(google_data.values())
-            bing_total = sum(bing_data.values())
-            
-            result_data.append({
-                "date": date_key,
-                "google": {
-                    **google_data,
-                    "total": google_total
-                },
-                "bing": {
-                    **bing_data,
-                    "total": bing_total
+        for row in db.execute(histogram_query):
+            counts = row._mapping
+            date_key = row.period.strftime("%Y-%m") if date_trunc_unit == "month" else row.period.date().isoformat()
+            item = {"date": date_key}
+            for engine_name in ("google", "bing"):
+                engine_data = {
+                    name: counts[f"{engine_name}_{name}"] if engine_name in engines else 0
+                    for name in _POSITION_BUCKET_NAMES
                 }
-            })
+                item[engine_name] = {
+                    **engine_data,
+                    "total": sum(engine_data.values())
+                }
+            result_data.append(item)
         
         # Log the result data for debugging
         logger.info(f"[Rankings Over Time API] Client {client_id} - Returning {len(result_data)} date groups")
@@ -677,14 +494,14 @@ async def get_client_keyword_rankings_over_time(
             for item in result_data[:3]:
                 logger.info(f"[Rankings Over Time API]   Date: {item['date']}, Google buckets: {item['google']}")
         
-        return {"data": result_data}
+        return ORJSONResponse(content={"data": result_data})
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching keyword rankings over time: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/clients/{client_id}/keywords/summary")
+@router.get("/data/clients/{client_id}/keywords/summary", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching keyword summary")
 async def get_client_keyword_summary(
     client_id: int,
@@ -744,22 +561,17 @@ async def get_client_keyword_summary(
             raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD. Error: {str(e)}")
         
         # Build query for keywords using SQLAlchemy Core
-        keywords_table = supabase._get_table("agency_analytics_keywords")
-        rankings_table = supabase._get_table("agency_analytics_keyword_rankings")
-        
         conditions = [keywords_table.c.campaign_id.in_(campaign_ids)]
         if campaign_id:
             conditions.append(keywords_table.c.campaign_id == campaign_id)
         if location_country:
             conditions.append(keywords_table.c.search_location_country_code == location_country)
         
-        # Get keyword ids
-        keyword_query = select(keywords_table.c.id).where(and_(*conditions))
-        keyword_rows = db.execute(keyword_query)
-        keyword_ids = [row.id for row in keyword_rows if row.id]
-        total_keywords = len(keyword_ids)
+        # Count matching keywords
+        keyword_ids = select(keywords_table.c.id).where(and_(*conditions))
+        total_keywords = db.execute(select(func.count()).select_from(keyword_ids.subquery())).scalar()
         
-        if not keyword_ids:
+        if not total_keywords:
             return {
                 "google_rankings": 0,
                 "google_change": 0,
@@ -775,82 +587,79 @@ async def get_client_keyword_summary(
                 "stable_keywords_count": 0
             }
         
-        # Pull rankings in date range
-        rankings_query = select(
-            rankings_table.c.keyword_id,
-            rankings_table.c.date,
-            rankings_table.c.google_ranking,
-            rankings_table.c.bing_ranking,
-            rankings_table.c.volume
-        ).where(
-            and_(
-                rankings_table.c.keyword_id.in_(keyword_ids),
-                rankings_table.c.date >= start_date,
-                rankings_table.c.date <= end_date
+        # Per-keyword rollup of rankings in the date range; the trend compares the earliest and
+        # latest non-null google ranking
+        google = rankings_table.c.google_ranking
+        first_google = array_agg(
+            aggregate_order_by(google, rankings_table.c.date.asc(), rankings_table.c.id.asc())
+        ).filter(google.isnot(None))[1]
+        last_google = array_agg(
+            aggregate_order_by(google, rankings_table.c.date.desc(), rankings_table.c.id.desc())
+        ).filter(google.isnot(None))[1]
+        per_keyword = (
+            select(
+                func.count(google).label("google_count"),
+                func.sum(google).label("google_sum"),
+                func.min(google).label("google_min"),
+                first_google.label("first_google"),
+                last_google.label("last_google"),
+                func.count(rankings_table.c.bing_ranking).label("bing_count"),
+                func.sum(rankings_table.c.bing_ranking).label("bing_sum"),
+                func.sum(rankings_table.c.volume).label("volume_sum"),
+                func.count(rankings_table.c.volume).label("volume_count")
+            )
+            .where(
+                and_(
+                    rankings_table.c.keyword_id.in_(keyword_ids),
+                    rankings_table.c.date >= start_date,
+                    rankings_table.c.date <= end_date
+                )
             )
+            .group_by(rankings_table.c.keyword_id)
+            .subquery()
         )
-        rankings_rows = db.execute(rankings_query)
-        
-        # Bucket by keyword
-        rankings_by_keyword = {kw_id: [] for kw_id in keyword_ids}
-        for row in rankings_rows:
-            rd = dict(row._mapping)
-            rankings_by_keyword.setdefault(rd["keyword_id"], []).append(rd)
-        
-        # Calculate KPIs
-        google_rankings = 0
-        bing_rankings = 0
-        google_change_total = 0
-        google_rankings_list = []
-        bing_rankings_list = []
-        total_search_volume = 0
-        volume_entries = 0
-        top_10_count = 0
-        improving_count = 0
-        declining_count = 0
-        stable_count = 0
-        
-        for kw_id, rows in rankings_by_keyword.items():
-            if not rows:
-                continue
-            rows_sorted = sorted(rows, key=lambda r: r.get("date"))
-            google_vals = [r.get("google_ranking") for r in rows_sorted if r.get("google_ranking") is not None]
-            bing_vals = [r.get("bing_ranking") for r in rows_sorted if r.get("bing_ranking") is not None]
-            volume_vals = [r.get("volume") or 0 for r in rows_sorted if r.get("volume") is not None]
-            
-            if google_vals:
-                google_rankings += len(google_vals)
-                google_rankings_list.extend(google_vals)
-                if min(google_vals) <= 10:
-                    top_10_count += 1
-                # Trend: compare earliest vs latest non-null google ranking
-                first_g = google_vals[0]
-                last_g = google_vals[-1]
-                if last_g < first_g:
-                    improving_count += 1
-                    google_change_total += (first_g - last_g)
-                elif last_g > first_g:
-                    declining_count += 1
-                else:
-                    stable_count += 1
-            # If no google values but there are bing values, count stable for completeness
-            elif bing_vals:
-                stable_count += 1
-            
-            if bing_vals:
-                bing_rankings += len(bing_vals)
-                bing_rankings_list.extend(bing_vals)
-            
-            total_search_volume += sum(volume_vals)
-            volume_entries += len(volume_vals)
+        
+        # Calculate KPIs across keywords in one aggregate
+        has_google = per_keyword.c.google_count > 0
+        kpi_query = select(
+            func.coalesce(func.sum(per_keyword.c.google_count), 0).label("google_rankings"),
+            func.coalesce(func.sum(per_keyword.c.google_sum), 0).label("google_sum"),
+            func.coalesce(func.sum(per_keyword.c.bing_count), 0).label("bing_rankings"),
+            func.coalesce(func.sum(per_keyword.c.bing_sum), 0).label("bing_sum"),
+            func.coalesce(func.sum(per_keyword.c.volume_sum), 0).label("total_search_volume"),
+            func.coalesce(func.sum(per_keyword.c.volume_count), 0).label("volume_entries"),
+            func.count(case((per_keyword.c.google_min <= 10, 1))).label("top_10_count"),
+            func.count(case((per_keyword.c.last_google < per_keyword.c.first_google, 1))).label("improving_count"),
+            func.count(case((per_keyword.c.last_google > per_keyword.c.first_google, 1))).label("declining_count"),
+            # Keywords with only bing values count as stable for completeness
+            func.count(case(
+                (and_(has_google, per_keyword.c.last_google == per_keyword.c.first_google), 1),
+                (and_(~has_google, per_keyword.c.bing_count > 0), 1)
+            )).label("stable_count"),
+            func.coalesce(func.sum(case(
+                (per_keyword.c.last_google < per_keyword.c.first_google, per_keyword.c.first_google - per_keyword.c.last_google),
+                else_=0
+            )), 0).label("google_change_total")
+        )
+        kpis = db.execute(kpi_query).one()
+        
+        google_rankings = int(kpis.google_rankings)
+        bing_rankings = int(kpis.bing_rankings)
+        total_search_volume = int(kpis.total_search_volume)
+        volume_entries = int(kpis.volume_entries)
+        top_10_count = kpis.top_10_count
+        improving_count = kpis.improving_count
+        declining_count = kpis.declining_count
+        stable_count = kpis.stable_count
+        google_change_total = int(kpis.google_change_total)
         
         # Calculate averages
-        average_google_ranking = sum(google_rankings_list) / len(google_rankings_list) if google_rankings_list else 0
-        average_bing_ranking = sum(bing_rankings_list) / len(bing_rankings_list) if bing_rankings_list else 0
+        average_google_ranking = int(kpis.google_sum) / google_rankings if google_rankings else 0
+        average_bing_ranking = int(kpis.bing_sum) / bing_rankings if bing_rankings else 0
         average_search_volume = total_search_volume / volume_entries if volume_entries > 0 else 0
         top_10_visibility_percentage = (top_10_count / total_keywords * 100) if total_keywords > 0 else 0
         
-        return {
+        return ORJSONResponse(content={
             "google_rankings": google_rankings,
             "google_change": google_change_total,
             "bing_rankings": bing_rankings,
@@ -864,7 +673,7 @@ async def get_client_keyword_summary(
             "improving_keywords_count": improving_count,
             "declining_keywords_count": declining_count,
             "stable_keywords_count": stable_count
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends, Request
+from fastapi import Response as FastAPIResponse
 from typing import Optional, List, Dict, Any
 import logging
 import time
 import json
+import heapq
+import hashlib
+from collections import Counter
+import numpy as np
 from datetime import datetime, timedelta, date as date_type, timezone
 from app.services.supabase_service import SupabaseService
 from app.services.ga4_client import GA4APIClient
 from app.core.error_utils import handle_api_errors
+from app.core.cache import TTLCache
+from app.core.responses import ORJSONResponse
 from app.api.auth_v2 import get_current_user_v2
 from app.db.database import get_db
 from sqlalchemy.orm import Session
@@ -17,6 +24,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 ga4_client = GA4APIClient()
 
+# Short-lived cache for computed Scrunch dashboard payloads, scoped by brand_id.
+# Keys include a freshness token (response count + latest created_at), so newly synced
+# responses are picked up immediately; the TTL bounds staleness of prompt metadata.
+_scrunch_dashboard_cache = TTLCache(maxsize=256, ttl=30)
+
 class KPISelectionRequest(BaseModel):
     selected_kpis: List[str]
     visible_sections: Optional[List[str]] = None  # Optional for backward compatibility
@@ -3349,7 +3361,7 @@ async def get_reporting_dashboard_by_slug(
         raise HTTPException(status_code=500, detail=f"Error fetching reporting dashboard: {str(e)}")
 
 
-@router.get("/data/reporting-dashboard/slug/{slug}/scrunch")
+@router.get("/data/reporting-dashboard/slug/{slug}/scrunch", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching Scrunch dashboard data by slug")
 async def get_scrunch_dashboard_data_by_slug(
     slug: str,
@@ -3461,7 +3473,7 @@ async def get_scrunch_dashboard_data_by_slug(
         # Call the existing get_scrunch_dashboard_data function
         result = await get_scrunch_dashboard_data(brand_id, start_date, end_date, client_id=client_id_for_scrunch, db=db)
         result["brand_slug"] = slug
-        return result
+        return ORJSONResponse(content=result)
         
     except HTTPException:
         raise
@@ -3472,18 +3484,172 @@ async def get_scrunch_dashboard_data_by_slug(
         raise HTTPException(status_code=500, detail=f"Error fetching Scrunch dashboard data: {str(e)}")
 
 
-@router.get("/data/reporting-dashboard/{brand_id}/scrunch")
+def _with_display_fields(prompt: Dict) -> Dict:
+    """Copy of a prompt row with the insights display fields (_category, _seed_prompt) precomputed.
+
+    Category is the first topic, else the first three words of the prompt text, else the stage.
+    """
+    text = prompt.get("text") or prompt.get("prompt_text") or ""
+    return {
+        **prompt,
+        "_category": (prompt.get("topics") or [None])[0] or " ".join(text.split()[:3]) or prompt.get("stage") or "General",
+        "_seed_prompt": text or "N/A",
+    }
+
+
+def _compute_top_prompts(brand_rows: List[Dict], prompt_map: Dict[Any, Dict], citations_by_prompt: Counter) -> List[Dict]:
+    """Build the top-10 performing prompts from brand-scoped responses."""
+    prompt_response_counts = {}
+    prompt_variants = {}
+    for r in brand_rows:
+        prompt_id = r["prompt_id"]
+        if prompt_id and prompt_id in prompt_map:
+            prompt_response_counts[prompt_id] = prompt_response_counts.get(prompt_id, 0) + 1
+            platform = r["platform"]
+            if platform:
+                if prompt_id not in prompt_variants:
+                    prompt_variants[prompt_id] = set()
+                prompt_variants[prompt_id].add(platform)
+
+    total_responses_for_brand = len(brand_rows)
+    top_prompts = heapq.nlargest(10, prompt_response_counts.items(), key=lambda x: x[1])
+    top_performing_prompts = []
+    for idx, (prompt_id, count) in enumerate(top_prompts, 1):
+        prompt = prompt_map[prompt_id]
+        unique_variants = len(prompt_variants.get(prompt_id, set()))
+        top_performing_prompts.append({
+            "id": prompt_id,
+            "text": prompt.get("text", "N/A"),
+            "rank": idx,
+            "responseCount": count,
+            "variants": unique_variants if unique_variants > 0 else 1,
+            "citations": citations_by_prompt[prompt_id],
+            "totalResponsesForBrand": total_responses_for_brand
+        })
+    return top_performing_prompts
+
+
+def _citation_count(citations: Any) -> int:
+    """Number of citations in a response's citations value (a JSON array or its string encoding)"""
+    if not citations:
+        return 0
+    if isinstance(citations, list):
+        return len(citations)
+    if isinstance(citations, str):
+        try:
+            parsed = json.loads(citations)
+        except ValueError:
+            return 0
+        if isinstance(parsed, list):
+            return len(parsed)
+    return 0
+
+
+def _aggregate_prompt_counters(idx, bp, cit_len, n: int):
+    """Per-prompt aggregation kernel over aligned response arrays.
+
+    Returns (responses, presence, citations), each of length n. The sums run as compiled
+    single passes via np.bincount.
+    """
+    resp = np.bincount(idx, minlength=n)
+    pres = np.bincount(idx, weights=bp, minlength=n).astype(np.int64)
+    cit = np.bincount(idx, weights=cit_len, minlength=n).astype(np.int64)
+    return resp, pres, cit
+
+
+def _compute_insights(brand_rows: List[Dict], prompt_map: Dict[Any, Dict]) -> List[Dict]:
+    """Build the Scrunch AI insights rows (top 20 prompts by responses) from brand-scoped responses.
+
+    Per-prompt counters are kept as parallel NumPy arrays indexed by a dense prompt index
+    (struct-of-arrays) instead of a dict of per-prompt dicts.
+    """
+    prompt_ids = list(prompt_map)
+    prompt_index = {pid: i for i, pid in enumerate(prompt_ids)}
+    n = len(prompt_ids)
+
+    # Gather one aligned entry per matching response
+    idx_list = []
+    bp_list = []
+    cit_list = []
+    platforms = {}
+    competitors = {}
+    index_of = prompt_index.get
+    for r in brand_rows:
+        i = index_of(r["prompt_id"])
+        if i is None:
+            continue
+        idx_list.append(i)
+        bp_list.append(1 if r["brand_present"] else 0)
+        cit_list.append(r["_n_cit"])
+
+        # Track distinct platforms and competitors (variable length, so kept outside the arrays)
+        platform = r["platform"]
+        if platform:
+            platforms.setdefault(i, set()).add(platform)
+        competitors_present = r["competitors_present"]
+        if isinstance(competitors_present, list):
+            for comp in competitors_present:
+                if comp:
+                    competitors.setdefault(i, set()).add(comp)
+
+    if not idx_list:
+        return []
+
+    idx_vec = np.array(idx_list, dtype=np.int64)
+    resp, pres, cit = _aggregate_prompt_counters(
+        idx_vec,
+        np.array(bp_list, dtype=np.int64),
+        np.array(cit_list, dtype=np.int64),
+        n
+    )
+
+    # Visit prompts in order of first appearance so ties keep their response order
+    seen_idx, first_pos = np.unique(idx_vec, return_index=True)
+    ordered_idx = seen_idx[np.argsort(first_pos, kind="stable")]
+
+    # Only the top 20 prompts by responses are rendered, so select them before building rows
+    top_idx = heapq.nlargest(20, ordered_idx.tolist(), key=lambda i: resp[i])
+
+    insights = []
+    for i in top_idx:
+        prompt_id = prompt_ids[i]
+        prompt = prompt_map[prompt_id]
+        response_count = int(resp[i])
+        presence = pres[i] / response_count * 100
+
+        insights.append({
+            "id": prompt_id,
+            "seedPrompt": prompt["_seed_prompt"],
+            "stage": prompt.get("stage") or "Unknown",
+            "variants": len(platforms.get(i, ())) or 1,
+            "responses": response_count,
+            "presence": round(float(presence), 1),
+            "presenceChange": 0,
+            "citations": int(cit[i]),
+            "citationsChange": 0,
+            "competitors": len(competitors.get(i, ())),
+            "competitorsChange": 0,
+            "category": prompt["_category"]
+        })
+
+    return insights
+
+
+@router.get("/data/reporting-dashboard/{brand_id}/scrunch", response_class=ORJSONResponse)
 @handle_api_errors(context="fetching Scrunch dashboard data")
 async def get_scrunch_dashboard_data(
     brand_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     client_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    request: Request = None
 ):
     """Get Scrunch AI KPIs and chart data for reporting dashboard (separate endpoint for parallel loading)
     
     Supports querying by brand_id or client_id. When client_id is provided, uses scrunch_brand_id from client.
+    Computed payloads are cached briefly and tagged with an ETag so unchanged dashboards return 304.
+    Served as an ORJSONResponse when called as a route; direct callers (request=None) get the dict.
     """
     try:
         supabase = SupabaseService(db=db)
@@ -3530,8 +3696,35 @@ async def get_scrunch_dashboard_data(
         start_ts = datetime.fromisoformat(f"{start_date}T00:00:00+00:00")
         end_ts = datetime.fromisoformat(f"{end_date}T23:59:59+00:00")
         
+        # Freshness token: response count and latest created_at across the current and previous
+        # periods (served by the brand_id + created_at index). Any newly synced response changes it.
+        from app.db.models import Response as ResponseModel
+        window_start_ts = start_ts - timedelta(days=(end_dt - start_dt).days + 1)
+        freshness = db.execute(
+            select(func.count(ResponseModel.id), func.max(ResponseModel.created_at)).where(
+                and_(
+                    ResponseModel.brand_id == actual_brand_id,
+                    ResponseModel.created_at >= window_start_ts,
+                    ResponseModel.created_at <= end_ts
+                )
+            )
+        ).one()
+        cache_key = (client_id, actual_brand_id, start_date, end_date, freshness[0], freshness[1])
+        etag = '"' + hashlib.md5(
+            repr((brand_id, _scrunch_dashboard_cache.version(brand_id)) + cache_key).encode()
+        ).hexdigest() + '"'
+        
+        cached = _scrunch_dashboard_cache.get(brand_id, cache_key)
+        if cached is not None:
+            if request is None:
+                return dict(cached)
+            if request.headers.get("if-none-match") == etag:
+                return FastAPIResponse(status_code=304, headers={"ETag": etag})
+            return ORJSONResponse(content=cached, headers={"ETag": etag})
+        
         # Import the Scrunch calculation logic from the main endpoint
         # This is a simplified version that only returns Scrunch data
+        scrunch_error = False
         scrunch_kpis = {}
         scrunch_chart_data = {
             "top_performing_prompts": [],
@@ -3593,6 +3786,12 @@ async def get_scrunch_dashboard_data(
             prev_responses_result = db.execute(prev_responses_query)
             prev_responses = [dict(row._mapping) for row in prev_responses_result]
             
+            # Normalize citations to a count once, so the metrics and insights loops stay branch-free
+            for r in responses:
+                r["_n_cit"] = _citation_count(r["citations"])
+            for r in prev_responses:
+                r["_n_cit"] = _citation_count(r["citations"])
+            
             logger.info(f"Found {len(prev_responses)} Scrunch responses for brand {actual_brand_id} in previous period {prev_start} to {prev_end}")
             
             # Get prompts for this brand using SQLAlchemy
@@ -3652,6 +3851,11 @@ async def get_scrunch_dashboard_data(
             # Check if brand has any Scrunch data using SQLAlchemy
             has_any_scrunch_data = len(responses) > 0 or len(prompts) > 0
             
+            # Brand-scoped subsets shared by the KPI, top prompts and insights blocks.
+            # Response rows come from the fixed-column select above, so hot loops index keys directly.
+            brand_rows = [r for r in responses if r["brand_id"] == brand_id]
+            prompt_map = {p["id"]: _with_display_fields(p) for p in prompts if p.get("brand_id") == brand_id and p.get("id")}
+            
             # Import the calculate_scrunch_metrics function logic
             # (We'll use the same logic from the main endpoint)
             # Note: responses_list should already be filtered by brand_id, but we validate for safety
@@ -3675,7 +3879,7 @@ async def get_scrunch_dashboard_data(
                             "prompts_with_brand": 0,
                             "display": "Tracked prompts: 0; brand appeared in 0 of them"
                         },
-                        "citations_by_prompt": {},
+                        "citations_by_prompt": Counter(),
                     }
                 
                 # Initialize all tracking variables
@@ -3688,7 +3892,8 @@ async def get_scrunch_dashboard_data(
                 unique_prompts_with_brand = set()
                 competitor_visibility_count = {}
                 total_responses_with_competitors = 0
-                citations_by_prompt = {}
+                cited_prompt_ids = []  # Aligned with cited_counts; folded into citations_by_prompt after the loop
+                cited_counts = []
                 valid_responses_count = 0
                 brand_position_counts = {"top": 0, "middle": 0, "bottom": 0}  # Initialize brand position tracking
                 
@@ -3701,25 +3906,22 @@ async def get_scrunch_dashboard_data(
                 positive_pattern = re.compile(r'positive', re.IGNORECASE)
                 negative_pattern = re.compile(r'negative', re.IGNORECASE)
                 
-                # Cache for parsed JSON to avoid re-parsing
-                json_cache = {}
-                
                 for r in responses_list:
                     # Filter by brand_id if provided (should already be filtered, but double-check)
                     if brand_id_filter is not None:
-                        if r.get("brand_id") != brand_id_filter:
+                        if r["brand_id"] != brand_id_filter:
                             continue
                     valid_responses_count += 1
                     
-                    prompt_id = r.get("prompt_id")
-                    brand_present = r.get("brand_present", False)
+                    prompt_id = r["prompt_id"]
+                    brand_present = r["brand_present"]
                     
                     # Track prompt counts and platforms (for top 10 calculation)
                     if prompt_id:
                         prompt_counts[prompt_id] = prompt_counts.get(prompt_id, 0) + 1
                         unique_prompts_tracked.add(prompt_id)
                         
-                        platform = r.get("platform")
+                        platform = r["platform"]
                         if platform:
                             if prompt_id not in prompt_platform_map:
                                 prompt_platform_map[prompt_id] = set()
@@ -3734,30 +3936,14 @@ async def get_scrunch_dashboard_data(
                         
                         # Research Analysis: Only count citations when brand is present
                         # This matches Scrunch's methodology - research analysis analyzes where your brand appears
-                        citations = r.get("citations")
-                        citation_count = 0
-                        if citations:
-                            if isinstance(citations, list):
-                                citation_count = len(citations)
-                            elif isinstance(citations, str):
-                                # Check cache first
-                                if citations in json_cache:
-                                    citation_count = json_cache[citations]
-                                else:
-                                    try:
-                                        parsed = json.loads(citations)
-                                        if isinstance(parsed, list):
-                                            citation_count = len(parsed)
-                                            json_cache[citations] = citation_count  # Cache result
-                                    except:
-                                        pass
-                        
+                        citation_count = r["_n_cit"]
                         total_citations += citation_count
                         if prompt_id:
-                            citations_by_prompt[prompt_id] = citations_by_prompt.get(prompt_id, 0) + citation_count
+                            cited_prompt_ids.append(prompt_id)
+                            cited_counts.append(citation_count)
                     
                     # Track competitors (optimized - use list comprehension for speed)
-                    competitors_present = r.get("competitors_present")
+                    competitors_present = r["competitors_present"]
                     if isinstance(competitors_present, list) and len(competitors_present) > 0:
                         total_responses_with_competitors += 1
                         # Use dict comprehension for faster updates
@@ -3766,7 +3952,7 @@ async def get_scrunch_dashboard_data(
                                 competitor_visibility_count[comp] = competitor_visibility_count.get(comp, 0) + 1
                     
                     # Track sentiment (optimized - use pre-compiled regex)
-                    sentiment = r.get("brand_sentiment")
+                    sentiment = r["brand_sentiment"]
                     if sentiment:
                         if positive_pattern.search(sentiment):
                             sentiment_scores["positive"] += 1
@@ -3777,7 +3963,7 @@ async def get_scrunch_dashboard_data(
                     
                     # Track brand position (only when brand is present)
                     if brand_present:
-                        brand_position = r.get("brand_position")
+                        brand_position = r["brand_position"]
                         if brand_position:
                             position_lower = str(brand_position).lower()
                             if "top" in position_lower:
@@ -3790,9 +3976,15 @@ async def get_scrunch_dashboard_data(
                         elif valid_responses_count <= 5:  # Only log first few to avoid spam
                             logger.debug(f"[DEBUG] Response {r.get('id')} has brand_present=True but brand_position is None or empty")
                 
-                # Calculate Top 10 Prompt Percentage (optimized - use sorted once)
-                sorted_prompts = sorted(prompt_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                top10_count = sum(count for _, count in sorted_prompts)
+                # Per-prompt citation totals in one vectorized pass over the collected pairs
+                citations_by_prompt = Counter()
+                if cited_prompt_ids:
+                    unique_pids, inverse = np.unique(np.array(cited_prompt_ids), return_inverse=True)
+                    totals = np.bincount(inverse, weights=cited_counts, minlength=len(unique_pids))
+                    citations_by_prompt.update(dict(zip(unique_pids.tolist(), totals.astype(np.int64).tolist())))
+                
+                # Calculate Top 10 Prompt Percentage
+                top10_count = sum(heapq.nlargest(10, prompt_counts.values()))
                 top10_prompt_percentage = (top10_count / valid_responses_count * 100) if valid_responses_count > 0 else 0
                 
                 # Calculate metrics (100% from source data only)
@@ -3864,7 +4056,7 @@ async def get_scrunch_dashboard_data(
                 # Calculate current period metrics (will be zero if no responses)
                 print(f"[CRITICAL] About to calculate current_metrics with {len(responses)} responses")
                 logger.info(f"[DEBUG] About to calculate current_metrics with {len(responses)} responses")
-                current_metrics = calculate_scrunch_metrics(responses, prompts, brand_id)
+                current_metrics = calculate_scrunch_metrics(brand_rows, prompts)
                 print(f"[CRITICAL] After calculate_scrunch_metrics, brand_position_percentage: {current_metrics.get('brand_position_percentage', 'NOT_FOUND')}")
                 logger.info(f"[DEBUG] current_metrics keys: {list(current_metrics.keys())}")
                 logger.info(f"[DEBUG] current_metrics.brand_position_percentage: {current_metrics.get('brand_position_percentage', 'NOT_FOUND')}")
@@ -3875,7 +4067,7 @@ async def get_scrunch_dashboard_data(
                 logger.info(f"[DEBUG] prev_metrics.brand_position_percentage: {prev_metrics.get('brand_position_percentage', 'NOT_FOUND')}")
                 
                 # Extract citations_by_prompt from current_metrics (already calculated)
-                citations_by_prompt = current_metrics.get("citations_by_prompt", {})
+                citations_by_prompt = current_metrics.get("citations_by_prompt", Counter())
                 
                 def calculate_change(current, previous):
                     if current == 0 and previous == 0:
@@ -4002,143 +4194,15 @@ async def get_scrunch_dashboard_data(
                 logger.info(f"[DEBUG] scrunch_kpis keys after adding brand_position_percentage: {list(scrunch_kpis.keys())}")
                 logger.info(f"[DEBUG] brand_position_percentage in scrunch_kpis: {'brand_position_percentage' in scrunch_kpis}")
                 
-                # Get top performing prompts (optimized - use data already calculated in metrics)
-                top_prompts_start = time.time()
-                # Build prompt lookup map for quick access
-                prompt_map = {p.get("id"): p for p in prompts if p.get("brand_id") == brand_id and p.get("id")}
-                
-                # Extract prompt counts and platform variants from responses (single pass)
-                prompt_response_counts = {}
-                prompt_variants = {}
-                total_responses_for_brand = len([r for r in responses if r.get("brand_id") == brand_id])
-                
-                for r in responses:
-                    if r.get("brand_id") != brand_id:
-                        continue
-                    prompt_id = r.get("prompt_id")
-                    if prompt_id and prompt_id in prompt_map:
-                        prompt_response_counts[prompt_id] = prompt_response_counts.get(prompt_id, 0) + 1
-                        platform = r.get("platform")
-                        if platform:
-                            if prompt_id not in prompt_variants:
-                                prompt_variants[prompt_id] = set()
-                            prompt_variants[prompt_id].add(platform)
-                
-                # Sort and build top performing prompts
-                top_prompts = sorted(prompt_response_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                top_performing_prompts = []
-                for idx, (prompt_id, count) in enumerate(top_prompts, 1):
-                    prompt = prompt_map.get(prompt_id)
-                    if prompt:
-                        unique_variants = len(prompt_variants.get(prompt_id, set()))
-                        variants_count = unique_variants if unique_variants > 0 else 1
-                        
-                        top_performing_prompts.append({
-                            "id": prompt_id,
-                            "text": prompt.get("text", "N/A"),
-                            "rank": idx,
-                            "responseCount": count,
-                            "variants": variants_count,
-                            "citations": citations_by_prompt.get(prompt_id, 0),
-                            "totalResponsesForBrand": total_responses_for_brand
-                        })
-                
-                scrunch_chart_data["top_performing_prompts"] = top_performing_prompts
-                
-                # Calculate Scrunch AI Insights (optimized - single pass through responses)
-                insights_start = time.time()
-                if prompts and responses:
-                    # Build prompt lookup map
-                    prompt_map_insights = {p.get("id"): p for p in prompts if p.get("brand_id") == brand_id and p.get("id")}
-                    
-                    # Single pass through responses to build insights data
-                    prompt_insights_data = {}
-                    import json
-                    for r in responses:
-                        if r.get("brand_id") != brand_id:
-                            continue
-                        prompt_id = r.get("prompt_id")
-                        if not prompt_id or prompt_id not in prompt_map_insights:
-                            continue
-                        
-                        if prompt_id not in prompt_insights_data:
-                            prompt_insights_data[prompt_id] = {
-                                "response_count": 0,
-                                "presence_count": 0,
-                                "variants": set(),
-                                "citations": 0,
-                                "competitors": set()
-                            }
-                        
-                        data = prompt_insights_data[prompt_id]
-                        data["response_count"] += 1
-                        if r.get("brand_present"):
-                            data["presence_count"] += 1
-                        
-                        platform = r.get("platform")
-                        if platform:
-                            data["variants"].add(platform)
-                        
-                        # Count citations (reuse JSON parsing logic)
-                        citations = r.get("citations")
-                        if citations:
-                            if isinstance(citations, list):
-                                data["citations"] += len(citations)
-                            elif isinstance(citations, str):
-                                try:
-                                    parsed = json.loads(citations)
-                                    if isinstance(parsed, list):
-                                        data["citations"] += len(parsed)
-                                except:
-                                    pass
-                        
-                        # Track competitors
-                        competitors_present = r.get("competitors_present", [])
-                        if isinstance(competitors_present, list):
-                            for comp in competitors_present:
-                                if comp:
-                                    data["competitors"].add(comp)
-                    
-                    # Build insights list
-                    insights = []
-                    for prompt_id, data in prompt_insights_data.items():
-                        if data["response_count"] > 0:
-                            prompt = prompt_map_insights[prompt_id]
-                            presence = (data["presence_count"] / data["response_count"] * 100) if data["response_count"] > 0 else 0
-                            
-                            # Get category
-                            category = (
-                                prompt.get("topics", [None])[0] if prompt.get("topics") else None
-                            ) or (
-                                (prompt.get("text") or prompt.get("prompt_text") or "").split(" ")[:3]
-                            ) or prompt.get("stage") or "General"
-                            
-                            if isinstance(category, list):
-                                category = " ".join(category)
-                            
-                            insights.append({
-                                "id": prompt_id,
-                                "seedPrompt": prompt.get("text") or prompt.get("prompt_text") or "N/A",
-                                "stage": prompt.get("stage") or "Unknown",
-                                "variants": len(data["variants"]) or 1,
-                                "responses": data["response_count"],
-                                "presence": round(presence, 1),
-                                "presenceChange": 0,
-                                "citations": data["citations"],
-                                "citationsChange": 0,
-                                "competitors": len(data["competitors"]),
-                                "competitorsChange": 0,
-                                "category": category
-                            })
-                    
-                    # Sort and limit
-                    insights.sort(key=lambda x: x["responses"], reverse=True)
-                    scrunch_chart_data["scrunch_ai_insights"] = insights[:20]
+                # Top performing prompts and insights share the same brand-scoped rows and prompt map
+                scrunch_chart_data["top_performing_prompts"] = _compute_top_prompts(brand_rows, prompt_map, citations_by_prompt)
+                scrunch_chart_data["scrunch_ai_insights"] = _compute_insights(brand_rows, prompt_map)
                 
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
             logger.error(f"Error fetching Scrunch AI KPIs for brand {brand_id}: {str(e)}\n{error_trace}")
+            scrunch_error = True
             # Debug: Log what scrunch_kpis contains when exception occurs
             logger.error(f"[DEBUG] scrunch_kpis at exception time: {scrunch_kpis}")
             logger.error(f"[DEBUG] scrunch_kpis keys: {list(scrunch_kpis.keys()) if scrunch_kpis else 'None'}")
@@ -4148,13 +4212,19 @@ async def get_scrunch_dashboard_data(
         logger.info(f"[DEBUG] FINAL: scrunch_kpis keys: {list(scrunch_kpis.keys())}")
         logger.info(f"[DEBUG] FINAL: brand_position_percentage in return: {'brand_position_percentage' in scrunch_kpis}")
         
-        return {
+        result = {
             "brand_id": brand_id,
             "kpis": scrunch_kpis,
             "chart_data": scrunch_chart_data,
             "prompts": prompts,  # Include prompts in response
             "available": bool(scrunch_kpis)
         }
+        # Don't cache partial payloads from a failed calculation
+        if not scrunch_error:
+            _scrunch_dashboard_cache.set(brand_id, cache_key, result)
+        if request is None:
+            return dict(result)
+        return ORJSONResponse(content=result, headers={"ETag": etag})
         
     except HTTPException:
         raise
@@ -4364,6 +4434,8 @@ async def save_client_kpi_selections(
         )
         
         updated_version = result.get("version", 1)
+        if result.get("brand_id"):
+            _scrunch_dashboard_cache.bump_version(result["brand_id"])
         
         logger.info(f"Saved KPI selections for client {client_id}: {len(request.selected_kpis)} KPIs, {len(visible_sections)} sections, {len(selected_charts)} charts, version={updated_version}")
         
@@ -4415,71 +4487,50 @@ async def save_brand_kpi_selections(
         if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        # Get current KPI selection record to check version
-        existing = supabase.get_brand_kpi_selection(brand_id)
-        
-        # Version conflict check (only if version is provided and record exists)
-        if request.version is not None and existing:
-            current_version = existing.get("version", 1)
-            if request.version != current_version:
-                raise HTTPException(
-                    status_code=409,
-                    detail={
-                        "error": "conflict",
-                        "message": "Resource was modified by another user. Please refresh and try again.",
-                        "current_version": current_version,
-                        "current_data": {
-                            "selected_kpis": existing.get("selected_kpis", []),
-                            "visible_sections": existing.get("visible_sections", []),
-                            "last_modified_by": existing.get("last_modified_by")
-                        }
-                    }
-                )
-        
-        # Prepare visible_sections
-        visible_sections = request.visible_sections
-        if visible_sections is None:
-            # If not provided, keep existing sections or use default
-            if existing and existing.get("visible_sections"):
-                visible_sections = existing["visible_sections"]
-            else:
-                visible_sections = ["ga4", "scrunch_ai", "brand_analytics", "advanced_analytics", "performance_metrics"]
-        
-        # Prepare selected_charts
-        selected_charts = request.selected_charts
-        if selected_charts is None:
-            # If not provided, keep existing charts or use empty array
-            if existing and existing.get("selected_charts") is not None:
-                selected_charts = existing["selected_charts"]
-            else:
-                selected_charts = []
-        
-        # Upsert KPI selections using SQLAlchemy
+        # Upsert with the optimistic version check in a single round trip; sections/charts
+        # left as None keep their stored values
         result = supabase.upsert_brand_kpi_selection(
             brand_id=brand_id,
             selected_kpis=request.selected_kpis,
-            visible_sections=visible_sections,
-            selected_charts=selected_charts,
+            visible_sections=request.visible_sections,
+            selected_charts=request.selected_charts,
             version=request.version,
             last_modified_by=current_user.get("email")
         )
         
+        # Version conflict: only now read the current record to report it
+        if result is None:
+            existing = supabase.get_brand_kpi_selection(brand_id) or {}
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "error": "conflict",
+                    "message": "Resource was modified by another user. Please refresh and try again.",
+                    "current_version": existing.get("version", 1),
+                    "current_data": {
+                        "selected_kpis": existing.get("selected_kpis", []),
+                        "visible_sections": existing.get("visible_sections", []),
+                        "last_modified_by": existing.get("last_modified_by")
+                    }
+                }
+            )
+        
+        visible_sections = result["visible_sections"]
+        selected_charts = result["selected_charts"]
         updated_version = result.get("version", 1)
+        _scrunch_dashboard_cache.bump_version(brand_id)
         
         logger.info(f"Saved KPI selections for brand {brand_id}: {len(request.selected_kpis)} KPIs, {len(visible_sections)} sections, {len(selected_charts)} charts, version={updated_version}")
         
-        # Broadcast WebSocket notification
-        try:
-            await websocket_manager.notify_resource_updated(
-                resource_type="kpi_selection",
-                resource_id=brand_id,
-                updated_by=current_user.get("email"),
-                updated_at=datetime.utcnow().isoformat() + "Z",
-                version=updated_version,
-                exclude_user_id=current_user.get("id")
-            )
-        except Exception as ws_error:
-            logger.warning(f"Failed to send WebSocket notification: {str(ws_error)}")
+        # Broadcast WebSocket notification in the background; the response doesn't wait on the fan-out
+        websocket_manager.schedule_resource_updated(
+            resource_type="kpi_selection",
+            resource_id=brand_id,
+            updated_by=current_user.get("email"),
+            updated_at=datetime.utcnow().isoformat() + "Z",
+            version=updated_version,
+            exclude_user_id=current_user.get("id")
+        )
         
         return {
             "brand_id": brand_id,
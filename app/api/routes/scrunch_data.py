@@ -1,13 +1,22 @@
 from fastapi import APIRouter, Query, HTTPException, Depends, Request
 from typing import Optional, List, Dict, Any
 import logging
-from datetime import datetime, timedelta, date as date_type, timezone
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import chain
+from operator import attrgetter, itemgetter
+from functools import lru_cache
+import orjson
+import asyncio
+from datetime import datetime, timedelta, date as date_type, time as time_type, timezone
 from app.services.supabase_service import SupabaseService
 from app.core.error_utils import handle_api_errors
 from app.api.auth_v2 import get_current_user_v2
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, AsyncSessionLocal
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_, or_, update, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, or_, update, case, desc
+from sqlalchemy.dialects.postgresql import array_agg, aggregate_order_by
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -459,150 +468,86 @@ async def query_scrunch_analytics(
 
 
 # Helper functions for prompts analytics
-def calculate_presence_metrics(responses):
-    """Calculate presence percentage and time series data"""
-    if not responses:
-        return {
-            "presence_percentage": 0,
-            "sparkline_data": []
-        }
-    
-    total_responses = len(responses)
-    brand_present_count = sum(1 for r in responses if r.get("brand_present", False))
-    presence_percentage = (brand_present_count / total_responses * 100) if total_responses > 0 else 0
-    
-    # Generate sparkline data (group by week)
-    sparkline_data = {}
-    for response in responses:
-        created_at = response.get("created_at")
-        if created_at:
-            try:
-                date_obj = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                week_key = date_obj.strftime("%Y-W%W")
-                if week_key not in sparkline_data:
-                    sparkline_data[week_key] = {"total": 0, "present": 0}
-                sparkline_data[week_key]["total"] += 1
-                if response.get("brand_present", False):
-                    sparkline_data[week_key]["present"] += 1
-            except:
-                pass
-    
-    # Convert to sorted list
-    sorted_weeks = sorted(sparkline_data.keys())
-    sparkline_list = []
-    for week in sorted_weeks:
-        week_data = sparkline_data[week]
-        week_presence = (week_data["present"] / week_data["total"] * 100) if week_data["total"] > 0 else 0
-        sparkline_list.append(week_presence)
-    
-    return {
-        "presence_percentage": round(presence_percentage, 1),
-        "sparkline_data": sparkline_list
-    }
+def _week_key(created_at):
+    """(ISO year, ISO week) of a response timestamp; rows carry datetimes, older payloads ISO strings"""
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    return created_at.isocalendar()[:2]
 
-def calculate_citation_metrics(responses):
-    """Calculate citation counts and time series data"""
-    if not responses:
-        return {
-            "total_citations": 0,
-            "sparkline_data": []
-        }
-    
-    import json
+@lru_cache(maxsize=8192)
+def _parse_citation_count(citations: str) -> int:
+    """Length of a JSON-encoded citations array (0 if it isn't one); cached across requests"""
+    # Only arrays count, so anything else is skipped without parsing
+    if not citations.lstrip().startswith("["):
+        return 0
+    try:
+        parsed = orjson.loads(citations)
+    except orjson.JSONDecodeError:
+        return 0
+    return len(parsed) if isinstance(parsed, list) else 0
+
+def _citation_count(citations) -> int:
+    """Number of citations on a response (a list, or a JSON string from older rows)"""
+    if not citations:
+        return 0
+    if isinstance(citations, list):
+        return len(citations)
+    if isinstance(citations, str):
+        return _parse_citation_count(citations)
+    return 0
+
+def calculate_response_metrics(responses, with_sparklines: bool = True):
+    """
+    Presence percentage and citation total of a set of response rows, plus weekly sparklines.
+
+    Both metrics come out of one pass that works out each response's week once; pass
+    with_sparklines=False (e.g. for the previous period) to skip the week bucketing entirely.
+    """
+    total_responses = len(responses)
+    brand_present_count = 0
     total_citations = 0
-    json_cache = {}
     
+    # Per (ISO year, week): responses, responses with the brand present, citations
+    weeks = defaultdict(lambda: [0, 0, 0])
     for response in responses:
-        citations = response.get("citations")
-        if citations:
-            if isinstance(citations, list):
-                citation_count = len(citations)
-            elif isinstance(citations, str):
-                if citations in json_cache:
-                    citation_count = json_cache[citations]
-                else:
-                    try:
-                        parsed = json.loads(citations)
-                        citation_count = len(parsed) if isinstance(parsed, list) else 0
-                        json_cache[citations] = citation_count
-                    except:
-                        citation_count = 0
-            else:
-                citation_count = 0
-        else:
-            citation_count = 0
+        brand_present = bool(response.brand_present)
+        citation_count = _citation_count(response.citations)
+        brand_present_count += brand_present
         total_citations += citation_count
-    
-    # Generate sparkline data (group by week)
-    sparkline_data = {}
-    for response in responses:
-        created_at = response.get("created_at")
-        citations = response.get("citations")
+        if not with_sparklines:
+            continue
+        created_at = response.created_at
         if created_at:
             try:
-                date_obj = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                week_key = date_obj.strftime("%Y-W%W")
-                if week_key not in sparkline_data:
-                    sparkline_data[week_key] = 0
-                
-                if citations:
-                    if isinstance(citations, list):
-                        citation_count = len(citations)
-                    elif isinstance(citations, str):
-                        if citations in json_cache:
-                            citation_count = json_cache[citations]
-                        else:
-                            try:
-                                parsed = json.loads(citations)
-                                citation_count = len(parsed) if isinstance(parsed, list) else 0
-                                json_cache[citations] = citation_count
-                            except:
-                                citation_count = 0
-                    else:
-                        citation_count = 0
-                else:
-                    citation_count = 0
-                
-                sparkline_data[week_key] += citation_count
-            except:
-                pass
+                week = weeks[_week_key(created_at)]
+            except (ValueError, AttributeError):
+                continue
+            week[0] += 1
+            week[1] += brand_present
+            week[2] += citation_count
     
-    # Convert to sorted list
-    sorted_weeks = sorted(sparkline_data.keys())
-    sparkline_list = [sparkline_data[week] for week in sorted_weeks]
+    presence_percentage = (brand_present_count / total_responses * 100) if total_responses > 0 else 0
+    sorted_weeks = [weeks[week_key] for week_key in sorted(weeks)]
     
     return {
+        "presence_percentage": round(presence_percentage, 1),
+        "presence_sparkline": [present / total * 100 for total, present, _ in sorted_weeks],
         "total_citations": total_citations,
-        "sparkline_data": sparkline_list
+        "citations_sparkline": [citations for _, _, citations in sorted_weeks]
     }
 
-def extract_competitors(responses):
-    """Aggregate and rank competitors with percentages"""
-    if not responses:
-        return []
-    
-    competitors_count = {}
-    total_responses_with_competitors = 0
-    
-    for response in responses:
-        competitors_present = response.get("competitors_present", [])
-        if competitors_present:
-            total_responses_with_competitors += 1
-            for comp in competitors_present:
-                if comp:
-                    competitors_count[comp] = competitors_count.get(comp, 0) + 1
-    
-    # Calculate percentages
+def rank_competitors(competitors_count: Counter, responses_with_competitors: int):
+    """Top 10 competitors by mentions, with their share of the responses that named any competitor"""
     competitors_list = []
-    for comp_name, count in sorted(competitors_count.items(), key=lambda x: x[1], reverse=True):
-        percentage = (count / total_responses_with_competitors * 100) if total_responses_with_competitors > 0 else 0
+    for comp_name, count in nlargest(10, competitors_count.items(), key=itemgetter(1)):
+        percentage = (count / responses_with_competitors * 100) if responses_with_competitors > 0 else 0
         competitors_list.append({
             "name": comp_name,
             "count": count,
             "percentage": round(percentage, 1)
         })
     
-    return competitors_list[:10]  # Top 10
+    return competitors_list
 
 def calculate_period_change(current_metrics, previous_metrics):
     """Calculate percentage change between periods"""
@@ -615,6 +560,227 @@ def calculate_period_change(current_metrics, previous_metrics):
     change = ((current_metrics - previous_metrics) / previous_metrics) * 100
     return round(change, 1)
 
+# Dimensions that only depend on prompt columns, so grouping, counting, search and pagination run
+# in SQL. prompt_variants also splits by response platform/persona and is grouped in Python.
+_SQL_PROMPT_GROUPINGS = ("tags", "topics", "stage", "seed_prompts")
+
+
+# Response columns read by the metric helpers and the prompt_variants grouping; competitor
+# names are counted in SQL (see _competitor_counts), so rows only say whether there were any
+_ANALYTICS_RESPONSE_COLUMNS = ("prompt_id", "platform", "persona_name", "brand_present", "created_at", "citations")
+
+
+async def _indexed_response_rows(db: AsyncSession, conditions, key) -> Dict[Any, List]:
+    """
+    Stream the analytics columns of the responses matching conditions, bucketed by key(row).
+
+    Rows are kept as SQLAlchemy Rows and read by attribute; no conditions means no rows.
+    """
+    from app.db.models import Response
+
+    index = defaultdict(list)
+    if conditions is None:
+        return index
+    stmt = (
+        select(
+            *(getattr(Response, column) for column in _ANALYTICS_RESPONSE_COLUMNS),
+            (func.cardinality(Response.competitors_present) > 0).label("has_competitors")
+        )
+        .where(and_(*conditions))
+        .execution_options(yield_per=2000)
+    )
+    async for row in await db.stream(stmt):
+        index[key(row)].append(row)
+    return index
+
+
+async def _prompts_by_text(db: AsyncSession, conditions) -> Dict[str, List]:
+    """Stream (id, text, stage) of the matching prompts, grouped by non-empty text"""
+    from app.db.models import Prompt
+
+    stmt = (
+        select(Prompt.id, Prompt.text, Prompt.stage)
+        .where(and_(*conditions))
+        .execution_options(yield_per=2000)
+    )
+    prompts_by_text = defaultdict(list)
+    async for prompt in await db.stream(stmt):
+        if prompt.text:
+            prompts_by_text[prompt.text].append(prompt)
+    return prompts_by_text
+
+
+def _response_variant_key(r) -> tuple:
+    """(prompt_id, platform, persona) with a missing platform or persona normalized to unknown"""
+    platform = r.platform if r.platform is not None else "unknown"
+    persona = r.persona_name if r.persona_name is not None else "unknown"
+    return r.prompt_id, platform, persona
+
+
+async def _competitor_counts(db: AsyncSession, conditions, key_columns) -> Dict[tuple, Counter]:
+    """
+    Mentions per competitor name in the responses matching conditions, keyed by the values of
+    key_columns (labelled Response expressions) so each group can add up its own keys.
+
+    The unnest and counting run in Postgres; empty names are skipped.
+    """
+    from app.db.models import Response
+
+    mentions = (
+        select(*key_columns, func.unnest(Response.competitors_present).label("competitor"))
+        .where(and_(*conditions))
+        .subquery("competitor_mentions")
+    )
+    keys = [mentions.c[column.name] for column in key_columns]
+    stmt = (
+        select(*keys, mentions.c.competitor, func.count().label("mentions"))
+        .where(mentions.c.competitor != "")
+        .group_by(*keys, mentions.c.competitor)
+        .order_by(*keys, mentions.c.competitor)
+    )
+    counts = defaultdict(Counter)
+    for row in await db.execute(stmt):
+        counts[tuple(row[:-2])][row.competitor] = row.mentions
+    return counts
+
+
+def _merged_competitor_counts(counts: Dict[tuple, Counter], keys) -> Counter:
+    """Add up the per-key competitor mentions of a group"""
+    merged = Counter()
+    for key in keys:
+        merged.update(counts.get(key, ()))
+    return merged
+
+
+async def _sql_prompt_groups(db: AsyncSession, group_by: str, prompts_conditions, responses_conditions,
+                       search: Optional[str], limit: Optional[int], offset: Optional[int]):
+    """
+    Group prompts by tag, topic, stage or text in SQL and return (page rows, total group count).
+
+    Each row carries key, prompt_ids, prompts_count, responses_count (responses in the period)
+    and the stage of the group's first prompt; rows are ordered by responses_count descending.
+    """
+    from app.db.models import Prompt, Response
+
+    if group_by in ("tags", "topics"):
+        key = func.unnest(getattr(Prompt, group_by))
+    elif group_by == "stage":
+        key = func.coalesce(func.nullif(Prompt.stage, ""), "Other")
+    else:
+        key = Prompt.text
+    prompt_keys = (
+        select(Prompt.id.label("prompt_id"), key.label("key"), Prompt.stage.label("stage"))
+        .where(and_(*prompts_conditions))
+        .subquery("prompt_keys")
+    )
+    # One row per (prompt, group): empty keys are skipped and a tag repeated on a prompt counts once
+    members = (
+        select(prompt_keys.c.prompt_id, prompt_keys.c.key, prompt_keys.c.stage)
+        .where(prompt_keys.c.key.is_not(None), prompt_keys.c.key != "")
+        .distinct()
+        .subquery("group_members")
+    )
+    period_responses = (
+        select(Response.id, Response.prompt_id)
+        .where(and_(*responses_conditions))
+        .subquery("period_responses")
+    )
+
+    groups = (
+        select(
+            members.c.key,
+            func.array_agg(members.c.prompt_id.distinct()).label("prompt_ids"),
+            func.count(members.c.prompt_id.distinct()).label("prompts_count"),
+            func.count(period_responses.c.id).label("responses_count"),
+            array_agg(aggregate_order_by(members.c.stage, members.c.prompt_id))[1].label("stage")
+        )
+        .select_from(members.outerjoin(period_responses, period_responses.c.prompt_id == members.c.prompt_id))
+        .group_by(members.c.key)
+    )
+    if search and search.strip():
+        groups = groups.where(func.strpos(func.lower(members.c.key), search.strip().lower()) > 0)
+
+    # The group total rides along on each page row; only a page past the end needs a count query.
+    # Negative offset/limit are clamped to 0 (Postgres rejects them).
+    offset = max(offset or 0, 0)
+    page = (
+        groups.add_columns(func.count().over().label("total_count"))
+        .order_by(desc("responses_count"), members.c.key)
+        .offset(offset)
+    )
+    if limit:
+        page = page.limit(max(limit, 0))
+    rows = (await db.execute(page)).all()
+    if rows:
+        total_count = rows[0].total_count
+    elif offset:
+        total_count = await db.scalar(select(func.count()).select_from(groups.subquery()))
+    else:
+        total_count = 0
+    return rows, total_count
+
+
+def _prompt_group_item(group_key: str, display_key: str, prompts_count: int, stage: Optional[str],
+                       group_responses: List, group_prev_responses: List, competitors_count: Counter) -> Dict[str, Any]:
+    """Build one prompts-analytics row from a group's responses in this and the previous period"""
+    logger.debug(f"Calculating metrics for group_key={group_key}: {len(group_responses)} responses, {len(group_prev_responses)} prev responses")
+    metrics = calculate_response_metrics(group_responses)
+    competitors = rank_competitors(competitors_count, sum(1 for r in group_responses if r.has_competitors))
+
+    # Only the totals of the previous period are needed for the change columns
+    prev_metrics = calculate_response_metrics(group_prev_responses, with_sparklines=False)
+
+    return {
+        "key": group_key,
+        "display_name": display_key,
+        "prompts_count": prompts_count,
+        "responses_count": len(group_responses),
+        "presence_percentage": metrics["presence_percentage"],
+        "presence_sparkline": metrics["presence_sparkline"],
+        "presence_change": calculate_period_change(
+            metrics["presence_percentage"],
+            prev_metrics["presence_percentage"]
+        ),
+        "citations_count": metrics["total_citations"],
+        "citations_sparkline": metrics["citations_sparkline"],
+        "citations_change": calculate_period_change(
+            metrics["total_citations"],
+            prev_metrics["total_citations"]
+        ),
+        "competitors": competitors,
+        "stage": stage
+    }
+
+
+def _resolve_analytics_brand_id(supabase: SupabaseService, client_id: Optional[int], slug: Optional[str]) -> Optional[int]:
+    """
+    Brand id for a client id or slug (client slug first, then brand slug); 404 for an unknown client_id.
+
+    Lookups go through the short-lived client cache, which client writes invalidate, since the
+    analytics pages call this with the same client on every request.
+    """
+    if client_id:
+        client = supabase.get_client_by_id(client_id, use_cache=True)
+        if not client:
+            logger.debug(f"Client not found for client_id: {client_id}")
+            raise HTTPException(status_code=404, detail="Client not found")
+        # Prefer scrunch_brand_id; fallback to client.id so we still return data when mapping is missing
+        brand_id = client.get("scrunch_brand_id") or client.get("id")
+        logger.debug(f"Resolved brand_id={brand_id} from client_id={client_id} (scrunch_brand_id={client.get('scrunch_brand_id')})")
+        return brand_id
+    if slug:
+        client = supabase.get_client_by_slug(slug, use_cache=True)
+        if client:
+            brand_id = client.get("scrunch_brand_id") or client.get("id")
+            logger.debug(f"Resolved brand_id={brand_id} from client slug={slug} (client_id={client.get('id')})")
+            return brand_id
+        brand = supabase.get_brand_by_slug(slug, use_cache=True)
+        if brand:
+            logger.debug(f"Resolved brand_id={brand['id']} from brand slug={slug}")
+            return brand["id"]
+        logger.debug(f"No client or brand found for slug: {slug}")
+    return None
+
 
 @router.get("/data/prompts-analytics")
 @handle_api_errors(context="fetching prompts analytics")
@@ -627,49 +793,22 @@ async def get_prompts_analytics(
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     limit: Optional[int] = Query(50, description="Number of records to return"),
     offset: Optional[int] = Query(0, description="Offset for pagination"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get aggregated prompts and responses analytics by different dimensions"""
+    """
+    Get aggregated prompts and responses analytics by different dimensions.
+
+    Runs on an AsyncSession so the independent prompt/response queries can run concurrently
+    (each on its own session, since an AsyncSession runs one statement at a time).
+    """
     try:
         logger.debug(f"get_prompts_analytics called with: group_by={group_by}, client_id={client_id}, slug={slug}, "
                     f"search={search}, start_date={start_date}, end_date={end_date}, limit={limit}, offset={offset}")
         
-        supabase = SupabaseService(db=db)
-        brand_id = None
-        resolved_client_id = None
-        
-        # Resolve brand_id from client_id or slug using SQLAlchemy
-        if client_id:
-            logger.debug(f"Resolving brand_id from client_id: {client_id}")
-            client = supabase.get_client_by_id(client_id)
-            if not client:
-                logger.debug(f"Client not found for client_id: {client_id}")
-                raise HTTPException(status_code=404, detail="Client not found")
-            resolved_client_id = client_id
-            # Prefer scrunch_brand_id; fallback to client.id so we still return data when mapping is missing
-            brand_id = client.get("scrunch_brand_id") or client.get("id")
-            logger.debug(f"Resolved brand_id={brand_id} from client_id={client_id} (scrunch_brand_id={client.get('scrunch_brand_id')})")
-        elif slug:
-            logger.debug(f"Resolving brand_id from slug: {slug}")
-            # Try client by slug first
-            client = supabase.get_client_by_slug(slug)
-            if client:
-                resolved_client_id = client.get("id")
-                brand_id = client.get("scrunch_brand_id") or client.get("id")
-                logger.debug(f"Resolved brand_id={brand_id} from client slug={slug} (client_id={resolved_client_id})")
-            else:
-                # Fall back to brand by slug using SQLAlchemy
-                brand = supabase.get_brand_by_slug(slug)
-                if brand:
-                    brand_id = brand["id"]
-                    logger.debug(f"Resolved brand_id={brand_id} from brand slug={slug}")
-                else:
-                    logger.debug(f"No client or brand found for slug: {slug}")
-                    return {
-                        "items": [],
-                        "count": 0,
-                        "total_count": 0
-                    }
+        # The client/brand lookups are the cached sync service methods, run on this session's connection
+        brand_id = await db.run_sync(
+            lambda session: _resolve_analytics_brand_id(SupabaseService(db=session), client_id, slug)
+        )
         
         if not brand_id:
             logger.debug("No brand_id resolved, returning empty result")
@@ -684,17 +823,21 @@ async def get_prompts_analytics(
         # Get prompts and responses using SQLAlchemy
         from app.db.models import Prompt, Response
         
+        # UTC bounds of the requested days, parsed once and shared by every query below
+        start_dt_utc = datetime.combine(date_type.fromisoformat(start_date), time_type.min, tzinfo=timezone.utc) if start_date else None
+        end_dt_utc = datetime.combine(date_type.fromisoformat(end_date), time_type(23, 59, 59), tzinfo=timezone.utc) if end_date else None
+        
         # CORRECT FIX: Get responses first to find which prompts have responses in the date range
         # Then include prompts that either were created in range OR have responses in range
         responses_conditions = [Response.brand_id == brand_id]
-        if start_date:
-            responses_conditions.append(Response.created_at >= datetime.fromisoformat(f"{start_date}T00:00:00+00:00"))
-        if end_date:
-            responses_conditions.append(Response.created_at <= datetime.fromisoformat(f"{end_date}T23:59:59+00:00"))
+        if start_dt_utc:
+            responses_conditions.append(Response.created_at >= start_dt_utc)
+        if end_dt_utc:
+            responses_conditions.append(Response.created_at <= end_dt_utc)
         
         # Get prompt_ids from responses in the date range
         responses_query_temp = select(Response.prompt_id).where(and_(*responses_conditions)).distinct()
-        responses_temp_result = db.scalars(responses_query_temp).all()
+        responses_temp_result = (await db.scalars(responses_query_temp)).all()
         prompt_ids_from_responses = set([pid for pid in responses_temp_result if pid is not None])
         logger.debug(f"Found {len(prompt_ids_from_responses)} unique prompt_ids from responses in date range")
         
@@ -704,10 +847,10 @@ async def get_prompts_analytics(
         prompts_conditions = [Prompt.brand_id == brand_id]
         if prompt_ids_from_responses:
             date_conditions = []
-            if start_date:
-                date_conditions.append(Prompt.created_at >= datetime.fromisoformat(f"{start_date}T00:00:00+00:00"))
-            if end_date:
-                date_conditions.append(Prompt.created_at <= datetime.fromisoformat(f"{end_date}T23:59:59+00:00"))
+            if start_dt_utc:
+                date_conditions.append(Prompt.created_at >= start_dt_utc)
+            if end_dt_utc:
+                date_conditions.append(Prompt.created_at <= end_dt_utc)
             
             if date_conditions:
                 prompts_conditions.append(
@@ -720,355 +863,130 @@ async def get_prompts_analytics(
                 prompts_conditions.append(Prompt.id.in_(list(prompt_ids_from_responses)))
         else:
             # No responses, so only get prompts created in date range
-            if start_date:
-                prompts_conditions.append(Prompt.created_at >= datetime.fromisoformat(f"{start_date}T00:00:00+00:00"))
-            if end_date:
-                prompts_conditions.append(Prompt.created_at <= datetime.fromisoformat(f"{end_date}T23:59:59+00:00"))
-        
-        prompts_query = select(Prompt).where(and_(*prompts_conditions))
-        prompts_result = db.scalars(prompts_query).all()
-        # Convert ORM objects to dicts
-        prompts = [
-            {
-                "id": p.id,
-                "brand_id": p.brand_id,
-                "text": p.text,
-                "stage": p.stage,
-                "persona_id": p.persona_id,
-                "persona_name": p.persona_name,
-                "platforms": p.platforms,
-                "tags": p.tags,
-                "topics": p.topics,
-                "created_at": p.created_at
-            }
-            for p in prompts_result
-        ]
-        logger.debug(f"Fetched {len(prompts)} prompts for brand_id={brand_id}")
-        
-        # Debug: Check sample prompt structure
-        if prompts:
-            sample_prompt = prompts[0]
-            logger.debug(f"Sample prompt keys: {list(sample_prompt.keys())}")
-            logger.debug(f"Sample prompt text value: {repr(sample_prompt.get('text', 'NOT_FOUND'))}")
-            logger.debug(f"Sample prompt text type: {type(sample_prompt.get('text'))}")
-            # Count prompts with text
-            prompts_with_text = sum(1 for p in prompts if p.get("text"))
-            logger.debug(f"Prompts with non-empty text: {prompts_with_text} out of {len(prompts)}")
-        
-        responses_conditions = [Response.brand_id == brand_id]
-        if start_date:
-            responses_conditions.append(Response.created_at >= datetime.fromisoformat(f"{start_date}T00:00:00+00:00"))
-        if end_date:
-            responses_conditions.append(Response.created_at <= datetime.fromisoformat(f"{end_date}T23:59:59+00:00"))
-        
-        responses_query = select(Response).where(and_(*responses_conditions))
-        responses_result = db.scalars(responses_query).all()
-        # Convert ORM objects to dicts
-        responses = [
-            {
-                "id": r.id,
-                "brand_id": r.brand_id,
-                "prompt_id": r.prompt_id,
-                "prompt": r.prompt,
-                "response_text": r.response_text,
-                "platform": r.platform,
-                "country": r.country,
-                "persona_id": r.persona_id,
-                "persona_name": r.persona_name,
-                "stage": r.stage,
-                "branded": r.branded,
-                "tags": r.tags,
-                "key_topics": r.key_topics,
-                "brand_present": r.brand_present,
-                "brand_sentiment": r.brand_sentiment,
-                "brand_position": r.brand_position,
-                "competitors_present": r.competitors_present,
-                "competitors": r.competitors,
-                "created_at": r.created_at,
-                "citations": r.citations
-            }
-            for r in responses_result
-        ]
-        logger.debug(f"Fetched {len(responses)} responses for brand_id={brand_id}")
-        
-        # Get previous period data for change calculation
-        prev_responses = []
-        if start_date and end_date:
-            try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                period_duration = (end_dt - start_dt).days + 1
-                prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
-                
-                logger.debug(f"Fetching previous period data: prev_start={prev_start}, prev_end={prev_end} (period_duration={period_duration} days)")
-                
-                prev_responses_query = select(Response).where(
-                    and_(
-                        Response.brand_id == brand_id,
-                        Response.created_at >= datetime.fromisoformat(f"{prev_start}T00:00:00+00:00"),
-                        Response.created_at <= datetime.fromisoformat(f"{prev_end}T23:59:59+00:00")
-                    )
-                )
-                prev_responses_result = db.scalars(prev_responses_query).all()
-                # Convert ORM objects to dicts
-                prev_responses = [
-                    {
-                        "id": r.id,
-                        "brand_id": r.brand_id,
-                        "prompt_id": r.prompt_id,
-                        "prompt": r.prompt,
-                        "response_text": r.response_text,
-                        "platform": r.platform,
-                        "country": r.country,
-                        "persona_id": r.persona_id,
-                        "persona_name": r.persona_name,
-                        "stage": r.stage,
-                        "branded": r.branded,
-                        "tags": r.tags,
-                        "key_topics": r.key_topics,
-                        "brand_present": r.brand_present,
-                        "brand_sentiment": r.brand_sentiment,
-                        "brand_position": r.brand_position,
-                        "competitors_present": r.competitors_present,
-                        "competitors": r.competitors,
-                        "created_at": r.created_at,
-                        "citations": r.citations
-                    }
-                    for r in prev_responses_result
-                ]
-                logger.debug(f"Fetched {len(prev_responses)} previous period responses")
-            except Exception as e:
-                logger.debug(f"Error fetching previous period data: {str(e)}")
-                pass
-        
-        # Group data based on group_by parameter
-        grouped_data = {}
-        logger.debug(f"Grouping data by: {group_by}")
-        
-        if group_by == "tags":
-            # Group by tags
-            for prompt in prompts:
-                tags = prompt.get("tags", []) or []
-                for tag in tags:
-                    if tag:
-                        if tag not in grouped_data:
-                            grouped_data[tag] = {"prompts": [], "prompt_ids": set()}
-                        if prompt["id"] not in grouped_data[tag]["prompt_ids"]:
-                            grouped_data[tag]["prompts"].append(prompt)
-                            grouped_data[tag]["prompt_ids"].add(prompt["id"])
-        
-        elif group_by == "topics":
-            # Group by topics
-            for prompt in prompts:
-                topics = prompt.get("topics", []) or []
-                for topic in topics:
-                    if topic:
-                        if topic not in grouped_data:
-                            grouped_data[topic] = {"prompts": [], "prompt_ids": set()}
-                        if prompt["id"] not in grouped_data[topic]["prompt_ids"]:
-                            grouped_data[topic]["prompts"].append(prompt)
-                            grouped_data[topic]["prompt_ids"].add(prompt["id"])
-        
-        elif group_by == "prompt_variants":
-            # Group by prompt text + platform + persona
-            # First, collect all unique prompt texts and their prompt IDs
-            logger.debug(f"Starting prompt_variants grouping with {len(prompts)} prompts and {len(responses)} responses")
-            
-            # Build a map of prompt_text -> list of prompt_ids with that text
-            prompt_text_to_ids = {}
-            for prompt in prompts:
-                prompt_text = prompt.get("text", "")
-                prompt_id = prompt.get("id")
-                if prompt_text:
-                    if prompt_text not in prompt_text_to_ids:
-                        prompt_text_to_ids[prompt_text] = []
-                    prompt_text_to_ids[prompt_text].append(prompt_id)
+            if start_dt_utc:
+                prompts_conditions.append(Prompt.created_at >= start_dt_utc)
+            if end_dt_utc:
+                prompts_conditions.append(Prompt.created_at <= end_dt_utc)
+        
+        # Previous period of the same length, for the change columns
+        prev_responses_conditions = None
+        if start_dt_utc and end_dt_utc:
+            period_duration = (end_dt_utc.date() - start_dt_utc.date()).days + 1
+            prev_start_dt = start_dt_utc - timedelta(days=period_duration)
+            prev_end_dt = start_dt_utc - timedelta(seconds=1)
+            logger.debug(f"Previous period: {prev_start_dt.isoformat()} to {prev_end_dt.isoformat()} (period_duration={period_duration} days)")
+            prev_responses_conditions = [
+                Response.brand_id == brand_id,
+                Response.created_at >= prev_start_dt,
+                Response.created_at <= prev_end_dt
+            ]
+        
+        if group_by in _SQL_PROMPT_GROUPINGS:
+            groups, total_count = await _sql_prompt_groups(
+                db, group_by, prompts_conditions, responses_conditions, search, limit, offset
+            )
+            logger.debug(f"SQL grouping by {group_by}: {total_count} groups, {len(groups)} on this page")
             
-            logger.debug(f"Found {len(prompt_text_to_ids)} unique prompt texts")
+            # Only the responses of prompts on this page are needed for the metrics
+            page_prompt_ids = {prompt_id for group in groups for prompt_id in group.prompt_ids}
+            responses_by_prompt, prev_responses_by_prompt, competitors_by_prompt = {}, {}, {}
+            if page_prompt_ids:
+                page_conditions = responses_conditions + [Response.prompt_id.in_(page_prompt_ids)]
+                async with AsyncSessionLocal() as prev_db, AsyncSessionLocal() as competitors_db:
+                    responses_by_prompt, prev_responses_by_prompt, competitors_by_prompt = await asyncio.gather(
+                        _indexed_response_rows(db, page_conditions, attrgetter("prompt_id")),
+                        _indexed_response_rows(
+                            prev_db,
+                            prev_responses_conditions + [Response.prompt_id.in_(page_prompt_ids)] if prev_responses_conditions else None,
+                            attrgetter("prompt_id")
+                        ),
+                        _competitor_counts(competitors_db, page_conditions, [Response.prompt_id.label("prompt_id")])
+                    )
             
-            # Now group responses by prompt_text + platform + persona
-            # This ensures all prompts with the same text are grouped together
-            for prompt_text, prompt_ids in prompt_text_to_ids.items():
-                # Get all responses for any prompt with this text
-                text_responses = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                
-                if not text_responses:
-                    # If no responses, still create a variant
-                    key = f"{prompt_text}|||unknown|||unknown"
-                    if key not in grouped_data:
-                        # Find all prompts with this text
-                        matching_prompts = [p for p in prompts if p.get("text") == prompt_text]
-                        grouped_data[key] = {"prompts": matching_prompts, "prompt_ids": set(prompt_ids)}
-                else:
-                    # Group by platform + persona combinations
-                    variant_map = {}
-                    for resp in text_responses:
-                        # Normalize None values to "unknown" for consistent grouping
-                        platform = resp.get("platform") if resp.get("platform") is not None else "unknown"
-                        persona = resp.get("persona_name") if resp.get("persona_name") is not None else "unknown"
-                        variant_key = f"{prompt_text}|||{platform}|||{persona}"
-                        if variant_key not in variant_map:
-                            variant_map[variant_key] = []
-                        variant_map[variant_key].append(resp)
-                    
-                    # Create groups for each variant
-                    for variant_key in variant_map:
-                        if variant_key not in grouped_data:
-                            # Find all prompts with this text
-                            matching_prompts = [p for p in prompts if p.get("text") == prompt_text]
-                            grouped_data[variant_key] = {"prompts": matching_prompts, "prompt_ids": set(prompt_ids)}
+            items = []
+            for group in groups:
+                items.append(_prompt_group_item(
+                    group.key, group.key, group.prompts_count, group.stage,
+                    list(chain.from_iterable(responses_by_prompt.get(pid, ()) for pid in group.prompt_ids)),
+                    list(chain.from_iterable(prev_responses_by_prompt.get(pid, ()) for pid in group.prompt_ids)),
+                    _merged_competitor_counts(competitors_by_prompt, ((pid,) for pid in group.prompt_ids))
+                ))
             
-            total_responses_in_groups = sum(len([r for r in responses if r.get("prompt_id") in group_info["prompt_ids"]]) for group_info in grouped_data.values())
-            logger.debug(f"prompt_variants grouping complete: created {len(grouped_data)} groups, total responses in groups: {total_responses_in_groups}")
-        
-        elif group_by == "stage":
-            # Group by stage
-            for prompt in prompts:
-                stage = prompt.get("stage") or "Other"
-                if stage not in grouped_data:
-                    grouped_data[stage] = {"prompts": [], "prompt_ids": set()}
-                if prompt["id"] not in grouped_data[stage]["prompt_ids"]:
-                    grouped_data[stage]["prompts"].append(prompt)
-                    grouped_data[stage]["prompt_ids"].add(prompt["id"])
-        
-        elif group_by == "seed_prompts":
-            # Group by unique prompt text
-            logger.debug(f"Starting seed_prompts grouping with {len(prompts)} prompts")
-            prompts_without_text = 0
-            for prompt in prompts:
-                prompt_text = prompt.get("text", "")
-                if not prompt_text:
-                    prompts_without_text += 1
-                    logger.debug(f"Prompt id={prompt.get('id')} has empty text field")
-                if prompt_text:
-                    if prompt_text not in grouped_data:
-                        grouped_data[prompt_text] = {"prompts": [], "prompt_ids": set()}
-                    if prompt["id"] not in grouped_data[prompt_text]["prompt_ids"]:
-                        grouped_data[prompt_text]["prompts"].append(prompt)
-                        grouped_data[prompt_text]["prompt_ids"].add(prompt["id"])
-            logger.debug(f"seed_prompts grouping complete: {len(grouped_data)} groups created, {prompts_without_text} prompts without text")
+            return {
+                "items": items,
+                "count": len(items),
+                "total_count": total_count,
+                "group_by": group_by
+            }
         
-        else:
+        if group_by != "prompt_variants":
             raise HTTPException(status_code=400, detail=f"Invalid group_by parameter: {group_by}")
         
-        logger.debug(f"Grouped data into {len(grouped_data)} groups")
+        # Both periods' responses (indexed by (prompt_id, platform, persona) instead of rescanning
+        # them per group) and competitor mentions are independent, so they are fetched
+        # concurrently; the variant columns are normalized the same way as _response_variant_key.
+        # Prompts are read first on the request's session so the fan-out needs only two extra
+        # connections (see the async_engine pool settings)
+        prompts_by_text = await _prompts_by_text(db, prompts_conditions)
+        variant_columns = [
+            Response.prompt_id.label("prompt_id"),
+            func.coalesce(Response.platform, "unknown").label("platform"),
+            func.coalesce(Response.persona_name, "unknown").label("persona")
+        ]
+        async with AsyncSessionLocal() as prev_db, AsyncSessionLocal() as competitors_db:
+            responses_by_variant, prev_responses_by_variant, competitors_by_variant = await asyncio.gather(
+                _indexed_response_rows(db, responses_conditions, _response_variant_key),
+                _indexed_response_rows(prev_db, prev_responses_conditions, _response_variant_key),
+                _competitor_counts(competitors_db, responses_conditions, variant_columns)
+            )
+        logger.debug(f"Fetched {len(prompts_by_text)} unique prompt texts and {len(responses_by_variant)} response variants for brand_id={brand_id}")
+        variants_by_prompt = defaultdict(dict)
+        for prompt_id, platform, persona in responses_by_variant:
+            variants_by_prompt[prompt_id][(platform, persona)] = None
         
-        # Calculate metrics for each group
+        # Group by prompt text + platform + persona, so all prompts with the same text are grouped together
+        grouped_data = {}
+        for prompt_text, text_prompts in prompts_by_text.items():
+            prompt_ids = list(dict.fromkeys(p.id for p in text_prompts))
+            variants = dict.fromkeys(chain.from_iterable(variants_by_prompt.get(pid, ()) for pid in prompt_ids))
+            # If no responses, still create a variant
+            for platform, persona in variants or [("unknown", "unknown")]:
+                grouped_data[f"{prompt_text}|||{platform}|||{persona}"] = {
+                    "prompts": text_prompts,
+                    "prompt_ids": prompt_ids,
+                    "prompt_text": prompt_text,
+                    "platform": platform,
+                    "persona": persona
+                }
+        logger.debug(f"prompt_variants grouping complete: created {len(grouped_data)} groups")
+        
+        # Calculate metrics for each variant
         items = []
         for group_key, group_info in grouped_data.items():
-            prompt_ids = list(group_info["prompt_ids"]) if isinstance(group_info["prompt_ids"], set) else [p["id"] for p in group_info["prompts"]]
-            
-            # For prompt_variants, filter responses by platform and persona
-            if group_by == "prompt_variants":
-                parts = group_key.split("|||")
-                if len(parts) >= 3:
-                    prompt_text, platform, persona = parts[0], parts[1], parts[2]
-                    
-                    # Debug: Check how many responses match prompt_ids before platform/persona filtering
-                    responses_matching_prompt_ids = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                    logger.debug(f"prompt_variants pre-filter: group_key={group_key[:50]}..., prompt_ids={prompt_ids[:5] if len(prompt_ids) > 5 else prompt_ids} (showing first 5), {len(responses_matching_prompt_ids)} responses match prompt_ids")
-                    
-                    # Filter responses - normalize None values to "unknown" for comparison (same as grouping)
-                    group_responses = [
-                        r for r in responses 
-                        if r.get("prompt_id") in prompt_ids 
-                        and (r.get("platform") if r.get("platform") is not None else "unknown") == platform
-                        and (r.get("persona_name") if r.get("persona_name") is not None else "unknown") == persona
-                    ]
-                    group_prev_responses = [
-                        r for r in prev_responses 
-                        if r.get("prompt_id") in prompt_ids 
-                        and (r.get("platform") if r.get("platform") is not None else "unknown") == platform
-                        and (r.get("persona_name") if r.get("persona_name") is not None else "unknown") == persona
-                    ]
-                    logger.debug(f"prompt_variants filtering: platform={platform}, persona={persona}, found {len(group_responses)} responses after platform/persona filter")
-                else:
-                    group_responses = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                    group_prev_responses = [r for r in prev_responses if r.get("prompt_id") in prompt_ids]
-                    logger.debug(f"prompt_variants filtering (invalid key format): prompt_ids={prompt_ids}, found {len(group_responses)} responses")
-            else:
-                group_responses = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                group_prev_responses = [r for r in prev_responses if r.get("prompt_id") in prompt_ids]
+            prompt_text, platform, persona = group_info["prompt_text"], group_info["platform"], group_info["persona"]
             
-            # Apply search filter if provided
+            # Search in prompt text, platform, or persona
             if search and search.strip():
                 search_lower = search.strip().lower()
-                if group_by == "prompt_variants":
-                    # Search in prompt text, platform, or persona
-                    parts = group_key.split("|||")
-                    if len(parts) >= 3:
-                        prompt_text, platform, persona = parts[0], parts[1], parts[2]
-                        if search_lower not in prompt_text.lower() and search_lower not in platform.lower() and search_lower not in persona.lower():
-                            logger.debug(f"Skipping group_key={group_key} (doesn't match search: {search})")
-                            continue
-                else:
-                    if search_lower not in group_key.lower():
-                        logger.debug(f"Skipping group_key={group_key} (doesn't match search: {search})")
-                        continue
+                if search_lower not in prompt_text.lower() and search_lower not in platform.lower() and search_lower not in persona.lower():
+                    logger.debug(f"Skipping group_key={group_key} (doesn't match search: {search})")
+                    continue
             
-            # Calculate metrics
-            logger.debug(f"Calculating metrics for group_key={group_key}: {len(group_responses)} responses, {len(group_prev_responses)} prev responses")
-            presence_metrics = calculate_presence_metrics(group_responses)
-            citation_metrics = calculate_citation_metrics(group_responses)
-            competitors = extract_competitors(group_responses)
+            variant_keys = [(pid, platform, persona) for pid in group_info["prompt_ids"]]
+            group_responses = list(chain.from_iterable(responses_by_variant.get(k, ()) for k in variant_keys))
+            group_prev_responses = list(chain.from_iterable(prev_responses_by_variant.get(k, ()) for k in variant_keys))
+            logger.debug(f"prompt_variants filtering: platform={platform}, persona={persona}, found {len(group_responses)} responses after platform/persona filter")
             
-            # Calculate previous period metrics for change
-            prev_presence_metrics = calculate_presence_metrics(group_prev_responses)
-            prev_citation_metrics = calculate_citation_metrics(group_prev_responses)
-            
-            presence_change = calculate_period_change(
-                presence_metrics["presence_percentage"],
-                prev_presence_metrics["presence_percentage"]
-            )
-            citation_change = calculate_period_change(
-                citation_metrics["total_citations"],
-                prev_citation_metrics["total_citations"]
+            item = _prompt_group_item(
+                group_key, prompt_text, len(group_info["prompts"]),
+                group_info["prompts"][0].stage,
+                group_responses, group_prev_responses,
+                _merged_competitor_counts(competitors_by_variant, variant_keys)
             )
-            
-            # Format group key for display
-            display_key = group_key
-            if group_by == "prompt_variants":
-                parts = group_key.split("|||")
-                if len(parts) >= 3:
-                    display_key = parts[0]  # Just the prompt text
-                    platform = parts[1]
-                    persona = parts[2]
-                else:
-                    platform = "unknown"
-                    persona = "unknown"
-            else:
-                platform = None
-                persona = None
-            
-            item = {
-                "key": group_key,
-                "display_name": display_key,
-                "prompts_count": len(group_info["prompts"]),
-                "responses_count": len(group_responses),
-                "presence_percentage": presence_metrics["presence_percentage"],
-                "presence_sparkline": presence_metrics["sparkline_data"],
-                "presence_change": presence_change,
-                "citations_count": citation_metrics["total_citations"],
-                "citations_sparkline": citation_metrics["sparkline_data"],
-                "citations_change": citation_change,
-                "competitors": competitors,
-                "stage": group_info["prompts"][0].get("stage") if group_info["prompts"] else None
-            }
-            
-            if group_by == "prompt_variants":
-                item["platform"] = platform
-                item["persona"] = persona
-            
+            item["platform"] = platform
+            item["persona"] = persona
             items.append(item)
         
-        # Apply search filter for non-variant groups (already filtered above for variants)
-        if search and search.strip() and group_by != "prompt_variants":
-            search_lower = search.strip().lower()
-            items_before_search = len(items)
-            items = [item for item in items if search_lower in item["display_name"].lower()]
-            logger.debug(f"Applied search filter: {items_before_search} -> {len(items)} items")
-        
         # Sort by responses count descending
         items.sort(key=lambda x: x["responses_count"], reverse=True)
         logger.debug(f"Sorted {len(items)} items by responses_count")
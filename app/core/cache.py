@@ -0,0 +1,62 @@
+"""
+In-process response caching utilities
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire after a fixed TTL.
+
+    Entries are scoped (e.g. per brand) and every scope carries a version number that
+    is part of the lookup key, so bumping the version invalidates all of a scope's
+    entries without scanning the cache.
+
+    All operations are synchronous and never await, so a single instance can be shared
+    safely between concurrent requests on the event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._versions: Dict[Hashable, int] = {}
+
+    def version(self, scope: Hashable) -> int:
+        """Current version for a scope (0 until first bumped)"""
+        return self._versions.get(scope, 0)
+
+    def bump_version(self, scope: Hashable) -> int:
+        """Invalidate every entry cached under a scope"""
+        self._versions[scope] = self._versions.get(scope, 0) + 1
+        return self._versions[scope]
+
+    def get(self, scope: Hashable, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        full_key = (scope, self.version(scope), key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[full_key]
+            return None
+        self._entries.move_to_end(full_key)
+        return value
+
+    def set(self, scope: Hashable, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        full_key = (scope, self.version(scope), key)
+        self._entries[full_key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
@@ -7,6 +7,7 @@ logger = logging.getLogger(__name__)
 
 supabase: Client = None
 supabase_service_role: Client = None
+storage_http_client: httpx.AsyncClient = None
 
 def get_supabase_client() -> Client:
     """
@@ -75,6 +76,26 @@ def get_supabase_service_role_client() -> Client:
         logger.info("Supabase service role client initialized for storage operations")
     return supabase_service_role
 
+def get_storage_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared async HTTP client for Supabase Storage REST calls.
+    
+    Reusing one client keeps a keep-alive connection pool to Storage instead of paying a
+    TCP/TLS handshake on every upload. Closed by close_storage_http_client() on shutdown.
+    """
+    global storage_http_client
+    if storage_http_client is None:
+        storage_http_client = httpx.AsyncClient(timeout=60.0)
+        logger.info("Storage HTTP client initialized")
+    return storage_http_client
+
+async def close_storage_http_client():
+    """Close the shared Storage HTTP client, if it was created"""
+    global storage_http_client
+    if storage_http_client is not None:
+        await storage_http_client.aclose()
+        storage_http_client = None
+
 def init_db():
     """
     Initialize database tables if they don't exist.
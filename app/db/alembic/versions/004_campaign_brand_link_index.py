@@ -0,0 +1,57 @@
+"""ensure unique (brand_id, campaign_id) index on agency_analytics_campaign_brands
+
+Revision ID: 004_campaign_brand_link_index
+Revises: 003_add_attached_link_ids
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004_campaign_brand_link_index'
+down_revision = '003_add_attached_link_ids'
+branch_labels = None
+depends_on = None
+
+
+# Only builds ix_aacb_brand_campaign when no unique index on the pair exists yet
+# (tables created from the v4 SQL migration already have UNIQUE(campaign_id, brand_id)).
+ENSURE_UNIQUE_LINK_INDEX = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        WHERE i.indrelid = 'agency_analytics_campaign_brands'::regclass
+          AND i.indisunique
+          AND i.indnatts = 2
+          AND (
+              SELECT array_agg(a.attname::text ORDER BY a.attname)
+              FROM pg_attribute a
+              WHERE a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)
+          ) = ARRAY['brand_id', 'campaign_id']
+    ) THEN
+        -- Remove duplicate links first (keep the oldest) so the unique index can be built
+        DELETE FROM agency_analytics_campaign_brands a
+        USING agency_analytics_campaign_brands b
+        WHERE a.brand_id = b.brand_id
+          AND a.campaign_id = b.campaign_id
+          AND a.id > b.id;
+
+        CREATE UNIQUE INDEX ix_aacb_brand_campaign ON agency_analytics_campaign_brands (brand_id, campaign_id);
+    END IF;
+END
+$$;
+"""
+
+
+def upgrade():
+    op.execute(ENSURE_UNIQUE_LINK_INDEX)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_aa_campaign_brands_campaign_id "
+        "ON agency_analytics_campaign_brands (campaign_id)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_aacb_brand_campaign")
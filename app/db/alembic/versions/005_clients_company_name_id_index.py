@@ -0,0 +1,25 @@
+"""add (company_name, id) index on clients for keyset pagination
+
+Revision ID: 005_clients_company_name_id_index
+Revises: 004_campaign_brand_link_index
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005_clients_company_name_id_index'
+down_revision = '004_campaign_brand_link_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_clients_company_name_id "
+        "ON clients (company_name, id)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_clients_company_name_id")
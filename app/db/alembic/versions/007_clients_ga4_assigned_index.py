@@ -0,0 +1,27 @@
+"""add partial index on clients for the GA4-assigned filter
+
+Revision ID: 007_clients_ga4_assigned_index
+Revises: 005_clients_company_name_id_index
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007_clients_ga4_assigned_index'
+down_revision = '005_clients_company_name_id_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Predicate matches the NULLIF(ga4_property_id, '') IS NOT NULL filter in GET /data/clients
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_clients_ga4_assigned "
+        "ON clients (company_name, id) "
+        "WHERE NULLIF(ga4_property_id, '') IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_clients_ga4_assigned")
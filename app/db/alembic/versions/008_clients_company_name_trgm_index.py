@@ -0,0 +1,28 @@
+"""add pg_trgm GIN index on clients.company_name for ILIKE search
+
+Revision ID: 008_clients_company_name_trgm_index
+Revises: 007_clients_ga4_assigned_index
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '008_clients_company_name_trgm_index'
+down_revision = '007_clients_ga4_assigned_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves company_name ILIKE '%term%' in GET /data/clients (a b-tree can't with a leading wildcard)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_clients_company_name_trgm "
+        "ON clients USING gin (company_name gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    # The extension is left installed; other objects may depend on it
+    op.execute("DROP INDEX IF EXISTS idx_clients_company_name_trgm")
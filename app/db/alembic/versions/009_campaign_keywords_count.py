@@ -0,0 +1,106 @@
+"""add trigger-maintained keywords_count to agency_analytics_campaigns
+
+Revision ID: 009_campaign_keywords_count
+Revises: 008_clients_company_name_trgm_index
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009_campaign_keywords_count'
+down_revision = '008_clients_company_name_trgm_index'
+branch_labels = None
+depends_on = None
+
+
+# Statement-level triggers with transition tables: keyword syncs upsert up to 1000 rows per
+# statement, so each statement applies one grouped UPDATE instead of a +1/-1 per row
+TRIGGER_FUNCTIONS = {
+    "insert": (
+        "NEW TABLE AS new_rows",
+        """
+        UPDATE agency_analytics_campaigns c
+        SET keywords_count = c.keywords_count + n.cnt
+        FROM (SELECT campaign_id, COUNT(*) AS cnt FROM new_rows GROUP BY campaign_id) n
+        WHERE c.id = n.campaign_id;
+        """,
+    ),
+    "delete": (
+        "OLD TABLE AS old_rows",
+        """
+        UPDATE agency_analytics_campaigns c
+        SET keywords_count = GREATEST(c.keywords_count - o.cnt, 0)
+        FROM (SELECT campaign_id, COUNT(*) AS cnt FROM old_rows GROUP BY campaign_id) o
+        WHERE c.id = o.campaign_id;
+        """,
+    ),
+    # Upserts can move a keyword to another campaign
+    "update": (
+        "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        """
+        UPDATE agency_analytics_campaigns c
+        SET keywords_count = GREATEST(c.keywords_count + d.delta, 0)
+        FROM (
+            SELECT campaign_id, SUM(delta) AS delta
+            FROM (
+                SELECT o.campaign_id, -1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.campaign_id IS DISTINCT FROM n.campaign_id
+                UNION ALL
+                SELECT n.campaign_id, 1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.campaign_id IS DISTINCT FROM n.campaign_id
+            ) moves
+            GROUP BY campaign_id
+        ) d
+        WHERE c.id = d.campaign_id;
+        """,
+    ),
+}
+
+
+def upgrade():
+    op.execute(
+        "ALTER TABLE agency_analytics_campaigns "
+        "ADD COLUMN IF NOT EXISTS keywords_count INTEGER NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        """
+        UPDATE agency_analytics_campaigns c
+        SET keywords_count = k.cnt
+        FROM (
+            SELECT campaign_id, COUNT(*) AS cnt
+            FROM agency_analytics_keywords
+            GROUP BY campaign_id
+        ) k
+        WHERE k.campaign_id = c.id
+        """
+    )
+
+    for event, (referencing, body) in TRIGGER_FUNCTIONS.items():
+        op.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION campaign_keywords_count_after_{event}()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                {body}
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS trg_campaign_keywords_count_{event} ON agency_analytics_keywords")
+        op.execute(
+            f"CREATE TRIGGER trg_campaign_keywords_count_{event} "
+            f"AFTER {event.upper()} ON agency_analytics_keywords "
+            f"REFERENCING {referencing} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION campaign_keywords_count_after_{event}()"
+        )
+
+
+def downgrade():
+    for event in TRIGGER_FUNCTIONS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_campaign_keywords_count_{event} ON agency_analytics_keywords")
+        op.execute(f"DROP FUNCTION IF EXISTS campaign_keywords_count_after_{event}()")
+    op.execute("ALTER TABLE agency_analytics_campaigns DROP COLUMN IF EXISTS keywords_count")
@@ -0,0 +1,33 @@
+"""add indexes for the client keywords filters and ranking lookups
+
+Revision ID: 010_keyword_filter_indexes
+Revises: 009_campaign_keywords_count
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010_keyword_filter_indexes'
+down_revision = '009_campaign_keywords_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # campaign_id IN (...) plus the optional primary/country filters; INCLUDE covers region/language
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_aa_keywords_campaign_filter "
+        "ON agency_analytics_keywords (campaign_id, primary_keyword, search_location_country_code) "
+        "INCLUDE (search_language, search_location_region_name)"
+    )
+    # Per-keyword ranking lookups within a date range (latest ranking, rollups, histograms)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_aa_keyword_rankings_keyword_date "
+        "ON agency_analytics_keyword_rankings (keyword_id, date)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_aa_keyword_rankings_keyword_date")
+    op.execute("DROP INDEX IF EXISTS idx_aa_keywords_campaign_filter")
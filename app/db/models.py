@@ -602,6 +602,7 @@ class AgencyAnalyticsCampaign(Base):
     campaign_group_id = Column(BigInteger, nullable=True)  # Changed to BIGINT after migration
     company_id = Column(BigInteger, nullable=True)  # Changed to BIGINT after migration
     account_id = Column(BigInteger, nullable=True)  # Changed to BIGINT after migration
+    keywords_count = Column(Integer, nullable=False, default=0, server_default="0")  # Maintained by triggers on agency_analytics_keywords
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -636,6 +637,9 @@ class AgencyAnalyticsCampaignRanking(Base):
 class AgencyAnalyticsCampaignBrand(Base):
     """Agency Analytics Campaign-Brand Links model"""
     __tablename__ = "agency_analytics_campaign_brands"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "brand_id"),  # Prevent duplicate links (ON CONFLICT target)
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     campaign_id = Column(BigInteger, ForeignKey("agency_analytics_campaigns.id", ondelete="CASCADE"), nullable=False, index=True)  # Changed to BIGINT
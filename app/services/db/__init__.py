@@ -3,5 +3,6 @@ from .scrunch import ScrunchDBMixin
 from .ga4 import GA4DBMixin
 from .agency_analytics import AgencyAnalyticsDBMixin
 from .clients import ClientDBMixin
+from .brands_async import AsyncBrandDB
 
-__all__ = ["BaseDB", "ScrunchDBMixin", "GA4DBMixin", "AgencyAnalyticsDBMixin", "ClientDBMixin"]
+__all__ = ["BaseDB", "ScrunchDBMixin", "GA4DBMixin", "AgencyAnalyticsDBMixin", "ClientDBMixin", "AsyncBrandDB"]
@@ -14,6 +14,11 @@ from datetime import datetime, timedelta, date
 
 logger = logging.getLogger(__name__)
 
+# Reflected tables shared by every service instance, keyed by (engine, table name), so each
+# table is reflected once per process instead of once per request. Schema changes made while
+# the app is running need a restart to be picked up.
+_reflected_tables: Dict[tuple, Table] = {}
+
 
 class BaseDB:
     """Base database class with constructor and all private helpers"""
@@ -31,7 +36,6 @@ class BaseDB:
             self.db = db
             self._close_db = False
         self._supabase_client = None  # Lazy-loaded for backward compatibility
-        self._table_cache = {}  # Cache table metadata to avoid repeated reflection
 
     @property
     def client(self):
@@ -65,13 +69,15 @@ class BaseDB:
         return self.db.execute(text(query), params or {})
 
     def _get_table(self, table_name: str) -> Table:
-        """Get table object using reflection (with caching for performance)"""
-        # Use cache to avoid repeated reflection
-        if table_name not in self._table_cache:
+        """Get table object using reflection (cached per engine for the life of the process)"""
+        bind = self.db.get_bind()
+        key = (bind.engine, table_name)
+        table = _reflected_tables.get(key)
+        if table is None:
             metadata = MetaData()
-            metadata.reflect(bind=self.db.bind, only=[table_name])
-            self._table_cache[table_name] = metadata.tables[table_name]
-        return self._table_cache[table_name]
+            metadata.reflect(bind=bind, only=[table_name])
+            table = _reflected_tables.setdefault(key, metadata.tables[table_name])
+        return table
 
     def _table_select(self, table_name: str, filters: Optional[Dict] = None, limit: Optional[int] = None, offset: Optional[int] = None, order_by: Optional[str] = None, desc: bool = False) -> List[Dict]:
         """Helper method to select from any table using SQLAlchemy Core"""
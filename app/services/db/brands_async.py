@@ -0,0 +1,134 @@
+from typing import Dict, Optional
+from sqlalchemy import select, update, case, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Brand
+from app.core.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Short-lived read-through cache for brand rows, scoped per brand id and invalidated by the
+# writes below. It is per process, so writes made elsewhere show up within the TTL.
+_brand_cache = TTLCache(maxsize=1024, ttl=5)
+
+
+class AsyncBrandDB:
+    """Brand database methods for async endpoints (AsyncSession)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _brand_to_dict(brand: Brand) -> Dict:
+        return {
+            "id": brand.id,
+            "name": brand.name,
+            "website": brand.website,
+            "ga4_property_id": brand.ga4_property_id,
+            "created_at": brand.created_at.isoformat() if brand.created_at else None,
+            "version": brand.version,
+            "last_modified_by": brand.last_modified_by,
+            "slug": brand.slug,
+            "logo_url": brand.logo_url,
+            "theme": brand.theme
+        }
+
+    async def get_brand_by_id(self, brand_id: int, use_cache: bool = True) -> Optional[Dict]:
+        """
+        Get a single brand by ID.
+
+        Served from a 5 second cache unless use_cache is False; pass False when the caller needs
+        the current version (e.g. to report a conflict). Fresh reads refresh the cache.
+        """
+        if use_cache:
+            cached = _brand_cache.get(brand_id, "row")
+            if cached is not None:
+                return dict(cached)
+
+        try:
+            result = await self.db.execute(select(Brand).where(Brand.id == brand_id))
+            brand = result.scalars().first()
+            if not brand:
+                return None
+            brand_dict = self._brand_to_dict(brand)
+            _brand_cache.set(brand_id, "row", brand_dict)
+            return dict(brand_dict)
+        except Exception as e:
+            logger.error(f"Error getting brand by ID: {str(e)}")
+            raise
+
+    async def _update_brand(self, brand_id: int, values: Dict, user_email: Optional[str]) -> bool:
+        """Update brand columns and bump the optimistic-locking version"""
+        stmt = (
+            update(Brand.__table__)
+            .where(Brand.__table__.c.id == brand_id)
+            .values(**values, last_modified_by=user_email, version=Brand.__table__.c.version + 1)
+        )
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        _brand_cache.bump_version(brand_id)
+        return result.rowcount > 0
+
+    async def update_brand_logo_url(self, brand_id: int, logo_url: Optional[str], user_email: Optional[str] = None) -> bool:
+        """Update brand logo URL"""
+        try:
+            success = await self._update_brand(brand_id, {"logo_url": logo_url}, user_email)
+            if not success:
+                logger.warning(f"No brand found with ID {brand_id} to update logo URL")
+                return False
+            logger.info(f"Updated brand {brand_id} logo URL")
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating brand logo URL for brand {brand_id}: {str(e)}")
+            return False
+
+    async def _update_brand_cas(self, brand_id: int, expected_version: Optional[int], values: Dict, user_email: Optional[str], returning: tuple) -> Optional[Dict]:
+        """
+        Update brand columns only if the version still matches and return the written row.
+
+        The version check, write and version read happen in one UPDATE ... RETURNING, so
+        None means the brand is missing or (when expected_version is set) was modified.
+        """
+        table = Brand.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == brand_id)
+            .values(**values, last_modified_by=user_email, version=table.c.version + 1)
+            .returning(table.c.version, table.c.last_modified_by, *returning)
+        )
+        if expected_version is not None:
+            stmt = stmt.where(table.c.version == expected_version)
+
+        try:
+            result = await self.db.execute(stmt)
+            row = result.first()
+            await self.db.commit()
+            if row:
+                _brand_cache.bump_version(brand_id)
+            return dict(row._mapping) if row else None
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating brand {brand_id} ({', '.join(values)}): {str(e)}")
+            raise
+
+    async def update_brand_ga4_property_id_cas(self, brand_id: int, expected_version: Optional[int], ga4_property_id: Optional[str], user_email: Optional[str] = None) -> Optional[Dict]:
+        """Compare-and-set the brand GA4 property ID; returns version/ga4_property_id or None"""
+        return await self._update_brand_cas(
+            brand_id, expected_version, {"ga4_property_id": ga4_property_id}, user_email,
+            returning=(Brand.__table__.c.ga4_property_id,)
+        )
+
+    async def merge_brand_theme(self, brand_id: int, theme_patch: Dict, user_email: Optional[str] = None, expected_version: Optional[int] = None) -> Optional[Dict]:
+        """
+        Merge top-level keys into the brand theme in SQL (JSONB ||); returns version/theme or None.
+
+        A stored theme that isn't a JSON object is replaced, matching the old Python merge.
+        """
+        theme = cast(Brand.__table__.c.theme, JSONB)
+        current_theme = case((func.jsonb_typeof(theme) == "object", theme), else_=literal_column("'{}'::jsonb", JSONB))
+        return await self._update_brand_cas(
+            brand_id, expected_version, {"theme": current_theme.op("||")(cast(theme_patch, JSONB))}, user_email,
+            returning=(Brand.__table__.c.theme,)
+        )
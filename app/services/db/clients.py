@@ -1,8 +1,9 @@
 from typing import List, Dict, Optional, Any
-from sqlalchemy import text, Table, MetaData, select, update, insert, delete, and_, or_, func
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import text, Table, MetaData, select, update, insert, delete, and_, or_, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
 from app.db.models import Brand, Prompt, Response
 from app.services.db.base import BaseDB
+from app.core.cache import TTLCache
 import logging
 import uuid
 from urllib.parse import urlparse
@@ -11,6 +12,56 @@ from datetime import datetime, timedelta, date
 logger = logging.getLogger(__name__)
 
 
+# Theme and branding columns on clients, in the order the API returns them
+CLIENT_THEME_FIELDS = (
+    "theme_color",
+    "logo_url",
+    "secondary_color",
+    "font_family",
+    "favicon_url",
+    "report_title",
+    "custom_css",
+    "footer_text",
+    "header_text"
+)
+
+
+def client_campaigns_json(clients_table: Table, client_campaigns_table: Table, campaigns_table: Table):
+    """
+    Correlated subquery that aggregates a client's linked campaigns into a JSON array.
+
+    Elements are the campaign row plus is_primary/link_created_at/link_updated_at (the shape
+    get_client_campaigns returns); clients without campaigns get [].
+    """
+    link_fields = func.jsonb_build_object(
+        literal_column("'is_primary'"), client_campaigns_table.c.is_primary,
+        literal_column("'link_created_at'"), client_campaigns_table.c.created_at,
+        literal_column("'link_updated_at'"), client_campaigns_table.c.updated_at
+    )
+    campaign = func.to_jsonb(campaigns_table.table_valued()).op("||")(link_fields)
+    return (
+        select(func.coalesce(func.jsonb_agg(campaign), literal_column("'[]'::jsonb"), type_=JSONB))
+        .select_from(
+            client_campaigns_table.join(campaigns_table, campaigns_table.c.id == client_campaigns_table.c.campaign_id)
+        )
+        .where(client_campaigns_table.c.client_id == clients_table.c.id)
+        .scalar_subquery()
+    )
+
+
+# Short-lived read-through cache for client rows (scoped per client id) and slug -> id
+# lookups (scoped per slug), used by the public report endpoints. It is per process, so
+# writes made by other workers show up within the TTL.
+_client_cache = TTLCache(maxsize=1024, ttl=30)
+
+
+def invalidate_client_cache(client_id: int, url_slug: Optional[str] = None):
+    """Drop cached data for a client after a write (and for its old slug, if it changed)"""
+    _client_cache.bump_version(client_id)
+    if url_slug:
+        _client_cache.bump_version(("slug", url_slug))
+
+
 class ClientDBMixin(BaseDB):
     """Client, shared query, brand utils, and dashboard link database methods"""
 
@@ -89,14 +140,24 @@ class ClientDBMixin(BaseDB):
             logger.error(f"Error getting brand by ID: {str(e)}")
             raise
 
-    def get_brand_by_slug(self, slug: str) -> Optional[Dict]:
-        """Get a single brand by slug"""
+    def get_brand_by_slug(self, slug: str, use_cache: bool = False) -> Optional[Dict]:
+        """
+        Get a single brand by slug.
+
+        With use_cache, served from the short-lived client cache (brand rows aren't
+        invalidated on write, so they can be up to its TTL stale); fresh reads refresh it.
+        """
+        if use_cache:
+            cached = _client_cache.get(("brand_slug", slug), "row")
+            if cached is not None:
+                return dict(cached)
+
         try:
             brand = self.db.query(Brand).filter(Brand.slug == slug).first()
             if not brand:
                 return None
 
-            return {
+            brand_dict = {
                 "id": brand.id,
                 "name": brand.name,
                 "website": brand.website,
@@ -108,6 +169,8 @@ class ClientDBMixin(BaseDB):
                 "logo_url": getattr(brand, 'logo_url', None),
                 "theme": getattr(brand, 'theme', None)
             }
+            _client_cache.set(("brand_slug", slug), "row", brand_dict)
+            return dict(brand_dict)
         except Exception as e:
             logger.error(f"Error getting brand by slug: {str(e)}")
             raise
@@ -815,51 +878,116 @@ class ClientDBMixin(BaseDB):
             self.db.rollback()
             logger.warning(f"Error linking campaign {campaign_id} to client {client_id}: {str(e)}")
 
-    def get_client_by_slug(self, url_slug: str) -> Optional[Dict]:
-        """Get client by URL slug using SQLAlchemy Core"""
+    def get_client_by_slug(self, url_slug: str, use_cache: bool = False) -> Optional[Dict]:
+        """
+        Get client by URL slug using SQLAlchemy Core.
+
+        With use_cache, the slug -> id lookup and the row come from the short-lived client
+        cache (see get_client_by_id); a cached id whose row no longer has this slug is re-read.
+        """
+        if use_cache:
+            cached_id = _client_cache.get(("slug", url_slug), "id")
+            if cached_id is not None:
+                client = self.get_client_by_id(cached_id, use_cache=True)
+                if client and client.get("url_slug") == url_slug:
+                    return client
+
         try:
             table = self._get_table("clients")
             query = select(table).where(table.c.url_slug == url_slug).limit(1)
             result = self.db.execute(query)
             row = result.first()
             if row:
-                return dict(row._mapping)
+                client = dict(row._mapping)
+                _client_cache.set(("slug", url_slug), "id", client["id"])
+                _client_cache.set(client["id"], "row", client)
+                return dict(client)
             return None
         except Exception as e:
             logger.error(f"Error getting client by slug {url_slug}: {str(e)}")
             return None
 
-    def get_client_by_id(self, client_id: int) -> Optional[Dict]:
-        """Get client by ID using SQLAlchemy Core"""
+    def get_client_by_id(self, client_id: int, use_cache: bool = False) -> Optional[Dict]:
+        """
+        Get client by ID using SQLAlchemy Core.
+
+        With use_cache, served from a 30 second cache that writes made through this class
+        invalidate; leave it off where the current version matters. Fresh reads refresh it.
+        """
+        if use_cache:
+            cached = _client_cache.get(client_id, "row")
+            if cached is not None:
+                return dict(cached)
+
         try:
             table = self._get_table("clients")
             query = select(table).where(table.c.id == client_id).limit(1)
             result = self.db.execute(query)
             row = result.first()
             if row:
-                return dict(row._mapping)
+                client = dict(row._mapping)
+                _client_cache.set(client_id, "row", client)
+                return dict(client)
             return None
         except Exception as e:
             logger.error(f"Error getting client by ID {client_id}: {str(e)}")
             return None
 
-    def update_client_mapping(self, client_id: int, ga4_property_id: Optional[str] = None, scrunch_brand_id: Optional[int] = None, user_email: Optional[str] = None) -> bool:
-        """Update client mappings (GA4 property ID or Scrunch brand ID) using SQLAlchemy Core"""
+    def get_client_with_campaigns(self, client_id: int) -> Optional[Dict]:
+        """Get a client with its linked campaigns (as client_campaigns) in a single query"""
         try:
             table = self._get_table("clients")
+            campaigns_json = client_campaigns_json(
+                table,
+                self._get_table("client_campaigns"),
+                self._get_table("agency_analytics_campaigns")
+            )
+            query = select(table, campaigns_json.label("client_campaigns")).where(table.c.id == client_id)
+            row = self.db.execute(query).first()
+            return dict(row._mapping) if row else None
+        except Exception as e:
+            logger.error(f"Error getting client with campaigns {client_id}: {str(e)}")
+            return None
 
-            # Build update data
-            update_data = {
-                "updated_by": user_email,
-                "last_modified_by": user_email,
-                "updated_at": datetime.now()
-            }
+    @staticmethod
+    def _client_mapping_values(ga4_property_id: Optional[str], scrunch_brand_id: Optional[int], user_email: Optional[str]) -> Dict:
+        """Column values for a mapping update; mappings left as None are not changed"""
+        update_data = {
+            "updated_by": user_email,
+            "last_modified_by": user_email,
+            "updated_at": datetime.now()
+        }
+
+        if ga4_property_id is not None:
+            update_data["ga4_property_id"] = ga4_property_id
+
+        if scrunch_brand_id is not None:
+            update_data["scrunch_brand_id"] = scrunch_brand_id
 
-            if ga4_property_id is not None:
-                update_data["ga4_property_id"] = ga4_property_id
+        return update_data
 
-            if scrunch_brand_id is not None:
-                update_data["scrunch_brand_id"] = scrunch_brand_id
+    @staticmethod
+    def _client_theme_values(theme_data: Dict, user_email: Optional[str]) -> Dict:
+        """Column values for a theme update; None values (including an unknown user) are not changed"""
+        update_data = {
+            "updated_by": user_email,
+            "last_modified_by": user_email,
+            "updated_at": datetime.now()
+        }
+
+        for field in CLIENT_THEME_FIELDS:
+            if field in theme_data:
+                update_data[field] = theme_data[field]
+
+        # Remove None values
+        return {k: v for k, v in update_data.items() if v is not None}
+
+    def update_client_mapping(self, client_id: int, ga4_property_id: Optional[str] = None, scrunch_brand_id: Optional[int] = None, user_email: Optional[str] = None) -> bool:
+        """Update client mappings (GA4 property ID or Scrunch brand ID) using SQLAlchemy Core"""
+        try:
+            table = self._get_table("clients")
+
+            update_data = self._client_mapping_values(ga4_property_id, scrunch_brand_id, user_email)
 
             # Execute update with version increment using SQL expression
             # Add version increment to update_data
@@ -873,6 +1001,8 @@ class ClientDBMixin(BaseDB):
             result = self.db.execute(update_stmt)
             self.db.commit()
 
+            invalidate_client_cache(client_id)
+
             if result.rowcount == 0:
                 logger.warning(f"No client found with ID {client_id} to update mappings")
                 return False
@@ -889,41 +1019,17 @@ class ClientDBMixin(BaseDB):
         try:
             table = self._get_table("clients")
 
-            update_data = {
-                "updated_by": user_email,
-                "last_modified_by": user_email,
-                "updated_at": datetime.now()
-            }
-
-            if "theme_color" in theme_data:
-                update_data["theme_color"] = theme_data["theme_color"]
-            if "logo_url" in theme_data:
-                update_data["logo_url"] = theme_data["logo_url"]
-            if "secondary_color" in theme_data:
-                update_data["secondary_color"] = theme_data["secondary_color"]
-            if "font_family" in theme_data:
-                update_data["font_family"] = theme_data["font_family"]
-            if "favicon_url" in theme_data:
-                update_data["favicon_url"] = theme_data["favicon_url"]
-            if "report_title" in theme_data:
-                update_data["report_title"] = theme_data["report_title"]
-            if "custom_css" in theme_data:
-                update_data["custom_css"] = theme_data["custom_css"]
-            if "footer_text" in theme_data:
-                update_data["footer_text"] = theme_data["footer_text"]
-            if "header_text" in theme_data:
-                update_data["header_text"] = theme_data["header_text"]
+            clean_data = self._client_theme_values(theme_data, user_email)
 
             # Increment version for optimistic locking
-            update_data["version"] = table.c.version + 1
-
-            # Remove None values
-            clean_data = {k: v for k, v in update_data.items() if v is not None}
+            clean_data["version"] = table.c.version + 1
 
             update_stmt = update(table).where(table.c.id == client_id).values(**clean_data)
             result = self.db.execute(update_stmt)
             self.db.commit()
 
+            invalidate_client_cache(client_id)
+
             if result.rowcount == 0:
                 logger.warning(f"No client found with ID {client_id} to update theme")
                 return False
@@ -935,6 +1041,50 @@ class ClientDBMixin(BaseDB):
             logger.error(f"Error updating client theme: {str(e)}")
             return False
 
+    def _update_client_cas(self, client_id: int, expected_version: Optional[int], values: Dict, returning: tuple) -> Optional[Dict]:
+        """
+        Update client columns only if the version still matches and return the written row.
+
+        The version check, write and version read happen in one UPDATE ... RETURNING, so
+        None means the client is missing or (when expected_version is set) was modified.
+        """
+        table = self._get_table("clients")
+        stmt = (
+            update(table)
+            .where(table.c.id == client_id)
+            .values(**values, version=table.c.version + 1)
+            .returning(table.c.version, table.c.last_modified_by, *(table.c[name] for name in returning))
+        )
+        if expected_version is not None:
+            stmt = stmt.where(table.c.version == expected_version)
+
+        try:
+            row = self.db.execute(stmt).first()
+            self.db.commit()
+            if row:
+                invalidate_client_cache(client_id)
+            return dict(row._mapping) if row else None
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error updating client {client_id} ({', '.join(values)}): {str(e)}")
+            raise
+
+    def update_client_mapping_cas(self, client_id: int, expected_version: Optional[int], ga4_property_id: Optional[str] = None, scrunch_brand_id: Optional[int] = None, user_email: Optional[str] = None) -> Optional[Dict]:
+        """Compare-and-set client mappings; returns version/ga4_property_id/scrunch_brand_id or None"""
+        return self._update_client_cas(
+            client_id, expected_version,
+            self._client_mapping_values(ga4_property_id, scrunch_brand_id, user_email),
+            returning=("ga4_property_id", "scrunch_brand_id")
+        )
+
+    def update_client_theme_cas(self, client_id: int, expected_version: Optional[int], theme_data: Dict, user_email: Optional[str] = None) -> Optional[Dict]:
+        """Compare-and-set the client theme; returns version and the theme fields or None"""
+        return self._update_client_cas(
+            client_id, expected_version,
+            self._client_theme_values(theme_data, user_email),
+            returning=CLIENT_THEME_FIELDS
+        )
+
     def update_client_report_dates(self, client_id: int, report_start_date: Optional[date] = None, report_end_date: Optional[date] = None, user_email: Optional[str] = None) -> bool:
         """Update client report date range using SQLAlchemy Core (local PostgreSQL)"""
         try:
@@ -961,6 +1111,8 @@ class ClientDBMixin(BaseDB):
             result = self.db.execute(update_stmt)
             self.db.commit()
 
+            invalidate_client_cache(client_id)
+
             if result.rowcount == 0:
                 logger.warning(f"No client found with ID {client_id} to update report dates")
                 return False
@@ -1985,68 +2137,66 @@ class ClientDBMixin(BaseDB):
         selected_charts: Optional[List[str]] = None,
         version: Optional[int] = None,
         last_modified_by: Optional[str] = None
-    ) -> Dict:
-        """Upsert KPI selection for a brand using SQLAlchemy Core with ON CONFLICT"""
+    ) -> Optional[Dict]:
+        """Upsert KPI selection for a brand in one INSERT ... ON CONFLICT ... RETURNING round trip.
+
+        visible_sections / selected_charts left as None keep the stored values (defaults on insert).
+        When version is provided the update only applies if it matches the stored version;
+        returns None on a version conflict.
+        """
         try:
-            import json
             table = self._get_table("brand_kpi_selections")
 
-            # Prepare data
-            selection_data = {
-                "brand_id": brand_id,
-                "selected_kpis": selected_kpis,
-                "visible_sections": visible_sections or ["ga4", "scrunch_ai", "brand_analytics", "advanced_analytics", "performance_metrics"],
-                "selected_charts": selected_charts or [],
-                "last_modified_by": last_modified_by,
-                "updated_at": datetime.utcnow()
-            }
-
-            # If version is provided, increment it; otherwise set to 1
-            if version is not None:
-                selection_data["version"] = version + 1
-            else:
-                # Check existing version
-                existing_query = select(table.c.version).where(table.c.brand_id == brand_id).limit(1)
-                existing_result = self.db.execute(existing_query)
-                existing_row = existing_result.first()
-                if existing_row:
-                    selection_data["version"] = existing_row.version + 1
-                else:
-                    selection_data["version"] = 1
-
-            # Use PostgreSQL INSERT ... ON CONFLICT for upsert
-            stmt = pg_insert(table).values(**selection_data)
+            stmt = pg_insert(table).values(
+                brand_id=brand_id,
+                selected_kpis=selected_kpis,
+                visible_sections=visible_sections if visible_sections is not None else ["ga4", "scrunch_ai", "brand_analytics", "advanced_analytics", "performance_metrics"],
+                selected_charts=selected_charts if selected_charts is not None else [],
+                version=version + 1 if version is not None else 1,
+                last_modified_by=last_modified_by,
+                updated_at=datetime.utcnow()
+            )
             stmt = stmt.on_conflict_do_update(
                 index_elements=['brand_id'],
                 set_={
                     "selected_kpis": stmt.excluded.selected_kpis,
-                    "visible_sections": stmt.excluded.visible_sections,
-                    "selected_charts": stmt.excluded.selected_charts,
-                    "version": stmt.excluded.version,
+                    "visible_sections": (
+                        stmt.excluded.visible_sections if visible_sections is not None
+                        else func.coalesce(table.c.visible_sections, stmt.excluded.visible_sections)
+                    ),
+                    "selected_charts": (
+                        stmt.excluded.selected_charts if selected_charts is not None
+                        else func.coalesce(table.c.selected_charts, stmt.excluded.selected_charts)
+                    ),
+                    "version": func.coalesce(table.c.version, 1) + 1,
                     "last_modified_by": stmt.excluded.last_modified_by,
                     "updated_at": stmt.excluded.updated_at
-                }
+                },
+                # Optimistic lock: skip the update when the caller's version is stale
+                where=(func.coalesce(table.c.version, 1) == version) if version is not None else None
+            ).returning(
+                table.c.selected_kpis,
+                table.c.visible_sections,
+                table.c.selected_charts,
+                table.c.version,
+                table.c.last_modified_by,
+                table.c.updated_at
             )
 
-            self.db.execute(stmt)
+            row = self.db.execute(stmt).first()
             self.db.commit()
 
-            # Get updated record
-            query = select(table).where(table.c.brand_id == brand_id).limit(1)
-            result = self.db.execute(query)
-            row = result.first()
-
-            if row:
-                return {
-                    "brand_id": brand_id,
-                    "selected_kpis": row.selected_kpis or [],
-                    "visible_sections": row.visible_sections or [],
-                    "selected_charts": row.selected_charts or [],
-                    "version": row.version,
-                    "last_modified_by": row.last_modified_by,
-                    "updated_at": row.updated_at.isoformat() if row.updated_at else None
-                }
-            return selection_data
+            if row is None:
+                return None
+            return {
+                "brand_id": brand_id,
+                "selected_kpis": row.selected_kpis or [],
+                "visible_sections": row.visible_sections or [],
+                "selected_charts": row.selected_charts or [],
+                "version": row.version,
+                "last_modified_by": row.last_modified_by,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None
+            }
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error upserting KPI selection: {str(e)}")
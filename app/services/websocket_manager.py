@@ -2,6 +2,7 @@
 WebSocket Manager for managing connections and subscriptions
 Handles real-time notifications for resource updates
 """
+import asyncio
 import json
 import logging
 from typing import Dict, Set, Optional
@@ -26,6 +27,9 @@ class WebSocketManager:
         # Map of user_id -> {resource_type: {resource_id: timestamp}}
         # Used for tracking what each user is subscribed to
         self.user_subscriptions: Dict[str, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        
+        # Strong references to in-flight background notifications (the loop only keeps weak ones)
+        self._background_tasks: Set[asyncio.Task] = set()
     
     async def connect(self, websocket: WebSocket, user_id: str, user_email: str):
         """Accept a new WebSocket connection"""
@@ -170,6 +174,42 @@ class WebSocketManager:
             exclude_user_id
         )
     
+    def schedule_resource_updated(
+        self,
+        resource_type: str,
+        resource_id: int,
+        updated_by: str,
+        updated_at: str,
+        version: int,
+        exclude_user_id: Optional[str] = None
+    ) -> asyncio.Task:
+        """
+        Fire-and-forget variant of notify_resource_updated.
+        
+        Schedules the broadcast as a background task so request handlers can return without
+        waiting for the fan-out; failures are logged instead of propagated.
+        """
+        task = asyncio.create_task(self.notify_resource_updated(
+            resource_type=resource_type,
+            resource_id=resource_id,
+            updated_by=updated_by,
+            updated_at=updated_at,
+            version=version,
+            exclude_user_id=exclude_user_id
+        ))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return task
+    
+    def _on_background_task_done(self, task: asyncio.Task):
+        """Release a finished background notification and log its failure, if any"""
+        self._background_tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"Failed to send WebSocket notification: {str(error)}")
+    
     async def notify_sync_status(
         self,
         sync_type: str,
@@ -10,7 +10,7 @@ from app.api.routes import (
     reporting_data, clients_data, dashboard_links_data, keywords_data,
     sync_shared, sync_scrunch, sync_ga4, sync_agency_analytics,
 )
-from app.db.database import init_db, check_db_connection
+from app.db.database import init_db, check_db_connection, engine, async_engine
 from app.core.logging_config import setup_logging
 from app.core.error_handlers import (
     base_api_exception_handler,
@@ -70,7 +70,9 @@ async def lifespan(app: FastAPI):
         logger.error("   Make sure PostgreSQL container is running and SUPABASE_DB_HOST=postgres is set")
     
     yield
-    # Shutdown (if needed)
+    # Shutdown: close shared HTTP clients
+    from app.core.database import close_storage_http_client
+    await close_storage_http_client()
 
 app = FastAPI(
     title="MacRAE's Website Analytics API",
@@ -175,7 +177,12 @@ async def health_check():
         "config": config_status,
         "database": {
             "rest_api": "connected" if api_status else "disconnected",
-            "direct_postgres": "connected" if db_status else "disconnected"
+            "direct_postgres": "connected" if db_status else "disconnected",
+            # Checked-in/out and overflow counts, to spot pool exhaustion under load
+            "pools": {
+                "sync": engine.pool.status(),
+                "async": async_engine.pool.status()
+            }
         }
     }
     
@@ -0,0 +1,37 @@
+-- =====================================================
+-- Ensure agency_analytics_campaign_brands has a unique (brand_id, campaign_id) index
+-- =====================================================
+-- Link/unlink and the linked-campaigns join filter on both columns, and linking relies on
+-- INSERT ... ON CONFLICT (campaign_id, brand_id), which needs a unique index on the pair.
+-- Tables created from v4 already have UNIQUE(campaign_id, brand_id); tables created by
+-- SQLAlchemy create_all before the model declared it do not. Only build the index when
+-- no unique index on the pair exists, so the table never carries two of them.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        WHERE i.indrelid = 'agency_analytics_campaign_brands'::regclass
+          AND i.indisunique
+          AND i.indnatts = 2
+          AND (
+              SELECT array_agg(a.attname::text ORDER BY a.attname)
+              FROM pg_attribute a
+              WHERE a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)
+          ) = ARRAY['brand_id', 'campaign_id']
+    ) THEN
+        -- Remove duplicate links first (keep the oldest) so the unique index can be built
+        DELETE FROM agency_analytics_campaign_brands a
+        USING agency_analytics_campaign_brands b
+        WHERE a.brand_id = b.brand_id
+          AND a.campaign_id = b.campaign_id
+          AND a.id > b.id;
+
+        CREATE UNIQUE INDEX ix_aacb_brand_campaign ON agency_analytics_campaign_brands (brand_id, campaign_id);
+    END IF;
+END
+$$;
+
+-- Reverse lookups by campaign (already created by v4; kept idempotent for other setups)
+CREATE INDEX IF NOT EXISTS idx_aa_campaign_brands_campaign_id ON agency_analytics_campaign_brands(campaign_id);
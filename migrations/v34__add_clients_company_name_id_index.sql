@@ -0,0 +1,8 @@
+-- =====================================================
+-- Composite index for keyset pagination of the clients list
+-- =====================================================
+-- GET /data/clients orders by (company_name, id) and seeks with
+-- WHERE (company_name, id) > (:last_name, :last_id); this index serves both the
+-- ordering and the seek so deep pages don't scan and discard earlier rows.
+
+CREATE INDEX IF NOT EXISTS idx_clients_company_name_id ON clients(company_name, id);
@@ -0,0 +1,9 @@
+-- =====================================================
+-- Partial index for the clients list "GA4 assigned" filter
+-- =====================================================
+-- GET /data/clients?ga4_assigned=true filters with NULLIF(ga4_property_id, '') IS NOT NULL.
+-- The index predicate uses the same expression so the planner can match it, and the
+-- (company_name, id) key serves the list ordering and keyset pagination.
+
+CREATE INDEX IF NOT EXISTS idx_clients_ga4_assigned ON clients(company_name, id)
+WHERE NULLIF(ga4_property_id, '') IS NOT NULL;
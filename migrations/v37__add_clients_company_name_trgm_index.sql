@@ -0,0 +1,10 @@
+-- =====================================================
+-- Trigram index for the clients list company-name search
+-- =====================================================
+-- GET /data/clients?search=... filters with company_name ILIKE '%term%'. A leading wildcard
+-- can't use the b-tree idx_clients_company_name, so without this index every search is a
+-- sequential scan. A pg_trgm GIN index serves ILIKE '%term%' directly (terms of 3+ chars).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_clients_company_name_trgm ON clients USING gin (company_name gin_trgm_ops);
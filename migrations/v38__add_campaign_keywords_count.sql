@@ -0,0 +1,86 @@
+-- =====================================================
+-- Trigger-maintained keyword count on agency_analytics_campaigns
+-- =====================================================
+-- GET /data/clients reports keywords_count per client. Instead of counting
+-- agency_analytics_keywords at request time, each campaign carries its own count, kept
+-- current by triggers.
+--
+-- The triggers are statement-level with transition tables: keyword syncs upsert in batches
+-- of up to 1000 rows, so one grouped UPDATE per statement replaces a +1/-1 per row. The
+-- UPDATE trigger handles upserts that move a keyword to a different campaign.
+
+ALTER TABLE agency_analytics_campaigns ADD COLUMN IF NOT EXISTS keywords_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE agency_analytics_campaigns c
+SET keywords_count = k.cnt
+FROM (
+    SELECT campaign_id, COUNT(*) AS cnt
+    FROM agency_analytics_keywords
+    GROUP BY campaign_id
+) k
+WHERE k.campaign_id = c.id;
+
+CREATE OR REPLACE FUNCTION campaign_keywords_count_after_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE agency_analytics_campaigns c
+    SET keywords_count = c.keywords_count + n.cnt
+    FROM (SELECT campaign_id, COUNT(*) AS cnt FROM new_rows GROUP BY campaign_id) n
+    WHERE c.id = n.campaign_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION campaign_keywords_count_after_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE agency_analytics_campaigns c
+    SET keywords_count = GREATEST(c.keywords_count - o.cnt, 0)
+    FROM (SELECT campaign_id, COUNT(*) AS cnt FROM old_rows GROUP BY campaign_id) o
+    WHERE c.id = o.campaign_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION campaign_keywords_count_after_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE agency_analytics_campaigns c
+    SET keywords_count = GREATEST(c.keywords_count + d.delta, 0)
+    FROM (
+        SELECT campaign_id, SUM(delta) AS delta
+        FROM (
+            SELECT o.campaign_id, -1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE o.campaign_id IS DISTINCT FROM n.campaign_id
+            UNION ALL
+            SELECT n.campaign_id, 1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE o.campaign_id IS DISTINCT FROM n.campaign_id
+        ) moves
+        GROUP BY campaign_id
+    ) d
+    WHERE c.id = d.campaign_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_campaign_keywords_count_insert ON agency_analytics_keywords;
+CREATE TRIGGER trg_campaign_keywords_count_insert
+    AFTER INSERT ON agency_analytics_keywords
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_keywords_count_after_insert();
+
+DROP TRIGGER IF EXISTS trg_campaign_keywords_count_delete ON agency_analytics_keywords;
+CREATE TRIGGER trg_campaign_keywords_count_delete
+    AFTER DELETE ON agency_analytics_keywords
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_keywords_count_after_delete();
+
+DROP TRIGGER IF EXISTS trg_campaign_keywords_count_update ON agency_analytics_keywords;
+CREATE TRIGGER trg_campaign_keywords_count_update
+    AFTER UPDATE ON agency_analytics_keywords
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_keywords_count_after_update();
+
+COMMENT ON COLUMN agency_analytics_campaigns.keywords_count IS 'Number of agency_analytics_keywords rows for this campaign; maintained by triggers';
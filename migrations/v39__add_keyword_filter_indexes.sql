@@ -0,0 +1,17 @@
+-- =====================================================
+-- Indexes for the client keywords endpoints
+-- =====================================================
+-- GET /data/clients/{id}/keywords (and its summary / rankings-over-time siblings) filter
+-- agency_analytics_keywords by campaign_id IN (...) plus optional primary_keyword and country
+-- equality filters; the INCLUDE columns cover the remaining region/language filters.
+--
+-- Every keyword then looks up its rankings in a date range (latest ranking via
+-- ORDER BY date DESC LIMIT 1, per-keyword rollups, latest entry per keyword/date), which a
+-- (keyword_id, date) index serves directly instead of filtering the keyword_id index by date.
+
+CREATE INDEX IF NOT EXISTS idx_aa_keywords_campaign_filter
+ON agency_analytics_keywords(campaign_id, primary_keyword, search_location_country_code)
+INCLUDE (search_language, search_location_region_name);
+
+CREATE INDEX IF NOT EXISTS idx_aa_keyword_rankings_keyword_date
+ON agency_analytics_keyword_rankings(keyword_id, date);
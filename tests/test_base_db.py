@@ -0,0 +1,23 @@
+"""
+Tests for the shared table reflection cache in BaseDB.
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.services.db.base import BaseDB
+
+
+def test_get_table_reflects_once_per_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    with Session(bind=engine) as first, Session(bind=engine) as second:
+        table = BaseDB(db=first)._get_table("widgets")
+        assert BaseDB(db=second)._get_table("widgets") is table
+        assert set(table.c.keys()) == {"id", "name"}
+
+    other_engine = create_engine("sqlite://")
+    with other_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE widgets (id INTEGER PRIMARY KEY)"))
+    with Session(bind=other_engine) as other:
+        assert set(BaseDB(db=other)._get_table("widgets").c.keys()) == {"id"}
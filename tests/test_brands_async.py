@@ -0,0 +1,109 @@
+"""
+Tests for the brand read-through cache in AsyncBrandDB.
+"""
+import pytest
+from sqlalchemy.dialects import postgresql
+import sqlalchemy.dialects.postgresql.psycopg
+from app.db.models import Brand
+from app.services.db import brands_async
+from app.services.db.brands_async import AsyncBrandDB
+
+
+class _FakeResult:
+    def __init__(self, brand=None, rowcount=1):
+        self._brand = brand
+        self.rowcount = rowcount
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self._brand
+
+
+class _FakeSession:
+    def __init__(self, brand):
+        self.brand = brand
+        self.executed = 0
+
+    async def execute(self, stmt):
+        self.executed += 1
+        return _FakeResult(self.brand)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _clear_brand_cache():
+    brands_async._brand_cache.clear()
+    yield
+    brands_async._brand_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_get_brand_by_id_is_cached_and_invalidated_on_write():
+    session = _FakeSession(Brand(id=3, name="Acme", version=1))
+    brand_db = AsyncBrandDB(session)
+
+    first = await brand_db.get_brand_by_id(3)
+    first["name"] = "mutated"
+    second = await brand_db.get_brand_by_id(3)
+    assert session.executed == 1
+    assert second["name"] == "Acme"
+
+    assert await brand_db.update_brand_logo_url(3, "https://x/logo.png")
+    await brand_db.get_brand_by_id(3)
+    assert session.executed == 3
+
+
+@pytest.mark.anyio
+async def test_get_brand_by_id_without_cache_always_reads():
+    session = _FakeSession(Brand(id=4, name="Acme", version=1))
+    brand_db = AsyncBrandDB(session)
+
+    await brand_db.get_brand_by_id(4)
+    await brand_db.get_brand_by_id(4, use_cache=False)
+    assert session.executed == 2
+
+
+class _Row:
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class _CapturingSession(_FakeSession):
+    def __init__(self):
+        super().__init__(None)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _FakeResult(_Row({"version": 2, "last_modified_by": None, "theme": {}}))
+
+
+def _render_bound(stmt):
+    """SQL and bind values as psycopg would send them"""
+    compiled = stmt.compile(dialect=postgresql.psycopg.dialect())
+    processors = compiled._bind_processors
+    params = {
+        name: processors[name](value) if name in processors else value
+        for name, value in compiled.params.items()
+    }
+    return str(compiled), params
+
+
+@pytest.mark.anyio
+async def test_merge_brand_theme_replaces_null_or_non_object_theme_with_empty_object():
+    session = _CapturingSession()
+    await AsyncBrandDB(session).merge_brand_theme(5, {"primary": "#000"})
+
+    sql, params = _render_bound(session.statements[0])
+    # A NULL or non-object stored theme falls back to an empty JSONB object, not the JSON string "{}"
+    assert "ELSE '{}'::jsonb END" in sql
+    assert not {"{}", '"{}"'} & {v for v in params.values() if isinstance(v, str)}
+    # The patch itself is still sent as a JSONB object
+    assert any(getattr(v, "obj", None) == {"primary": "#000"} for v in params.values())
@@ -0,0 +1,43 @@
+"""
+Tests for the in-process TTL cache used for dashboard payloads.
+"""
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+
+def test_get_returns_cached_value():
+    cache = TTLCache(maxsize=4, ttl=30)
+    cache.set(1, "key", {"a": 1})
+    assert cache.get(1, "key") == {"a": 1}
+    assert cache.get(2, "key") is None
+
+
+def test_bump_version_invalidates_scope_only():
+    cache = TTLCache(maxsize=4, ttl=30)
+    cache.set(1, "key", "brand-1")
+    cache.set(2, "key", "brand-2")
+    cache.bump_version(1)
+    assert cache.get(1, "key") is None
+    assert cache.get(2, "key") == "brand-2"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=30)
+    cache.set(1, "key", "value")
+    now[0] = 129.0
+    assert cache.get(1, "key") == "value"
+    now[0] = 131.0
+    assert cache.get(1, "key") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set(1, "a", "a")
+    cache.set(1, "b", "b")
+    cache.get(1, "a")
+    cache.set(1, "c", "c")
+    assert cache.get(1, "a") == "a"
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "c") == "c"
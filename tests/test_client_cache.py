@@ -0,0 +1,62 @@
+"""
+Tests for the client row / slug cache in ClientDBMixin.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.db.models import Brand
+from app.services.db import clients
+from app.services.db.clients import ClientDBMixin, invalidate_client_cache
+
+
+@pytest.fixture
+def client_db():
+    clients._client_cache.clear()
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE clients (id INTEGER PRIMARY KEY, url_slug TEXT, company_name TEXT, "
+            "version INTEGER, last_modified_by TEXT, updated_by TEXT, updated_at TIMESTAMP, "
+            "ga4_property_id TEXT, scrunch_brand_id INTEGER)"
+        ))
+        conn.execute(text("INSERT INTO clients (id, url_slug, company_name, version) VALUES (1, 'acme', 'Acme', 1)"))
+    with Session(bind=engine) as session:
+        yield ClientDBMixin(db=session)
+    clients._client_cache.clear()
+
+
+def _rename(client_db, name):
+    client_db.db.execute(text("UPDATE clients SET company_name = :name WHERE id = 1"), {"name": name})
+    client_db.db.commit()
+
+
+def test_cached_reads_until_write_through_service(client_db):
+    assert client_db.get_client_by_slug("acme", use_cache=True)["company_name"] == "Acme"
+    _rename(client_db, "Acme Corp")
+    assert client_db.get_client_by_slug("acme", use_cache=True)["company_name"] == "Acme"
+    assert client_db.get_client_by_id(1)["company_name"] == "Acme Corp"
+
+    client_db.update_client_mapping_cas(1, None, ga4_property_id="123")
+    assert client_db.get_client_by_id(1, use_cache=True)["ga4_property_id"] == "123"
+
+
+def test_changed_slug_stops_resolving(client_db):
+    assert client_db.get_client_by_slug("acme", use_cache=True)["id"] == 1
+    client_db.db.execute(text("UPDATE clients SET url_slug = 'new-slug' WHERE id = 1"))
+    client_db.db.commit()
+    invalidate_client_cache(1, "acme")
+
+    assert client_db.get_client_by_slug("acme", use_cache=True) is None
+    assert client_db.get_client_by_slug("new-slug", use_cache=True)["id"] == 1
+
+
+def test_brand_by_slug_cached_only_when_asked(client_db):
+    Brand.__table__.create(client_db.db.get_bind())
+    client_db.db.add(Brand(id=7, name="Brand", slug="brand", version=1))
+    client_db.db.commit()
+
+    assert client_db.get_brand_by_slug("brand", use_cache=True)["name"] == "Brand"
+    client_db.db.execute(text("UPDATE brands SET name = 'Renamed' WHERE id = 7"))
+    client_db.db.commit()
+    assert client_db.get_brand_by_slug("brand", use_cache=True)["name"] == "Brand"
+    assert client_db.get_brand_by_slug("brand")["name"] == "Renamed"
@@ -0,0 +1,31 @@
+"""
+Tests for the orjson-backed response class.
+"""
+from datetime import date
+from decimal import Decimal
+import json
+import numpy as np
+import pytest
+from app.core.responses import ORJSONResponse
+
+
+def test_orjson_response_matches_jsonable_encoder_conventions():
+    response = ORJSONResponse(content={
+        "whole": Decimal("2"),
+        "fraction": Decimal("1.5"),
+        "count": np.int64(3),
+        "day": date(2025, 1, 31),
+        7: "non-str key",
+    })
+    assert json.loads(response.body) == {
+        "whole": 2,
+        "fraction": 1.5,
+        "count": 3,
+        "day": "2025-01-31",
+        "7": "non-str key",
+    }
+
+
+def test_orjson_response_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        ORJSONResponse(content={"obj": object()})
@@ -0,0 +1,45 @@
+"""
+Tests for background WebSocket notifications.
+"""
+import asyncio
+import pytest
+from app.services.websocket_manager import WebSocketManager
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+
+@pytest.mark.anyio
+async def test_schedule_resource_updated_broadcasts_in_background():
+    manager = WebSocketManager()
+    ws = _FakeWebSocket()
+    manager.active_connections["u1"] = ws
+    manager.subscriptions["kpi_selection"][7].add("u1")
+
+    task = manager.schedule_resource_updated("kpi_selection", 7, "a@b.c", "now", 2)
+    assert manager._background_tasks == {task}
+    await task
+    await asyncio.sleep(0)
+
+    assert len(ws.sent) == 1
+    assert '"version": 2' in ws.sent[0]
+    assert manager._background_tasks == set()
+
+
+@pytest.mark.anyio
+async def test_schedule_resource_updated_swallows_failures(monkeypatch):
+    manager = WebSocketManager()
+
+    async def boom(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(manager, "broadcast_to_subscribers", boom)
+    task = manager.schedule_resource_updated("kpi_selection", 7, "a@b.c", "now", 2)
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert manager._background_tasks == set()